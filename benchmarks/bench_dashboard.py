@@ -0,0 +1,173 @@
+"""Micro-benchmarks do Dashboard sobre histórico sintético.
+
+Mede a consulta do histórico (SQLite embarcado), o enriquecimento de `loadDataToday`, os
+filtros e cada agregação em vários tamanhos, e compara com a baseline
+gravada em `benchmarks/baselines.json` (exit code 1 quando alguma etapa
+regride além da tolerância; 2 quando falta baseline para algum tamanho):
+
+    python benchmarks/bench_dashboard.py --sizes 10000 100000 1000000
+    python benchmarks/bench_dashboard.py --sizes 10000 100000 --save-baseline
+
+A baseline registra em `_maquina` onde foi medida; tempos só são
+comparáveis na mesma máquina (ou classe de máquina do CI). Ao trocar de
+máquina, grave uma baseline nova antes de comparar.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+os.environ.setdefault('STREAMLIT_LOGGER_LEVEL', 'error')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from utils import aggregations as agg  # noqa: E402
+from utils.database import deriveHistoryColumns, enrichToday  # noqa: E402
+from utils.heavy_hitters import TopKStore  # noqa: E402
+from utils.latency import LatencySketchStore  # noqa: E402
+from utils.storage import TABLE, SQLiteBackend  # noqa: E402
+from utils.synthetic import airport_coords, generate_history  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+
+def measure(fn, setup=None, repeat=3):
+    """Melhor tempo (s) de `repeat` execuções; `setup` roda fora da medição"""
+    best = float('inf')
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def read_history(backend):
+    with backend.connection() as conn:
+        return backend.read_sql(f"SELECT * FROM {TABLE} ORDER BY data_partida", conn)
+
+
+def run_size(n_rows, repeat):
+    raw = generate_history(n_rows)
+    coords = airport_coords()
+
+    backend = SQLiteBackend(seed=f'synthetic:{n_rows}')
+
+    history = deriveHistoryColumns(raw.copy())
+    history = agg.history_columns(history)
+    today = enrichToday(raw.copy(), coords)
+
+    days = sorted(history['data_apenas'].unique())
+    start, end = days[len(days) // 4], days[3 * len(days) // 4]
+    company = history['companhia_aerea'].iloc[0]
+    companyFrame = agg.filter_company(history, company)
+
+    benches = {
+        'loader.history.query': (lambda: read_history(backend), None),
+        'transform.history': (deriveHistoryColumns, lambda: (raw.copy(),)),
+        'transform.today.enrich': (lambda df: enrichToday(df, coords), lambda: (raw.copy(),)),
+        'transform.history.filter': (lambda: agg.filter_dates(history, start, end), None),
+        'transform.history.company': (lambda: agg.filter_company(history, company), None),
+        'aggregate.today.airports': (lambda: agg.today_airports(today), None),
+        'aggregate.today.routes': (lambda: agg.today_routes(today), None),
+        'aggregate.today.status': (lambda: agg.today_status(today), None),
+        'aggregate.today.airport_delays': (lambda: agg.today_airport_delays(today), None),
+        'aggregate.today.hourly': (lambda: agg.today_hourly(today), None),
+        'aggregate.history.top_companies': (lambda: agg.top_companies(history), None),
+        'aggregate.history.weekday_hour': (lambda: agg.weekday_hour_counts(history), None),
+        'aggregate.history.top_delay_routes': (lambda: agg.top_delay_routes(history), None),
+        'aggregate.history.top_company_routes': (lambda: agg.top_company_routes(companyFrame), None),
+        'aggregate.history.company_delays': (lambda: agg.company_route_delays(companyFrame), None),
+        'sketch.topk.ingest': (lambda store: store.ingest(history), lambda: (TopKStore(),)),
+        'sketch.latency.ingest': (lambda store: store.ingest(history), lambda: (LatencySketchStore(),)),
+    }
+
+    topk = TopKStore()
+    topk.ingest(history)
+    benches['sketch.topk.query'] = (lambda: (
+        topk.top_companies(start, end), topk.top_delay_routes(start, end),
+        topk.top_company_routes(company, start, end), topk.distinct_routes(start, end)
+    ), None)
+
+    results = {}
+    for name, (fn, setup) in benches.items():
+        results[name] = measure(fn, setup, repeat)
+        print(f"  {name:<42} {results[name] * 1000:>10.2f} ms", flush=True)
+    return results
+
+
+def machine():
+    """Onde a baseline foi medida"""
+    return {
+        'plataforma': platform.platform(),
+        'processador': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'gravada_em': datetime.now().isoformat(timespec='seconds')
+    }
+
+
+def compare(results, baseline, tolerance, min_delta=0.0):
+    """Lista de regressões (tamanho, etapa, atual, baseline); `min_delta` (s) ignora o ruído de etapas sub-ms"""
+    regressions = []
+    for size, benches in results.items():
+        for name, seconds in benches.items():
+            reference = baseline[size].get(name)
+            if reference and seconds > reference * (1 + tolerance) and seconds - reference > min_delta:
+                regressions.append((size, name, seconds, reference))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="grava os resultados como nova baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="regressão tolerada (0.25 = 25%%)")
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help="diferença mínima para contar como regressão")
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        print(f"{size:,} linhas")
+        results[str(size)] = run_size(size, args.repeat)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        baseline['_maquina'] = machine()
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline gravada em {args.baseline}")
+        return 0
+
+    # Sem referência não há como detectar regressão: falha em vez de passar em silêncio
+    if not os.path.exists(args.baseline):
+        print(f"ERRO: baseline {args.baseline} não encontrada; rode com --save-baseline para criar uma.")
+        return 2
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    missing = [size for size in results if size not in baseline]
+    if missing:
+        print(f"ERRO: a baseline não tem os tamanhos {', '.join(missing)}; rode com --save-baseline.")
+        return 2
+
+    reference = baseline.get('_maquina', {})
+    print(f"Baseline de {reference.get('gravada_em', '?')} em {reference.get('plataforma', '?')} "
+          f"({reference.get('cpus', '?')} CPUs, Python {reference.get('python', '?')})")
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_ms / 1000)
+    for size, name, seconds, reference in regressions:
+        print(f"REGRESSÃO {size} {name}: {seconds * 1000:.2f} ms (baseline {reference * 1000:.2f} ms)")
+    if not regressions:
+        print("Sem regressões em relação à baseline.")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""Latência e vazão do cliente de predição contra a API simulada.
+
+Sobe `utils.stub_api` numa porta livre com a latência/erros configurados e
+mede, do ponto de vista do dashboard:
+    - latência ponta a ponta de previsões individuais (p50/p95/p99)
+    - vazão de lotes (voos/s) para cada combinação de tamanho de bloco e
+      concorrência
+
+    python benchmarks/bench_prediction_client.py --latency-ms 30 --per-row-ms 0.2
+    python benchmarks/bench_prediction_client.py --rows 5000 --chunk-sizes 100 500 --concurrency 1 4 8
+    python benchmarks/bench_prediction_client.py --client plain   # requests.post sem sessão, para comparar
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from utils.prediction_client import BATCH_PATH, PREDICT_PATH, PredictionClient  # noqa: E402
+from utils.stub_api import StubConfig, start_in_thread  # noqa: E402
+from utils.synthetic import generate_history  # noqa: E402
+
+
+def flights(n_rows, seed=11):
+    """Payloads de voos no formato enviado pela página Nova Previsão"""
+    df = generate_history(n_rows, seed=seed)
+    return [
+        {
+            'companhia': row.companhia_aerea,
+            'origem_aeroporto': row.origem_aeroporto,
+            'destino_aeroporto': row.destino_aeroporto,
+            'data_partida': row.data_partida.strftime('%Y-%m-%dT%H:%M:%S'),
+            'distancia_km': 1000.0
+        }
+        for row in df.itertuples()
+    ]
+
+
+class PlainClient:
+    """Uma conexão nova por requisição, sem timeout (como a página fazia antes do cliente compartilhado)"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def predict(self, payload):
+        return requests.post(f"{self.base_url}{PREDICT_PATH}", json=payload)
+
+    def predict_batch(self, payloads):
+        return requests.post(f"{self.base_url}{BATCH_PATH}", json=payloads)
+
+
+def bench_single(client, payloads):
+    latencies = []
+    errors = 0
+    for payload in payloads:
+        start = time.perf_counter()
+        response = client.predict(payload)
+        latencies.append(time.perf_counter() - start)
+        errors += response.status_code != 200
+    values = np.asarray(latencies) * 1000
+    return {
+        'n': len(values), 'erros': errors,
+        'p50': float(np.percentile(values, 50)), 'p95': float(np.percentile(values, 95)),
+        'p99': float(np.percentile(values, 99))
+    }
+
+
+def bench_batch(client, payloads, chunk_size, concurrency):
+    chunks = [payloads[i:i + chunk_size] for i in range(0, len(payloads), chunk_size)]
+
+    def send(chunk):
+        try:
+            response = client.predict_batch(chunk)
+        except requests.RequestException:
+            return 0
+        return len(chunk) if response.status_code == 200 else 0
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        ok = sum(pool.map(send, chunks))
+    elapsed = time.perf_counter() - start
+    return {'voos_ok': ok, 'falhas': len(payloads) - ok, 'duracao_s': elapsed, 'voos_s': ok / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--singles', type=int, default=200, help="previsões individuais medidas")
+    parser.add_argument('--rows', type=int, default=2000, help="voos no lote")
+    parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[50, 200, 1000])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--latency-ms', type=float, default=20.0)
+    parser.add_argument('--jitter-ms', type=float, default=10.0)
+    parser.add_argument('--per-row-ms', type=float, default=0.1)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--max-batch', type=int, default=0)
+    parser.add_argument('--client', choices=['shared', 'plain'], default='shared',
+                        help="shared = PredictionClient (keep-alive); plain = requests.post por requisição")
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency_ms, args.jitter_ms, args.per_row_ms, args.error_rate, args.max_batch)
+    server = start_in_thread(port=0, config=config)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"API simulada em {base_url} ({config})")
+    client = PredictionClient(base_url) if args.client == 'shared' else PlainClient(base_url)
+
+    try:
+        payloads = flights(max(args.rows, args.singles))
+
+        single = bench_single(client, payloads[:args.singles])
+        print(f"\nPrevisão individual ({single['n']} requisições, {single['erros']} erros)")
+        print(f"  p50 {single['p50']:.1f} ms   p95 {single['p95']:.1f} ms   p99 {single['p99']:.1f} ms")
+
+        print(f"\nLote de {args.rows} voos")
+        print(f"  {'bloco':>6} {'concorrência':>13} {'voos/s':>10} {'duração s':>10} {'falhas':>7}")
+        for chunk_size in args.chunk_sizes:
+            for concurrency in args.concurrency:
+                result = bench_batch(client, payloads[:args.rows], chunk_size, concurrency)
+                print(f"  {chunk_size:>6} {concurrency:>13} {result['voos_s']:>10.0f} "
+                      f"{result['duracao_s']:>10.2f} {result['falhas']:>7}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""Teste de carga: N sessões simultâneas executando as páginas reais.
+
+Cada sessão é um `AppTest` rodando os scripts de `src/pages` no mesmo
+processo (como numa réplica do Streamlit), contra o SQLite embarcado e a
+API de predição simulada. Para cada nível de concorrência são reportados
+os percentis de latência por interação, o pico de RSS do processo e a
+saturação do pool de conexões do banco. Uma execução que falha ou uma
+página renderizada sem o widget da próxima interação conta como erro
+daquela interação (o AppTest compartilha um runtime global entre as
+threads, então erros esporádicos com várias sessões podem vir do próprio
+harness; com uma sessão devem ser zero):
+
+    python benchmarks/load_test.py --sessions 1 4 8 16 --rows 100000
+    python benchmarks/load_test.py --sessions 8 --json resultado.json
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+PAGES = os.path.join(SRC, 'pages')
+sys.path.insert(0, SRC)
+
+
+def write_airports(path):
+    """Grava um airports.dat (formato OpenFlights) com os aeroportos do gerador sintético"""
+    from utils.synthetic import AIRPORTS_BR, AIRPORTS_US
+    with open(path, 'w', encoding='utf-8') as f:
+        for i, (iata, (lat, lon, _)) in enumerate({**AIRPORTS_BR, **AIRPORTS_US}.items(), start=1):
+            country = 'Brazil' if iata in AIRPORTS_BR else 'United States'
+            f.write(f'{i},"{iata} Airport","{iata}","{country}","{iata}","\\N",{lat},{lon},0,0,"N","\\N","airport","OurAirports"\n')
+
+
+def batch_csv(n_rows, seed=7):
+    """CSV de upload em lote com voos do gerador sintético (distância em branco para forçar o cálculo)"""
+    from utils.synthetic import generate_history
+    df = generate_history(n_rows, seed=seed)
+    upload = df[['companhia_aerea', 'origem_aeroporto', 'destino_aeroporto']].rename(columns={'companhia_aerea': 'companhia'})
+    upload['data_partida'] = df['data_partida'].dt.strftime('%Y-%m-%dT%H:%M:%S')
+    upload['distancia_km'] = 0
+    buffer = io.StringIO()
+    upload.to_csv(buffer, index=False)
+    return buffer.getvalue().encode('utf-8')
+
+
+class RssSampler:
+    """Amostra o RSS do processo em segundo plano e guarda o pico"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def current():
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError):
+            import resource
+            # ru_maxrss é em KB no Linux (pico desde o início do processo)
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = self.current()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class Session:
+    """Uma sessão simulada; cada interação é uma execução completa da página"""
+
+    def __init__(self, upload, timeout):
+        self.upload = upload
+        self.timeout = timeout
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def _run(self, name, at):
+        start = time.perf_counter()
+        try:
+            at.run()
+        except Exception:
+            # O AppTest compartilha o runtime global entre threads: uma execução
+            # concorrente pode derrubá-lo no meio desta. Conta como erro.
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - start)
+        if at.exception or at.error:
+            self.errors[name] += 1
+        return at
+
+    def _missing(self, name, widgets):
+        """Página renderizada sem o widget esperado: erro da interação, em vez de pular em silêncio"""
+        if not widgets:
+            self.errors[name] += 1
+        return not widgets
+
+    def dashboard(self, step):
+        from streamlit.testing.v1 import AppTest
+        at = self._run('dashboard.abrir', AppTest.from_file(os.path.join(PAGES, 'Dashboard.py'), default_timeout=self.timeout))
+        if at is None or at.exception or self._missing('dashboard.periodo', at.date_input):
+            return
+
+        # Troca de período: o histórico sintético cobre um ano, então 30-90 dias depois do início é válido
+        inicio = at.date_input[0]
+        inicio.set_value(inicio.value + timedelta(days=30 * ((step % 3) + 1)))
+        if self._run('dashboard.periodo', at) is None:
+            return
+
+        # Drill-down por companhia
+        companies = [s for s in at.selectbox if 'Selecione a Companhia' in s.label]
+        if companies:
+            company = companies[0]
+            company.set_value(company.options[step % len(company.options)])
+            self._run('dashboard.companhia', at)
+
+    def batch(self):
+        from streamlit.testing.v1 import AppTest
+        at = self._run('lote.abrir', AppTest.from_file(os.path.join(PAGES, 'Nova_Previsão.py'), default_timeout=self.timeout))
+        if at is None or at.exception:
+            return
+        # A página só monta o modo escolhido: troca para o lote antes do upload
+        modes = [w for w in at.button_group if "Previsão em Lote (CSV)" in w.options]
+        if self._missing('lote.modo', modes):
+            return
+        modes[0].set_value("Previsão em Lote (CSV)")
+        if self._run('lote.modo', at) is None or self._missing('lote.upload', at.file_uploader):
+            return
+        at.file_uploader[0].set_value(('voos.csv', self.upload, 'text/csv'))
+        if self._run('lote.upload', at) is None:
+            return
+        buttons = [b for b in at.button if b.label == "Processar Previsões em Lote"]
+        if self._missing('lote.enviar', buttons):
+            return
+        buttons[0].click()
+        if self._run('lote.enviar', at) is None:
+            return
+
+        # O lote roda na fila em segundo plano: mede até o job terminar e a página mostrar o resultado
+        from utils.jobs import FINISHED, get_job_queue
+        job_id = at.session_state['batch_job_id'] if 'batch_job_id' in at.session_state else None
+        if not job_id:
+            self.errors['lote.job'] += 1
+            return
+        store = get_job_queue().store
+        start = time.perf_counter()
+        while store.progress(job_id)['status'] not in FINISHED:
+            if time.perf_counter() - start > self.timeout:
+                self.errors['lote.job'] += 1
+                return
+            time.sleep(0.05)
+        self.latencies['lote.job'].append(time.perf_counter() - start)
+        self._run('lote.resultados', at)
+
+    def run(self, iterations):
+        for step in range(iterations):
+            self.dashboard(step)
+            self.batch()
+        return self
+
+
+def percentiles(values):
+    values = np.asarray(values) * 1000
+    return {
+        'n': len(values), 'p50': float(np.percentile(values, 50)), 'p95': float(np.percentile(values, 95)),
+        'p99': float(np.percentile(values, 99)), 'max': float(values.max())
+    }
+
+
+def run_level(n_sessions, iterations, upload, timeout, backend):
+    backend.stats.reset()
+    with RssSampler() as rss:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=n_sessions) as pool:
+            sessions = list(pool.map(lambda _: Session(upload, timeout).run(iterations), range(n_sessions)))
+        elapsed = time.perf_counter() - start
+
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    for session in sessions:
+        for name, values in session.latencies.items():
+            latencies[name].extend(values)
+        for name, count in session.errors.items():
+            errors[name] += count
+
+    return {
+        'sessoes': n_sessions,
+        'duracao_s': elapsed,
+        'interacoes': {name: {**percentiles(values), 'erros': errors.get(name, 0)} for name, values in latencies.items()},
+        'rss_pico_mb': rss.peak / 2 ** 20,
+        'pool': backend.stats.snapshot()
+    }
+
+
+def report(level):
+    pool = level['pool']
+    print(f"\n{level['sessoes']} sessões — {level['duracao_s']:.1f} s, pico de RSS {level['rss_pico_mb']:.0f} MB, "
+          f"pool {pool['pico']}/{pool['tamanho']} conexões (esperas: {pool['esperas']} de {pool['aquisicoes']}, "
+          f"{pool['espera_s'] * 1000:.0f} ms)")
+    print(f"  {'interação':<22} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'máx ms':>9} {'erros':>6}")
+    for name, stats in level['interacoes'].items():
+        print(f"  {name:<22} {stats['n']:>5} {stats['p50']:>9.0f} {stats['p95']:>9.0f} "
+              f"{stats['p99']:>9.0f} {stats['max']:>9.0f} {stats['erros']:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--iterations', type=int, default=2, help="ciclos (dashboard + lote) por sessão")
+    parser.add_argument('--rows', type=int, default=100_000, help="linhas do histórico sintético")
+    parser.add_argument('--batch-rows', type=int, default=200, help="voos no CSV de upload em lote")
+    parser.add_argument('--backend', default='sqlite://', help="DB_BACKEND usado no teste")
+    parser.add_argument('--pool-size', type=int, default=5)
+    parser.add_argument('--api-port', type=int, default=0, help="porta da API simulada (0 = porta livre)")
+    parser.add_argument('--timeout', type=float, default=300, help="tempo máximo de uma execução de página (s)")
+    parser.add_argument('--json', help="grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='flightontime-load-')
+    airports = os.path.join(workdir, 'airports.dat')
+    write_airports(airports)
+
+    # Configuração antes de importar os módulos do app (lida na importação)
+    os.environ.setdefault('STREAMLIT_LOGGER_LEVEL', 'error')
+    os.environ['DB_BACKEND'] = args.backend
+    os.environ['DB_SEED'] = f'synthetic:{args.rows}'
+    os.environ['DB_POOL_SIZE'] = str(args.pool_size)
+    os.environ['OPENFLIGHTS_URL'] = airports
+    os.environ['JOBS_DB'] = os.path.join(workdir, 'jobs.db')
+
+    from utils.storage import get_backend
+    from utils.stub_api import start_in_thread
+
+    server = start_in_thread(port=args.api_port)
+    os.environ['PREDICTION_API_URL'] = f"http://127.0.0.1:{server.server_address[1]}"
+    backend = get_backend()
+    upload = batch_csv(args.batch_rows)
+
+    # Aquecimento: popula os caches compartilhados, como numa réplica já em uso
+    Session(upload, args.timeout).run(1)
+
+    results = []
+    try:
+        for n_sessions in args.sessions:
+            level = run_level(n_sessions, args.iterations, upload, args.timeout, backend)
+            report(level)
+            results.append(level)
+    finally:
+        server.shutdown()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResultados gravados em {args.json}")
+
+
+if __name__ == '__main__':
+    main()
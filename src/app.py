@@ -1,28 +1,27 @@
 import streamlit as st
 from streamlit import Page, navigation
+from utils.metrics import begin_rerun, render_debug_panel, export_metrics
+from utils.profiling import profile_rerun
+from utils.memory_cache import render_cache_panel
+from utils.assets import background_css
 
 st.set_page_config(layout="wide")
+begin_rerun()
 
-st.markdown("""
-<style>
-    .stApp { 
-        background-color: #ffffff;
-        
-        background-image: linear-gradient(rgba(255,255,255,0.8), rgba(255,255,255,0.8)), 
-                          url("https://upload.wikimedia.org/wikipedia/commons/8/80/World_map_-_low_resolution.svg");
-        
-        background-size: cover;
-        background-position: center;
-        background-repeat: no-repeat;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Fundo servido pelo próprio app (src/static), com cache longo no navegador
+st.markdown(background_css(), unsafe_allow_html=True)
 
 st.title("Flight Delay")
 
 Nova_Previsão= Page("pages/Nova_Previsão.py")
 Dashboard= Page("pages/Dashboard.py")
+Desempenho_Modelo= Page("pages/Desempenho_Modelo.py")
 Storytelling= Page("pages/Storytelling.py")
 
-nav = navigation([Nova_Previsão, Dashboard, Storytelling])
-nav.run()
+nav = navigation([Nova_Previsão, Dashboard, Desempenho_Modelo, Storytelling])
+with profile_rerun(nav.title):
+    nav.run()
+
+render_debug_panel()
+render_cache_panel()
+export_metrics()
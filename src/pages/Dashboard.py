@@ -1,360 +1,283 @@
 import streamlit as st
-import pandas as pd
-import sqlite3
-import os
 from datetime import datetime
 import plotly.express as px
 import plotly.graph_objects as go
-from psycopg2 import pool
-from dotenv import load_dotenv
+from plotly.colors import sample_colorscale
+from utils.database import HISTORY_TTL, loadData, loadDataToday
+from utils.aggregations import (
+    today_airports, today_routes, today_status, today_airport_delays, today_hourly,
+    history_columns, filter_dates, filter_company, top_companies, top_delay_routes,
+    top_company_routes, company_route_delays, weekday_hour_counts, weekday_hour_frame, weekday_hour_arrays,
+    weekday_hour_grid
+)
+from utils.geo import route_arcs, bucket_arcs
+from utils.heavy_hitters import TopKStore
+from utils.trends import DelayTrendStore, WINDOWS
+from utils.live import LIVE_INTERVAL, get_today_feed
+from utils.metrics import timed, record_error, render_chart
+from utils.memory_cache import memory_cached
+from utils.shared_cache import shared_dataset
 
-@st.cache_data
-def loadAirporsOpenFlights():
-    """Carrega dados de aeroportos do OpenFlights via GitHub"""
-    url = "https://raw.githubusercontent.com/jpatokal/openflights/master/data/airports.dat"
-    
-    # Colunas do arquivo airports.dat
-    colunas = [
-        'airport_id', 'name', 'city', 'country', 'iata', 'icao',
-        'latitude', 'longitude', 'altitude', 'timezone', 'dst',
-        'tz_database', 'type', 'source'
-    ]
-    
-    try:
-        dfAirports = pd.read_csv(url, header=None, names=colunas, na_values='\\N')
-        
-        # Filtrar apenas aeroportos com código IATA válido
-        dfAirports = dfAirports[dfAirports['iata'].notna()]
-        
-        # Criar dicionário para lookup rápido por código IATA
-        airportDict = {}
-        for _, row in dfAirports.iterrows():
-            airportDict[row['iata']] = {
-                'lat': row['latitude'],
-                'lon': row['longitude'],
-                'nome': f"{row['name']} - {row['city']}, {row['country']}"
-            }
-        
-        return airportDict
-    
-    except Exception as e:
-        st.error(f"Erro ao carregar dados do OpenFlights: {str(e)}")
-        return {}
+ROUTE_COLORSCALE = 'RdYlGn_r'
+ROUTE_BUCKETS = 5
 
-load_dotenv()   
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST'),
-    'port': int(os.getenv('DB_PORT')),
-    'database': os.getenv('DB_NAME'),
-    'user': os.getenv('DB_USER'),
-    'password': os.getenv('DB_PASSWORD')
-}
-   
-@st.cache_resource
-def get_connection_pool():
-    try:
-        connection_pool = pool.SimpleConnectionPool(
-            1, 5,  
-            **DB_CONFIG
-        )
-        return connection_pool
-    except Exception as e:
-        st.error(f"❌ Erro ao criar pool de conexões: {str(e)}")
-        return None
+@memory_cached(resident=True)
+def get_topk_store():
+    """Sketches de Top-N compartilhados entre as sessões; o erro escolhido só entra na consulta"""
+    return TopKStore()
 
-def get_connection():
-    """Obtém uma conexão do pool"""
-    pool = get_connection_pool()
-    if pool:
-        try:
-            return pool.getconn()
-        except Exception as e:
-            st.error(f"Erro ao obter conexão: {str(e)}")
-            return None
-    return None
+@memory_cached
+def filtered_history(_df, version, data_inicio, data_fim):
+    """Histórico do período, um frame por versão do dataset compartilhado entre as sessões"""
+    return filter_dates(_df, data_inicio, data_fim)
 
-def release_connection(conn):
-    """Libera a conexão de volta ao pool"""
-    pool = get_connection_pool()
-    if pool and conn:
-        pool.putconn(conn)
+@memory_cached
+def company_history(_df, version, data_inicio, data_fim, company):
+    """Histórico do período de uma companhia, compartilhado entre as sessões"""
+    return filter_company(_df, company)
 
-@st.cache_data(ttl=300)
-def loadData():
-    conn = get_connection()
-    
-    if not conn:
-        st.error("❌ Não foi possível conectar ao banco de dados")
-        return pd.DataFrame()
-    
-    try:
-        # Query para PostgreSQL (nome da tabela em minúsculas)
-        query = "SELECT * FROM prediction_history ORDER BY data_partida"
-        
-        # Executar query
-        df = pd.read_sql_query(query, conn)
-        
-        # Processamento dos dados (igual ao original)
-        df['data_partida'] = pd.to_datetime(df['data_partida'])
-        df['data_apenas'] = df['data_partida'].dt.date
-        df['linhas_aereas'] = df['origem_aeroporto'] + " -> " + df['destino_aeroporto']
-        df['hora_partida'] = df['data_partida'].dt.hour
-        
-        return df
-    
-    except Exception as e:
-        st.error(f"❌ Erro ao carregar dados: {str(e)}")
-        return pd.DataFrame()
-    
-    finally:
-        release_connection(conn)
+@memory_cached
+def weekday_hour_cached(_df, version, data_inicio, data_fim):
+    """Contagens dia da semana x hora por companhia: uma réplica calcula por versão do dataset e período, as demais leem"""
+    counts = shared_dataset(
+        f"weekday_hour:{data_inicio}:{data_fim}", lambda: weekday_hour_frame(*weekday_hour_counts(_df)),
+        ttl=HISTORY_TTL, version=version
+    )
+    return weekday_hour_arrays(counts)
 
-def loadDataToday():
-    conn = get_connection()
-    
-    if not conn:
-        st.error("❌ Não foi possível conectar ao banco de dados")
-        return pd.DataFrame()
-    
-    try:
-        query = """
-            SELECT * FROM prediction_history
-            WHERE DATE(data_partida) = CURRENT_DATE
-            ORDER BY data_partida
-        """
-        
-        # Executar query
-        df = pd.read_sql_query(query, conn)
-        
-        df['data_partida'] = pd.to_datetime(df['data_partida'])
-        df['data_apenas'] = df['data_partida'].dt.date
-        df['linhas_aereas'] = df['origem_aeroporto'] + " -> " + df['destino_aeroporto']
-        df['hora_partida'] = df['data_partida'].dt.hour
-        
-        # Adicionar coordenadas dos aeroportos
-        aeroportos_coords = loadAirporsOpenFlights()
-        
-        df['origem_latitude'] = df['origem_aeroporto'].map(
-            lambda x: aeroportos_coords.get(x, {}).get('lat', None)
-        )
-        df['origem_longitude'] = df['origem_aeroporto'].map(
-            lambda x: aeroportos_coords.get(x, {}).get('lon', None)
-        )
-        df['origem_nome_completo'] = df['origem_aeroporto'].map(
-            lambda x: aeroportos_coords.get(x, {}).get('nome', x)
-        )
-        
-        df['destino_latitude'] = df['destino_aeroporto'].map(
-            lambda x: aeroportos_coords.get(x, {}).get('lat', None)
-        )
-        df['destino_longitude'] = df['destino_aeroporto'].map(
-            lambda x: aeroportos_coords.get(x, {}).get('lon', None)
-        )
-        df['destino_nome_completo'] = df['destino_aeroporto'].map(
-            lambda x: aeroportos_coords.get(x, {}).get('nome', x)
-        )
-        
-        return df
-    
-    except Exception as e:
-        st.error(f"❌ Erro ao carregar dados de hoje: {str(e)}")
-        return pd.DataFrame()
-    
-    finally:
-        release_connection(conn)
+@memory_cached(resident=True)
+def get_trend_store():
+    """Somas prefixadas diárias da taxa de atraso, compartilhadas entre as sessões"""
+    return DelayTrendStore()
 
-try:
-    dfToday = loadDataToday()
-    col1, col2 = st.columns([0.85, 0.15])
-    
-    with col1:
-        st.header("📊 Dashboard de Análise de Voos de Hoje")
-    with col2:
-        st.button("🔄 Atualizar Dados") 
-    
-    airportsOri = dfToday[['origem_aeroporto', 'origem_latitude', 'origem_longitude', 'origem_nome_completo']].copy()
-    airportsOri.columns = ['aeroporto', 'latitude', 'longitude', 'nome_completo']
-    
-    airportsDest = dfToday[['destino_aeroporto', 'destino_latitude', 'destino_longitude', 'destino_nome_completo']].copy()
-    airportsDest.columns = ['aeroporto', 'latitude', 'longitude', 'nome_completo']
+def today_views(dfToday):
+    """Agregados de hoje recalculados a partir do dataset completo do dia"""
+    with timed('transform.today.airports', rows=len(dfToday)):
+        dfAirports = today_airports(dfToday)
+    with timed('aggregate.today.routes', rows=len(dfToday)):
+        dfRoutes = today_routes(dfToday)
+    with timed('aggregate.today.status', rows=len(dfToday)):
+        dfDelayed = today_status(dfToday)
+    with timed('aggregate.today.airport_delays', rows=len(dfToday)):
+        airport_delays = today_airport_delays(dfToday)
+    with timed('aggregate.today.hourly', rows=len(dfToday)):
+        hourly_data = today_hourly(dfToday)
+    return dfAirports, dfRoutes, dfDelayed, airport_delays, hourly_data
 
-    dfAirports = pd.concat([airportsOri, airportsDest]).drop_duplicates(subset=['aeroporto'])
+def render_today(dfAirports, dfRoutes, dfDelayed, airport_delays, hourly_data):
+    """Globo, status, aeroportos mais problemáticos e evolução por hora de hoje"""
+    with timed('chart.today.globe'):
+        fig1 = go.Figure()
 
-    dfAirports = dfAirports.dropna(subset=['latitude', 'longitude'])
-    
-    origin = dfToday['origem_aeroporto'].value_counts()
-    destination = dfToday['destino_aeroporto'].value_counts()
-    total = origin.add(destination, fill_value=0)
-    dfAirports['total'] = dfAirports['aeroporto'].map(total).fillna(0)
-    
-    fig1 = go.Figure()
+        # Rotas do dia como arcos de grande círculo, coloridas pela taxa de atraso prevista
+        if not dfRoutes.empty:
+            with timed('transform.today.arcs', rows=len(dfRoutes)):
+                arcLats, arcLons = route_arcs(
+                    dfRoutes['origem_aeroporto'], dfRoutes['destino_aeroporto'],
+                    dfRoutes['origem_latitude'], dfRoutes['origem_longitude'],
+                    dfRoutes['destino_latitude'], dfRoutes['destino_longitude']
+                )
 
-    fig1.add_trace(go.Scattergeo(
-        lon = dfAirports['longitude'],
-        lat = dfAirports['latitude'],
-        mode = 'markers',
-        marker = dict(
-            size = 12 + dfAirports['total'] * 2,
-            color = dfAirports['total'],
-            colorscale = 'Inferno',
-            cmin = 0,
-            cmax = dfAirports['total'].max() if len(dfAirports) > 0 else 1,
-            opacity = 0.8,
-            colorbar = dict(title="Nº de Voos"),
-            line = dict(width=1, color='white')
-        ),
-        text = dfAirports['nome_completo'] + '<br>Código: ' + dfAirports['aeroporto'] + '<br>Voos: ' + dfAirports['total'].astype(int).astype(str),
-        hoverinfo = 'text',
-        name = 'Aeroportos'
-    ))
+            # Um traço por faixa de cor (número fixo), com as rotas separadas por NaN
+            for bucket, lats, lons in bucket_arcs(arcLats, arcLons, dfRoutes['taxa_atraso'], ROUTE_BUCKETS):
+                fig1.add_trace(go.Scattergeo(
+                    lon = lons,
+                    lat = lats,
+                    mode = 'lines',
+                    line = dict(width=1.5, color=sample_colorscale(ROUTE_COLORSCALE, (bucket + 0.5) / ROUTE_BUCKETS)[0]),
+                    opacity = 0.7,
+                    hoverinfo = 'skip',
+                    showlegend = False
+                ))
 
-    fig1.update_geos(
-        projection_type="orthographic",
-        showcountries=True, 
-        countrycolor="white",
-        showocean=True, 
-        oceancolor="#2156BB",
-        showland=True, 
-        landcolor="#18CB54",
-        showlakes=False,
-        projection_rotation=dict(lon=-47.9, lat=-15.8, roll=0),
-        center=dict(lon=-47.9, lat=-15.8)
-    )
+            # Ponto médio de cada arco: hover por rota e escala de cores da taxa de atraso
+            mid = arcLats.shape[1] // 2
+            fig1.add_trace(go.Scattergeo(
+                lon = arcLons[:, mid],
+                lat = arcLats[:, mid],
+                mode = 'markers',
+                marker = dict(
+                    size = 4,
+                    color = dfRoutes['taxa_atraso'].clip(0, 1),
+                    colorscale = ROUTE_COLORSCALE,
+                    cmin = 0,
+                    cmax = 1,
+                    colorbar = dict(title="Taxa de Atraso", tickformat='.0%', x=0.02, xanchor='left')
+                ),
+                text = dfRoutes['origem_aeroporto'] + ' → ' + dfRoutes['destino_aeroporto'] + '<br>Voos: ' + dfRoutes['voos'].astype(str) + '<br>Taxa de Atraso: ' + (dfRoutes['taxa_atraso'].clip(0, 1) * 100).round(1).astype(str) + '%',
+                hoverinfo = 'text',
+                name = 'Rotas'
+            ))
 
-    fig1.update_layout(
-        height=600,
-        margin={"r":0,"t":0,"l":0,"b":0},
-        paper_bgcolor="rgba(0,0,0,0)", 
-        plot_bgcolor="rgba(0,0,0,0)"
-    )
+        fig1.add_trace(go.Scattergeo(
+            lon = dfAirports['longitude'],
+            lat = dfAirports['latitude'],
+            mode = 'markers',
+            marker = dict(
+                size = 12 + dfAirports['total'] * 2,
+                color = dfAirports['total'],
+                colorscale = 'Inferno',
+                cmin = 0,
+                cmax = dfAirports['total'].max() if len(dfAirports) > 0 else 1,
+                opacity = 0.8,
+                colorbar = dict(title="Nº de Voos"),
+                line = dict(width=1, color='white')
+            ),
+            text = dfAirports['nome_completo'] + '<br>Código: ' + dfAirports['aeroporto'] + '<br>Voos: ' + dfAirports['total'].astype(int).astype(str),
+            hoverinfo = 'text',
+            name = 'Aeroportos'
+        ))
+
+        fig1.update_geos(
+            projection_type="orthographic",
+            showcountries=True, 
+            countrycolor="white",
+            showocean=True, 
+            oceancolor="#2156BB",
+            showland=True, 
+            landcolor="#18CB54",
+            showlakes=False,
+            projection_rotation=dict(lon=-47.9, lat=-15.8, roll=0),
+            center=dict(lon=-47.9, lat=-15.8)
+        )
+
+        fig1.update_layout(
+            height=600,
+            margin={"r":0,"t":0,"l":0,"b":0},
+            paper_bgcolor="rgba(0,0,0,0)", 
+            plot_bgcolor="rgba(0,0,0,0)"
+        )
     
-    st.plotly_chart(fig1, width="stretch")
+    render_chart(fig1, 'today.globe')
     
 
     col1, col2 = st.columns(2)
 
     with col1:
         st.subheader("✈️ Atrasados vs Pontuais")
-        dfDelayed = dfToday['atraso_previsto'].value_counts().reset_index()
-        dfDelayed.columns = ['Status_Code', 'Total']
-        dfDelayed['Status_Nome'] = dfDelayed['Status_Code'].map({0: 'Pontual', 1: 'Atrasado'})
-        fig2 = px.pie(
-            dfDelayed,
-            values='Total',
-            names='Status_Nome',
-            color='Status_Nome',
-            color_discrete_map={'Pontual': '#2ECC71', 'Atrasado': '#EF553B'},
-            hole=0.4 
-        )
-        fig2.update_layout(
-            title='Distribuição de Status dos Voos'
-        )
-        st.plotly_chart(fig2, width="stretch")
+        with timed('chart.today.status'):
+            fig2 = px.pie(
+                dfDelayed,
+                values='Total',
+                names='Status_Nome',
+                color='Status_Nome',
+                color_discrete_map={'Pontual': '#2ECC71', 'Atrasado': '#EF553B'},
+                hole=0.4 
+            )
+            fig2.update_layout(
+                title='Distribuição de Status dos Voos'
+            )
+        render_chart(fig2, 'today.status')
         
     with col2:
         st.subheader("🚨 Aeroportos Mais Problemáticos")
-        airport_delays = dfToday.groupby('origem_aeroporto').agg({
-            'atraso_previsto': ['sum', 'count', 'mean']
-        }).reset_index()
-        airport_delays.columns = ['Aeroporto', 'Total_Atrasos', 'Total_Voos', 'Taxa_Atraso']
-        airport_delays = airport_delays.sort_values('Taxa_Atraso', ascending=False).head(5)
-        
-        fig3 = px.bar(
-            airport_delays,
-            x='Aeroporto',
-            y='Taxa_Atraso',
-            color='Taxa_Atraso',
-            color_continuous_scale='Reds',
-            labels={'Taxa_Atraso': 'Taxa de Atraso (%)'},
-            text='Taxa_Atraso'
-        )
-        fig3.update_traces(texttemplate='%{text:.1%}', textposition='outside')
-        fig3.update_layout(
-            title='Top 5 Aeroportos com Maior Taxa de Atraso',
-            showlegend=False
-        )
-        st.plotly_chart(fig3, width="stretch")
+        with timed('chart.today.airport_delays'):
+            fig3 = px.bar(
+                airport_delays,
+                x='Aeroporto',
+                y='Taxa_Atraso',
+                color='Taxa_Atraso',
+                color_continuous_scale='Reds',
+                labels={'Taxa_Atraso': 'Taxa de Atraso (%)'},
+                text='Taxa_Atraso'
+            )
+            fig3.update_traces(texttemplate='%{text:.1%}', textposition='outside')
+            fig3.update_layout(
+                title='Top 5 Aeroportos com Maior Taxa de Atraso',
+                showlegend=False
+            )
+        render_chart(fig3, 'today.airport_delays')
     
     st.subheader("⏰ Evolução de Atrasos por Hora")
-    hourly_data = dfToday.groupby('hora_partida').agg({
-        'atraso_previsto': ['sum', 'count']
-    }).reset_index()
-    hourly_data.columns = ['Hora', 'Atrasados', 'Total_Voos']
-    hourly_data['Pontuais'] = hourly_data['Total_Voos'] - hourly_data['Atrasados']
-    hourly_data['Taxa_Atraso'] = (hourly_data['Atrasados'] / hourly_data['Total_Voos']) * 100
-    
-    fig4 = go.Figure()
+    with timed('chart.today.hourly'):
+        fig4 = go.Figure()
+    
+        fig4.add_trace(go.Bar(
+            x=hourly_data['Hora'],
+            y=hourly_data['Pontuais'],
+            name='Pontuais',
+            marker_color='#2ECC71'
+        ))
     
-    fig4.add_trace(go.Bar(
-        x=hourly_data['Hora'],
-        y=hourly_data['Pontuais'],
-        name='Pontuais',
-        marker_color='#2ECC71'
-    ))
+        fig4.add_trace(go.Bar(
+            x=hourly_data['Hora'],
+            y=hourly_data['Atrasados'],
+            name='Atrasados',
+            marker_color='#EF553B'
+        ))
     
-    fig4.add_trace(go.Bar(
-        x=hourly_data['Hora'],
-        y=hourly_data['Atrasados'],
-        name='Atrasados',
-        marker_color='#EF553B'
-    ))
+        fig4.add_trace(go.Scatter(
+            x=hourly_data['Hora'],
+            y=hourly_data['Taxa_Atraso'],
+            name='Taxa de Atraso (%)',
+            yaxis='y2',
+            mode='lines+markers',
+            marker=dict(size=8, color='#F39C12'),
+            line=dict(width=3, color='#F39C12')
+        ))
     
-    fig4.add_trace(go.Scatter(
-        x=hourly_data['Hora'],
-        y=hourly_data['Taxa_Atraso'],
-        name='Taxa de Atraso (%)',
-        yaxis='y2',
-        mode='lines+markers',
-        marker=dict(size=8, color='#F39C12'),
-        line=dict(width=3, color='#F39C12')
-    ))
+        fig4.update_layout(
+            title='Evolução de Voos por Hora do Dia',
+            xaxis_title='Hora do Dia',
+            yaxis_title='Número de Voos',
+            yaxis2=dict(
+                title='Taxa de Atraso (%)',
+                overlaying='y',
+                side='right'
+            ),
+            barmode='stack',
+            hovermode='x unified',
+            height=500
+        )
     
-    fig4.update_layout(
-        title='Evolução de Voos por Hora do Dia',
-        xaxis_title='Hora do Dia',
-        yaxis_title='Número de Voos',
-        yaxis2=dict(
-            title='Taxa de Atraso (%)',
-            overlaying='y',
-            side='right'
-        ),
-        barmode='stack',
-        hovermode='x unified',
-        height=500
-    )
+    render_chart(fig4, 'today.hourly')
+
+@st.fragment(run_every=LIVE_INTERVAL)
+def live_today():
+    """Seção de hoje ao vivo: lê os agregados mantidos pelo feed, sem consultar o dia inteiro"""
+    try:
+        feed = get_today_feed()
+        with timed('aggregate.today.live'):
+            views = feed.views()
+        st.caption(
+            f"🔴 Ao vivo — {feed.flights:,} voos hoje, atualizado às "
+            f"{datetime.fromtimestamp(feed.updated_at):%H:%M:%S}"
+        )
+        if feed.error:
+            st.warning(f"Falha ao buscar previsões novas: {feed.error}")
+        render_today(*views)
+    except Exception as e:
+        record_error('dashboard.today.live', e)
+        st.error(f"Erro no modo ao vivo: {str(e)}")
+
+try:
+    col1, col2 = st.columns([0.85, 0.15])
     
-    st.plotly_chart(fig4, width="stretch")
-      
+    with col1:
+        st.header("📊 Dashboard de Análise de Voos de Hoje")
+    with col2:
+        st.button("🔄 Atualizar Dados") 
+        liveMode = st.toggle(
+            "🔴 Ao vivo",
+            help=f"Atualiza a seção de hoje a cada {LIVE_INTERVAL:.0f} s só com as previsões novas"
+        )
+
+    if liveMode:
+        live_today()
+        dfToday = get_today_feed().frame()
+    else:
+        dfToday = loadDataToday()
+        render_today(*today_views(dfToday))
+
 except Exception as e:
+    record_error('dashboard.today', e)
     st.error(f"Erro no dashboad de dados de hoje: {str(e)}")
 
 try:
     df = loadData()
 
-    if 'companhia_aerea' not in df.columns:
-        for alt in ['airline', 'companhia', 'airline_name', 'operadora', 'operator']:
-            if alt in df.columns:
-                df['companhia_aerea'] = df[alt]
-                break
-        else:
-            df['companhia_aerea'] = 'Desconhecida'
-
-    if 'dia_da_semana' not in df.columns:
-        if 'data_partida' in df.columns:
-            df['data_partida'] = pd.to_datetime(df['data_partida'])
-            df['dia_da_semana'] = df['data_partida'].dt.weekday
-        else:
-            df['dia_da_semana'] = -1
-
-    if 'linhas_aereas' not in df.columns:
-        if 'origem_aeroporto' in df.columns and 'destino_aeroporto' in df.columns:
-            df['linhas_aereas'] = df['origem_aeroporto'].astype(str) + " -> " + df['destino_aeroporto'].astype(str)
-        else:
-            df['linhas_aereas'] = ''
-
-    if 'hora_partida' not in df.columns and 'data_partida' in df.columns:
-        df['data_partida'] = pd.to_datetime(df['data_partida'])
-        df['hora_partida'] = df['data_partida'].dt.hour
+    with timed('transform.history.columns', rows=len(df)):
+        df = history_columns(df)
     st.header("🔍 Filtros")
     
     availableDates = sorted(df['data_apenas'].unique())
@@ -382,64 +305,154 @@ try:
             min_value= minDate,
             max_value= maxDate
         )
-    df = df[
-        (df['data_apenas'] >= data_inicio) & 
-        (df['data_apenas'] <= data_fim)
-    ]
+
+    approxMode = st.toggle(
+        "⚡ Modo aproximado (sketches)",
+        help="Top 5 e rotas distintas calculados a partir de sketches diários mesclados, sem percorrer todo o histórico"
+    )
+    topMode = 'approx' if approxMode else 'exact'
+    if approxMode:
+        colEps, colHll, colDistinct = st.columns(3)
+        with colEps:
+            epsilon = st.select_slider(
+                "Erro máximo do Top 5 (fração do total)",
+                options=[0.001, 0.005, 0.01, 0.05],
+                value=0.01
+            )
+        with colHll:
+            distinctError = st.select_slider(
+                "Erro relativo de rotas distintas",
+                options=[0.01, 0.02, 0.05],
+                value=0.01
+            )
+        topkStore = get_topk_store()
+        with timed('aggregate.history.sketch_ingest', rows=len(df)):
+            topkStore.ingest(df)
+        with colDistinct:
+            st.metric(
+                "Rotas distintas no período",
+                f"~{topkStore.distinct_routes(data_inicio, data_fim, distinctError):,.0f}",
+                help=f"Estimativa HyperLogLog (±{distinctError:.1%})"
+            )
+
+    # As janelas móveis olham para antes do início do período: a tendência usa o histórico completo
+    dfHistory = df
+    version = df.attrs.get('versao')
+    with timed('transform.history.filter', rows=len(df)):
+        df = filtered_history(df, version, data_inicio, data_fim)
     
     with col1:
         st.subheader("Companhias mais usadas")
-        topCompany = df['companhia_aerea'].value_counts().head(5)
-        fig = px.bar(
-            topCompany,
-            x=topCompany.index,
-            y=topCompany.values,
-            labels={'x': 'Companhia Aérea', 'y': 'Número de Voos'},
-            title='Top 5 Companhias Aéreas'
-        )
-        st.plotly_chart(fig, width="stretch")
+        with timed(f'aggregate.history.top_companies.{topMode}'):
+            if approxMode:
+                topCompany = topkStore.top_companies(data_inicio, data_fim, epsilon=epsilon).set_index('Chave')['Estimativa']
+            else:
+                topCompany = top_companies(df)
+        with timed('chart.history.top_companies'):
+            fig = px.bar(
+                topCompany,
+                x=topCompany.index,
+                y=topCompany.values,
+                labels={'x': 'Companhia Aérea', 'y': 'Número de Voos'},
+                title='Top 5 Companhias Aéreas'
+            )
+        render_chart(fig, 'history.top_companies')
     with col2:
-        st.subheader("Atrasos por Dia da Semana")
-        delaysByDay = df.groupby('dia_da_semana')['atraso_previsto'].sum().reindex([0,1,2,3,4,5,6])
-        fig2 = go.Figure(data=go.Bar(
-            x=['Domingo', 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado'],
-            y=delaysByDay.values,
-            marker_color='indianred'
-        ))
-        fig2.update_layout(
-            title='Média de Atrasos por Dia da Semana',
-            xaxis_title='Dia da Semana',
-            yaxis_title='Média de Atrasos'
+        st.subheader("Linhas Aéreas e Atrasos")
+        with timed(f'aggregate.history.top_delay_routes.{topMode}'):
+            if approxMode:
+                topDelayLines = topkStore.top_delay_routes(data_inicio, data_fim, epsilon=epsilon).set_index('Chave')['Estimativa']
+            else:
+                topDelayLines = top_delay_routes(df)
+        with timed('chart.history.top_delay_routes'):
+            fig3 = px.bar(
+                topDelayLines,
+                x=topDelayLines.index,
+                y=topDelayLines.values,
+                labels={'x': 'Linha Aérea', 'y': 'Média de Atrasos'},
+                title='Top 5 Linhas Aéreas com Maior Média de Atrasos'
+            )
+        render_chart(fig3, 'history.top_delay_routes')
+    st.subheader("🗓️ Atrasos por Dia da Semana e Hora")
+    colMetric, colHeatCompany = st.columns(2)
+    with colMetric:
+        heatMetric = st.radio(
+            "Métrica",
+            ['Taxa de Atraso', 'Atrasos', 'Voos'],
+            horizontal=True
+        )
+    with colHeatCompany:
+        heatCompany = st.selectbox(
+            "Companhia no mapa de calor",
+            ['Todas'] + sorted(df['companhia_aerea'].unique().tolist())
         )
-        st.plotly_chart(fig2, width="stretch")
+    with timed('aggregate.history.weekday_hour', rows=len(df)):
+        heatKeys, heatFlights, heatDelays = weekday_hour_cached(df, version, data_inicio, data_fim)
+        if heatCompany == 'Todas':
+            heatGrid = weekday_hour_grid(heatFlights.sum(axis=0), heatDelays.sum(axis=0))
+        else:
+            index = heatKeys.index(heatCompany)
+            heatGrid = weekday_hour_grid(heatFlights[index], heatDelays[index])
+    with timed('chart.history.weekday_hour'):
+        fig2 = px.imshow(
+            heatGrid[heatMetric],
+            labels={'x': 'Hora do Dia', 'y': 'Dia da Semana', 'color': heatMetric},
+            color_continuous_scale='Reds',
+            aspect='auto',
+            title=f"{heatMetric} por Dia da Semana e Hora" + ('' if heatCompany == 'Todas' else f" — {heatCompany}")
+        )
+        if heatMetric == 'Taxa de Atraso':
+            fig2.update_layout(coloraxis_colorbar_tickformat='.0%')
+        fig2.update_xaxes(dtick=1)
+    render_chart(fig2, 'history.weekday_hour')
 
-    with col1:
-        st.subheader("Linhas Aéreas e Atrasos")
-        topDelayLines = df.groupby('linhas_aereas')['atraso_previsto'].sum().sort_values(ascending=False).head(5)
-        fig3 = px.bar(
-            topDelayLines,
-            x=topDelayLines.index,
-            y=topDelayLines.values,
-            labels={'x': 'Linha Aérea', 'y': 'Média de Atrasos'},
-            title='Top 5 Linhas Aéreas com Maior Média de Atrasos'
+    st.subheader("📈 Tendência da Taxa de Atraso")
+    trendStore = get_trend_store()
+    with timed('aggregate.history.trend_ingest', rows=len(dfHistory)):
+        trendStore.ingest(dfHistory)
+
+    colWindow, colMode = st.columns(2)
+    with colWindow:
+        trendWindow = st.selectbox(
+            "Janela móvel",
+            WINDOWS,
+            index=1,
+            format_func=lambda days: f"{days} dias"
         )
-        st.plotly_chart(fig3, width="stretch")
-    with col2:
-        st.subheader("Atrasos por Hora do Dia")
-        delaysByHour = df.groupby('hora_partida')['atraso_previsto'].sum()
-        fig4 = go.Figure(data=go.Scatter(
-            x=delaysByHour.index,
-            y=delaysByHour.values,
-            mode='lines+markers',
-            line=dict(color='royalblue')
-        ))
-        fig4.update_layout(
-            title='Média de Atrasos por Hora do Dia',
-            xaxis_title='Hora do Dia',
-            yaxis_title='Média de Atrasos'
+    with colMode:
+        trendMode = st.radio(
+            "Agrupar por",
+            ['total', 'companhia', 'rota'],
+            format_func={'total': 'Total', 'companhia': 'Companhia', 'rota': 'Rota'}.get,
+            horizontal=True
         )
-        st.plotly_chart(fig4, width="stretch")
-    
+
+    trendKeys = None
+    if trendMode != 'total':
+        with timed(f'aggregate.history.trend_keys.{trendMode}'):
+            topKeys = trendStore.top_keys(trendMode, data_inicio, data_fim)
+        trendKeys = st.multiselect(
+            "Companhias" if trendMode == 'companhia' else "Rotas",
+            sorted(df['companhia_aerea' if trendMode == 'companhia' else 'linhas_aereas'].unique().tolist()),
+            default=topKeys,
+            help="Por padrão, as 5 com mais voos no período"
+        )
+
+    with timed(f'aggregate.history.trend.{trendMode}'):
+        trend = trendStore.rolling_rates(trendMode, trendWindow, data_inicio, data_fim, trendKeys)
+    with timed('chart.history.trend'):
+        fig7 = px.line(
+            trend,
+            x='Dia',
+            y='Taxa de Atraso',
+            color='Chave' if trendMode != 'total' else None,
+            hover_data=['Voos', 'Atrasos'],
+            labels={'Chave': 'Companhia' if trendMode == 'companhia' else 'Rota'},
+            title=f'Taxa de Atraso Prevista — Média Móvel de {trendWindow} Dias'
+        )
+        fig7.update_layout(yaxis_tickformat='.0%')
+    render_chart(fig7, 'history.trend')
+
     company =  sorted(df['companhia_aerea'].unique().tolist())
 
     st.subheader("🏢 Companhia Aérea")
@@ -449,31 +462,39 @@ try:
         company
     )
     
-    dfCleaned= df[df['companhia_aerea'] == companySelected]
+    with timed('transform.history.company', rows=len(df)):
+        dfCleaned = company_history(df, version, data_inicio, data_fim, companySelected)
    
     col1, col2 = st.columns(2)
     with col1:
         st.subheader("Linhas mais Usadas")
-        topLines = dfCleaned['linhas_aereas'].value_counts().head(5)
-        fig5 = px.bar(
-            topLines,
-            x=topLines.index,
-            y=topLines.values,
-            labels={'x': 'Linha Aérea', 'y': 'Número de Voos'},
-            title='Top 5 Linhas Aéreas'
-        )
-        st.plotly_chart(fig5, width="stretch")
+        with timed(f'aggregate.history.top_company_routes.{topMode}'):
+            if approxMode:
+                topLines = topkStore.top_company_routes(companySelected, data_inicio, data_fim, epsilon=epsilon).set_index('Chave')['Estimativa']
+            else:
+                topLines = top_company_routes(dfCleaned)
+        with timed('chart.history.top_company_routes'):
+            fig5 = px.bar(
+                topLines,
+                x=topLines.index,
+                y=topLines.values,
+                labels={'x': 'Linha Aérea', 'y': 'Número de Voos'},
+                title='Top 5 Linhas Aéreas'
+            )
+        render_chart(fig5, 'history.top_company_routes')
     with col2:
         st.subheader("Atrasos por Linha Aérea")
-        delaysByLine = dfCleaned.groupby('linhas_aereas')['atraso_previsto'].mean().sort_values(ascending=False).head(5)
-        fig6 = px.bar(
-            delaysByLine,
-            x=delaysByLine.index,
-            y=delaysByLine.values,
-            labels={'x': 'Linha Aérea', 'y': 'Média de Atrasos'},
-            title='Top 5 Linhas Aéreas com Maior Média de Atrasos'
-        )
-        st.plotly_chart(fig6, width="stretch")
+        with timed('aggregate.history.company_delays', rows=len(dfCleaned)):
+            delaysByLine = company_route_delays(dfCleaned)
+        with timed('chart.history.company_delays'):
+            fig6 = px.bar(
+                delaysByLine,
+                x=delaysByLine.index,
+                y=delaysByLine.values,
+                labels={'x': 'Linha Aérea', 'y': 'Média de Atrasos'},
+                title='Top 5 Linhas Aéreas com Maior Média de Atrasos'
+            )
+        render_chart(fig6, 'history.company_delays')
   
     with col1:    
         csv_filtered_date = df.to_csv(index=False).encode('utf-8')
@@ -496,4 +517,5 @@ try:
 except NameError:
     pass
 except Exception as e:
+    record_error('dashboard.history', e)
     st.error(f"Erro no dashboad de dados filtrados: {str(e)}")
@@ -0,0 +1,97 @@
+import streamlit as st
+import plotly.express as px
+import plotly.graph_objects as go
+from utils.database import loadData
+from utils.latency import LatencySketchStore, QUANTILES
+from utils.metrics import timed, record_error, render_chart
+from utils.memory_cache import memory_cached
+
+@memory_cached(resident=True)
+def get_latency_store():
+    """Store de sketches de latência compartilhado entre as sessões"""
+    return LatencySketchStore()
+
+st.header("⚡ Desempenho do Modelo")
+st.caption("Percentis de latência (tempo_resposta_ms) calculados a partir de t-digests diários mesclados — sem ordenar o histórico bruto.")
+
+try:
+    df = loadData()
+
+    if df.empty or 'tempo_resposta_ms' not in df.columns:
+        raise ValueError("O histórico não possui a coluna tempo_resposta_ms")
+
+    store = get_latency_store()
+    with timed('aggregate.latency.ingest', rows=len(df)):
+        store.ingest(df)
+
+    days = store.days()
+    if not days:
+        raise ValueError("Não há latências registradas no histórico")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        data_inicio = st.date_input("Data Início", value=days[0], min_value=days[0], max_value=days[-1], key="lat_inicio")
+    with col2:
+        data_fim = st.date_input("Data Fim", value=days[-1], min_value=days[0], max_value=days[-1], key="lat_fim")
+
+    overall = store.percentiles_by('total', data_inicio, data_fim)
+    if not overall.empty:
+        row = overall.iloc[0]
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Previsões", f"{row['Previsões']:,}")
+        col2.metric("p50", f"{row['p50']:.1f} ms")
+        col3.metric("p95", f"{row['p95']:.1f} ms")
+        col4.metric("p99", f"{row['p99']:.1f} ms")
+
+    st.subheader("📈 Latência ao Longo do Tempo")
+    daily = store.daily_percentiles(data_inicio, data_fim)
+    fig1 = go.Figure()
+    for name, color in zip(QUANTILES, ['#2ECC71', '#F39C12', '#EF553B']):
+        fig1.add_trace(go.Scatter(
+            x=daily['Dia'],
+            y=daily[name],
+            name=name,
+            mode='lines+markers',
+            line=dict(color=color)
+        ))
+    fig1.update_layout(
+        title='Percentis de Latência por Dia',
+        xaxis_title='Dia',
+        yaxis_title='Latência (ms)',
+        hovermode='x unified'
+    )
+    render_chart(fig1, 'latency.daily')
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("🧠 Por Versão do Modelo")
+        byModel = store.percentiles_by('modelo', data_inicio, data_fim).sort_values('Chave')
+        fig2 = px.bar(
+            byModel.melt(id_vars=['Chave', 'Previsões'], value_vars=list(QUANTILES), var_name='Percentil', value_name='Latência (ms)'),
+            x='Chave',
+            y='Latência (ms)',
+            color='Percentil',
+            barmode='group',
+            labels={'Chave': 'Versão do Modelo'},
+            title='Percentis de Latência por Versão do Modelo'
+        )
+        render_chart(fig2, 'latency.model')
+
+    with col2:
+        st.subheader("🛫 Por Rota")
+        minCount = st.number_input("Mínimo de previsões por rota", min_value=1, value=5)
+        byRoute = store.percentiles_by('rota', data_inicio, data_fim)
+        byRoute = byRoute[byRoute['Previsões'] >= minCount].sort_values('p95', ascending=False).head(10)
+        fig3 = px.bar(
+            byRoute,
+            x='Chave',
+            y='p95',
+            hover_data=['p50', 'p99', 'Previsões'],
+            labels={'Chave': 'Linha Aérea', 'p95': 'p95 (ms)'},
+            title='Top 10 Rotas com Maior Latência p95'
+        )
+        render_chart(fig3, 'latency.route')
+
+except Exception as e:
+    record_error('latency.page', e)
+    st.error(f"Erro no painel de desempenho do modelo: {str(e)}")
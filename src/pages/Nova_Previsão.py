@@ -1,8 +1,13 @@
 import streamlit as st
-import requests 
-import time
+import numpy as np
 import pandas as pd
-import json
+from utils.database import OPENFLIGHTS_URL
+from utils.distance import RouteDistances
+from utils.metrics import timed, record_error
+from utils.memory_cache import memory_cached
+from utils.prediction_client import CircuitOpenError, get_prediction_client
+from utils.jobs import FAILED as JOB_FAILED, FINISHED as JOB_FINISHED, get_job_queue, batch_chunk_size
+from utils.validation import MissingColumnsError, validate_batch
 
 CARRIER_MAP = {
     # Backend valida pelo NOME (deve conter: AMERICAN, DELTA, UNITED, SOUTHWEST, LATAM, GOL, AZUL)
@@ -16,9 +21,9 @@ CARRIER_MAP = {
 }
 
 # Carregar dados de aeroportos do OpenFlights
-@st.cache_data
+@memory_cached
 def load_airports():
-    url = "https://raw.githubusercontent.com/jpatokal/openflights/master/data/airports.dat"
+    url = OPENFLIGHTS_URL
     
     # Colunas do arquivo airports.dat
     columns = [
@@ -38,6 +43,16 @@ def load_airports():
         st.error(f"Erro ao carregar dados de aeroportos: {e}")
         return pd.DataFrame()
 
+@memory_cached
+def airport_options():
+    """Rótulos "Nome - Cidade, País (IATA)" compartilhados pelas listas de origem e destino"""
+    return load_airports()['display_name'].tolist()
+
+@memory_cached(resident=True)
+def get_route_distances(_airports_df):
+    """Serviço de distâncias compartilhado entre as sessões"""
+    return RouteDistances(_airports_df)
+
 def get_iata_from_selection(selection):
     """Extrai o código IATA da seleção do usuário"""
     if selection and '(' in selection and ')' in selection:
@@ -45,6 +60,13 @@ def get_iata_from_selection(selection):
         return selection.split('(')[-1].split(')')[0]
     return None
 
+@memory_cached
+def validate_upload(_df, file_id):
+    """Linhas válidas e rejeitadas do CSV enviado (validado uma vez por arquivo)"""
+    airport_codes = airports_df['iata'] if not airports_df.empty else None
+    with timed('predict.batch.validate', rows=len(_df)):
+        return validate_batch(_df, CARRIER_MAP, airport_codes, get_route_distances(airports_df))
+
 def saveData(cia, ori, dest, date, dist):
     payload = {
         "companhia": cia,          
@@ -55,14 +77,130 @@ def saveData(cia, ori, dest, date, dist):
     }
     return payload
 
+RESULT_COLUMNS = {
+    'voo': 'Voo',
+    'companhia': 'Companhia',
+    'origem_aeroporto': 'Origem',
+    'destino_aeroporto': 'Destino',
+    'data_partida': 'Partida',
+    'probabilidade_pct': 'Probabilidade (%)',
+    'status': 'Status'
+}
+PAGE_SIZES = [25, 50, 100, 250]
+
+@memory_cached
+def load_job_results(job_id):
+    """Resultados colunares de um job concluído (imutáveis, então cacheados pelo id)"""
+    df = get_job_queue().store.results(job_id)
+    df['probabilidade_pct'] = (df['probabilidade'] * 100).round(2) if 'probabilidade' in df.columns else np.nan
+    # Chave de busca montada uma vez, fora do caminho de cada rerun
+    df['busca'] = (df['companhia'] + ' ' + df['origem_aeroporto'] + ' ' + df['destino_aeroporto']).str.lower()
+    return df
+
+@memory_cached
+def job_results_csv(job_id):
+    return load_job_results(job_id).drop(columns=['busca', 'probabilidade_pct']).to_csv(index=False).encode('utf-8')
+
+def filter_results(df, search, prob_range):
+    """Filtra por texto (companhia/aeroportos) e faixa de probabilidade"""
+    mask = np.ones(len(df), dtype=bool)
+    if search:
+        mask &= df['busca'].str.contains(search.lower(), regex=False).to_numpy()
+    if tuple(prob_range) != (0, 100):
+        mask &= df['probabilidade_pct'].between(*prob_range).to_numpy()
+    return df[mask]
+
+def render_batch_results(job_id):
+    """Tabela paginada, download e respostas completas só da página visível"""
+    df = load_job_results(job_id)
+    
+    st.subheader("📈 Resultados das Previsões")
+    st.download_button(
+        label="📥 Download Resultados (CSV)",
+        data=job_results_csv(job_id),
+        file_name=f"previsoes_voos_{job_id}.csv",
+        mime="text/csv"
+    )
+    
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        search = st.text_input("🔎 Buscar companhia ou aeroporto", key=f"busca_{job_id}")
+    with col2:
+        prob_range = st.slider("Probabilidade de atraso (%)", 0, 100, (0, 100), key=f"prob_{job_id}")
+    with col3:
+        page_size = st.selectbox("Linhas por página", PAGE_SIZES, key=f"tamanho_{job_id}")
+    
+    filtered = filter_results(df, search, prob_range)
+    pages = max(1, -(-len(filtered) // page_size))
+    page = st.number_input("Página", min_value=1, max_value=pages, value=1, key=f"pagina_{job_id}")
+    start = (min(page, pages) - 1) * page_size
+    window = filtered.iloc[start:start + page_size]
+    
+    st.caption(f"Mostrando {start + 1 if len(window) else 0}–{start + len(window)} de {len(filtered)} voos ({len(df)} no lote) · página {min(page, pages)} de {pages}")
+    st.dataframe(
+        window[[c for c in RESULT_COLUMNS if c in window.columns]].rename(columns=RESULT_COLUMNS),
+        hide_index=True,
+        column_config={
+            'Probabilidade (%)': st.column_config.ProgressColumn(format="%.2f%%", min_value=0, max_value=100)
+        }
+    )
+    
+    with st.expander("🔍 Ver Retornos Completos da API"):
+        # Só a página visível é lida do banco de jobs, e num único st.json
+        if st.toggle("Carregar respostas desta página", key=f"brutos_{job_id}"):
+            responses = get_job_queue().store.raw_responses(job_id, window['voo'].tolist())
+            st.json({f"Voo {voo}": response for voo, response in responses.items()}, expanded=1)
+
+def show_job(job_id):
+    """Progresso do job (atualizado a cada 2 s enquanto roda) e resultados ao final"""
+    store = get_job_queue().store
+    progress = store.progress(job_id)
+    if progress is None:
+        st.warning(f"Job {job_id} não encontrado.")
+        return
+    
+    running = progress['status'] not in JOB_FINISHED
+    
+    @st.fragment(run_every=2 if running else None)
+    def job_status():
+        current = store.progress(job_id)
+        st.progress(
+            current['fracao'],
+            text=f"{current['arquivo'] or 'Lote'} — {current['blocos_concluidos'] + current['blocos_com_falha']}/{current['blocos']} blocos ({current['voos']} voos)"
+        )
+        if current['blocos_com_falha']:
+            st.warning(f"⚠️ {current['blocos_com_falha']} blocos falharam: {current['ultimo_erro']}")
+        elif current['ultimo_erro'] and current['status'] not in JOB_FINISHED:
+            st.caption(f"Nova tentativa após erro: {current['ultimo_erro']}")
+        if running and current['status'] in JOB_FINISHED:
+            # Terminou: recarrega a página inteira para mostrar os resultados e parar a atualização
+            st.rerun()
+    
+    job_status()
+    
+    if not running:
+        elapsed = progress['concluido_em'] - progress['criado_em']
+        if progress['status'] == JOB_FAILED:
+            st.error(f"❌ Nenhum bloco foi processado com sucesso ({elapsed:.1f} s): {progress['ultimo_erro']}")
+        else:
+            st.success(f"✅ Processamento concluído em {elapsed:.1f} s!")
+        render_batch_results(job_id)
+
 # Carregar dados de aeroportos
 airports_df = load_airports()
 
 st.header("🛫 Nova Previsão de Atraso de Voo")
 st.write("")  # Adiciona um pequeno espaço vertical
-tab1, tab2 = st.tabs(["Previsão Individual", "Previsão em Lote (CSV)"])
 
-with tab1:
+# Só o modo escolhido é executado: ao contrário de st.tabs, o outro não monta widgets nem dados.
+# Com ?job=<id> na URL, abre direto no lote para acompanhar o processamento.
+MODES = ["Previsão Individual", "Previsão em Lote (CSV)"]
+default_mode = MODES[1] if st.query_params.get('job') else MODES[0]
+mode = st.segmented_control(
+    "Modo de previsão", MODES, default=default_mode, key='modo_previsao', label_visibility="collapsed"
+) or default_mode
+
+if mode == MODES[0]:
     with st.form("flight_delay_form"):
         col1, col2 = st.columns(2)
         with col1:
@@ -73,7 +211,7 @@ with tab1:
             if not airports_df.empty:
                 ori_selection = st.selectbox(
                     "Selecione o Aeroporto de Origem",
-                    options=airports_df['display_name'].tolist(),
+                    options=airport_options(),
                 )
             else:
                 ori_selection = st.text_input("Código IATA do Aeroporto de Origem")
@@ -82,14 +220,19 @@ with tab1:
             if not airports_df.empty:
                 dest_selection = st.selectbox(
                     "Selecione o Aeroporto de Destino",
-                    options=airports_df['display_name'].tolist()              )
+                    options=airport_options()
+                )
             else:
                 dest_selection = st.text_input("Código IATA do Aeroporto de Destino")
                 
         with col2:
             date = st.date_input("Selecione a Data do Voo")
             hour = st.time_input("Insira a Hora do Voo")
-            dist = st.number_input("Insira a Distância do Voo (km)")
+            dist = st.number_input(
+                "Insira a Distância do Voo (km)",
+                min_value=0.0,
+                help="Deixe em 0 para calcular automaticamente a partir das coordenadas dos aeroportos"
+            )
             
         submit_button = st.form_submit_button("Prever Atraso")
         
@@ -103,8 +246,13 @@ with tab1:
             ori_codigo = ori_selection
             dest_codigo = dest_selection
         
+        if not dist and ori_codigo and dest_codigo:
+            dist = float(get_route_distances(airports_df).lookup([ori_codigo], [dest_codigo])[0])
+
         if not ori_codigo or not dest_codigo:
             st.error("Por favor, selecione aeroportos válidos.")
+        elif pd.isna(dist):
+            st.error("Não foi possível calcular a distância da rota. Informe a distância manualmente.")
         else:
             # Garante formato ISO-8601 completo (incluindo segundos)
             # st.time_input retorna datetime.time
@@ -112,34 +260,33 @@ with tab1:
             
             payload = saveData(cia_codigo, ori_codigo, dest_codigo, datetime_str, dist)
 
+            client = get_prediction_client()
+            url = client.url()
             try:
-                # URL CORRIGIDA e VERIFICADA (Endpoint correto do Controller)
-                url = "http://localhost:8080/api/v1/predict"
-                
-                response = requests.post(url, json=payload)
+                with timed('predict.single') as t:
+                    response = client.predict(payload)
                 
                 with st.container():
                     if response.status_code == 200:
                         result = response.json()
                         
-                        with st.spinner("Calculando Previsão de Atraso...", show_time=True):
-                            time.sleep(1) # Visual effect
-                            
-                            # DEBUG: Mostra o JSON bruto para garantir que estamos vendo tudo
-                            # st.json(result) 
+                        # DEBUG: Mostra o JSON bruto para garantir que estamos vendo tudo
+                        # st.json(result) 
 
-                            st.badge("Success", icon=":material/check:", color="green")
-                            st.write(f"**Companhia:** {cia_nome} ({cia_codigo})")
-                            st.write(f"**Rota:** {ori_codigo} → {dest_codigo}")
-                            st.write(f"**Probabilidade de Atraso:** {result['probabilidade']*100:.2f}%")
-                            st.write(f"**Mensagem:** {result['mensagem']}")
-                            
-                            # Verificação de segurança para métricas internas
-                            metrics = result.get('metricas_internas', {})
-                            if metrics:
-                                st.write(f"**Risco Histórico do Aeroporto de Origem:** {metrics.get('risco_historico_origem', 0)*100:.2f}%")
-                                st.write(f"**Risco Histórico da Companhia:** {metrics.get('risco_historico_companhia', 0)*100:.2f}%")
-                                st.write(f"**Fonte do Dado:** {metrics.get('fonte', 'N/A')}")
+                        st.badge("Success", icon=":material/check:", color="green")
+                        st.caption(f"Previsão recebida em {t.seconds * 1000:.0f} ms")
+                        st.write(f"**Companhia:** {cia_nome} ({cia_codigo})")
+                        st.write(f"**Rota:** {ori_codigo} → {dest_codigo}")
+                        st.write(f"**Distância:** {dist:,.1f} km")
+                        st.write(f"**Probabilidade de Atraso:** {result['probabilidade']*100:.2f}%")
+                        st.write(f"**Mensagem:** {result['mensagem']}")
+                        
+                        # Verificação de segurança para métricas internas
+                        metrics = result.get('metricas_internas', {})
+                        if metrics:
+                            st.write(f"**Risco Histórico do Aeroporto de Origem:** {metrics.get('risco_historico_origem', 0)*100:.2f}%")
+                            st.write(f"**Risco Histórico da Companhia:** {metrics.get('risco_historico_companhia', 0)*100:.2f}%")
+                            st.write(f"**Fonte do Dado:** {metrics.get('fonte', 'N/A')}")
 
                     elif response.status_code == 400:
                         st.error("Erro de Validação dos Dados (400 Bad Request)")
@@ -153,18 +300,22 @@ with tab1:
                         st.error(f"Erro na resposta da API: Status {response.status_code}")
                         st.text(response.text)
 
+            except CircuitOpenError as e:
+                record_error('predict.single', e)
+                st.error(f"⚠️ {e}")
             except Exception as e:
+                record_error('predict.single', e)
                 st.error(f"Erro na requisição para a API de Previsão: {url}")
                 with st.expander("Ver detalhes técnicos do erro"):
                     st.write(e)
             
-with tab2:
+else:
     st.subheader("📊 Upload de Arquivo CSV")
-    st.info("O arquivo CSV deve conter as colunas: companhia, origem_aeroporto, destino_aeroporto, data_partida, distancia_km")
+    st.info("O arquivo CSV deve conter as colunas: companhia, origem_aeroporto, destino_aeroporto, data_partida. A coluna distancia_km é opcional: valores ausentes ou zero são calculados automaticamente.")
     
     with st.expander("Ver exemplo de formato CSV"):
         exemplo_df = pd.DataFrame({
-            'companhia': ['AA', 'DL'],
+            'companhia': ['American Airlines', 'Delta Air Lines'],
             'origem_aeroporto': ['JFK', 'LAX'],
             'destino_aeroporto': ['MIA', 'SFO'],
             'data_partida': ['2024-03-15T10:30:00', '2024-03-16T14:20:00'],
@@ -176,105 +327,54 @@ with tab2:
     
     if uploaded_file is not None:
         try:
-            df = pd.read_csv(uploaded_file)
+            # Lido como texto: a validação normaliza cada coluna e aponta o que não converte
+            df = pd.read_csv(uploaded_file, dtype=str, keep_default_na=False)
             st.success(f"✅ Arquivo carregado com sucesso! {len(df)} registros encontrados.")
             st.dataframe(df.head())
             
-            if st.button("Processar Previsões em Lote"):
-                # URL CORRIGIDA PARA O ENDPOINT DE BATCH
-                url = "http://localhost:8080/api/v1/predict/batch"
-                
-                batch_payload = []
-                rows_mapping = [] # Para mapear a resposta de volta para a linha original
-                
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                status_text.text("Preparando dados...")
-                
-                # Prepara o payload em lote
-                for idx, row in df.iterrows():
-                    # Garante formato ISO: Se faltar segundos, adiciona.
-                    d_str = str(row['data_partida'])
-                    if len(d_str) == 16: # Ex: 2024-03-15T10:30
-                         d_str += ":00"
-                    
-                    payload = {
-                        "companhia": row['companhia'],
-                        "origem_aeroporto": row['origem_aeroporto'],
-                        "destino_aeroporto": row['destino_aeroporto'],
-                        "data_partida": d_str,
-                        "distancia_km": float(row['distancia_km'])
-                    }
-                    batch_payload.append(payload)
-                    rows_mapping.append(row)
-                
-                status_text.text(f"Enviando {len(batch_payload)} voos para análise...")
-                progress_bar.progress(50)
-                
-                results = []
-                
-                try:
-                    # Envia tudo de uma vez
-                    response = requests.post(url, json=batch_payload)
-                    
-                    progress_bar.progress(90)
-                    
-                    if response.status_code == 200:
-                        responses_data = response.json()
-                        
-                        # Processa as respostas
-                        for idx, res_item in enumerate(responses_data):
-                            row = rows_mapping[idx]
-                            results.append({
-                                'Voo': idx + 1,
-                                'Companhia': row['companhia'],
-                                'Origem': row['origem_aeroporto'],
-                                'Destino': row['destino_aeroporto'],
-                                'Probabilidade (%)': f"{res_item['probabilidade']*100:.2f}",
-                                'Status': 'Sucesso',
-                                'Resposta Completa': json.dumps(res_item)
-                            })
-                            
-                        status_text.text("✅ Processamento concluído!")
-                        progress_bar.progress(100)
-                        
-                    elif response.status_code == 400:
-                         st.error("Erro de Validação no Lote (400). Verifique o formato dos dados.")
-                         try:
-                             st.json(response.json())
-                         except:
-                             st.text(response.text)
-                         status_text.text("Falha no processamento.")
-                    else:
-                        st.error(f"Erro no processamento em lote: {response.status_code}")
-                        st.text(response.text)
-                        
-                except Exception as e:
-                    st.error(f"Erro de conexão: {str(e)}")
+            valid_df, rejects_df = validate_upload(df, uploaded_file.file_id)
+            if rejects_df.empty:
+                st.info(f"🔎 Validação: todos os {len(valid_df)} voos estão prontos para envio.")
+            else:
+                st.warning(
+                    f"🔎 Validação: {len(valid_df)} voos válidos e {len(rejects_df)} rejeitados. "
+                    "Só os válidos serão enviados; corrija os rejeitados e envie-os em outro arquivo."
+                )
+                with st.expander("Ver linhas rejeitadas"):
+                    st.dataframe(rejects_df.head(100), hide_index=True)
+                st.download_button(
+                    label="📥 Download Rejeitados (CSV)",
+                    data=rejects_df.to_csv(index=False).encode('utf-8'),
+                    file_name=f"rejeitados_{uploaded_file.name}",
+                    mime="text/csv"
+                )
+            
+            if st.button("Processar Previsões em Lote", disabled=valid_df.empty):
+                # Payload montado direto das colunas já normalizadas pela validação
+                batch_payload = valid_df.to_dict('records')
                 
-                if results:
-                    results_df = pd.DataFrame(results)
-                    st.subheader("📈 Resultados das Previsões")
-                    st.dataframe(results_df[['Voo', 'Companhia', 'Origem', 'Destino', 'Probabilidade (%)', 'Status']])
-                    
-                    csv_results = results_df.to_csv(index=False).encode('utf-8')
-                    st.download_button(
-                        label="📥 Download Resultados (CSV)",
-                        data=csv_results,
-                        file_name="previsoes_voos.csv",
-                        mime="text/csv"
-                    )
-                    
-                    with st.expander("🔍 Ver Retornos Completos da API"):
-                        for result in results:
-                            st.write(f"**Voo {result['Voo']}:**")
-                            try:
-                                st.json(json.loads(result['Resposta Completa']))
-                            except:
-                                st.code(result['Resposta Completa'])
-                            st.divider()
-                        
+                # O processamento roda em segundo plano; a página apenas acompanha o job
+                job_id = get_job_queue().submit(batch_payload, batch_chunk_size(), uploaded_file.name)
+                st.session_state['batch_job_id'] = job_id
+                st.query_params['job'] = job_id
+                st.text(f"Job {job_id} criado com {len(batch_payload)} voos.")
+        
+        except MissingColumnsError as e:
+            st.error(f"❌ {e}. O arquivo não foi validado.")
         except Exception as e:
+            record_error('predict.batch.csv', e)
             st.error(f"Erro ao processar arquivo CSV: {str(e)}")
             with st.expander("Ver detalhes técnicos do erro"):
                 st.write(e)
+
+    st.divider()
+    st.subheader("🗂️ Acompanhar Processamento")
+    if 'batch_job_id' not in st.session_state:
+        st.session_state['batch_job_id'] = st.query_params.get('job', '')
+    job_id = st.text_input(
+        "ID do job",
+        key='batch_job_id',
+        help="O processamento continua mesmo se você fechar a página; volte depois com o ID para baixar os resultados."
+    ).strip()
+    if job_id:
+        show_job(job_id)
@@ -1,343 +1,370 @@
 import streamlit as st
 
-# Hero Section
-st.markdown(
-    """
-    <div style='text-align: center; padding: 2rem 0;'>
-        <h1 style='font-size: 2.5em; margin-bottom: 0;'>📖 Projeto de Análise de Dados de Voos</h1>
-        <p style='font-size: 1.2em; color: #888; margin-top: 0.5rem;'>
-            Um projeto educacional sobre análise de dados, machine learning e visualização
-        </p>
-    </div>
-    """,
-    unsafe_allow_html=True,
-)
+# Conteúdo estático: st.cache_data (e não memory_cached) porque, num acerto, ele só
+# reenvia os elementos gravados em vez de reexecutar dezenas de chamadas de layout.
+# As partes com botões ficam em fragments, então um clique não reexecuta o resto da página.
 
-st.divider()
-
-# Seção: Origem dos dados
-st.header("🌐 Fonte de Dados")
-
-col1, col2 = st.columns([2, 1])
 
-with col1:
+@st.cache_data(show_spinner=False)
+def render_intro():
+    """Apresentação e fonte dos dados"""
+    # Hero Section
     st.markdown(
         """
-        ### Dados Públicos Governamentais
-        
-        Este projeto utiliza **dados públicos oficiais** do **Bureau of Transportation Statistics (BTS)**,
-        uma agência do Departamento de Transportes dos EUA que mantém bases de dados sobre aviação civil.
-        
-        #### 🔬 Processo de Tratamento:
-        """
+        <div style='text-align: center; padding: 2rem 0;'>
+            <h1 style='font-size: 2.5em; margin-bottom: 0;'>📖 Projeto de Análise de Dados de Voos</h1>
+            <p style='font-size: 1.2em; color: #888; margin-top: 0.5rem;'>
+                Um projeto educacional sobre análise de dados, machine learning e visualização
+            </p>
+        </div>
+        """,
+        unsafe_allow_html=True,
     )
 
-    tab1, tab2, tab3 = st.tabs(["🔍 Validação", "🧹 Limpeza", "⚖️ Normalização"])
+    st.divider()
 
-    with tab1:
-        st.markdown("""
-        **Verificação de consistência**
-        - Checagem de tipos de dados
-        - Identificação de valores ausentes
-        - Validação de datas
-        - Detecção de duplicatas
-        """)
+    # Seção: Origem dos dados
+    st.header("🌐 Fonte de Dados")
 
-    with tab2:
-        st.markdown("""
-        **Tratamento de problemas**
-        - Remoção de duplicados
-        - Preenchimento de nulos
-        - Correção de inconsistências
-        - Filtragem de outliers
-        """)
+    col1, col2 = st.columns([2, 1])
 
-    with tab3:
-        st.markdown("""
-        **Padronização**
-        - Formatos de data uniformes
-        - Códigos de aeroporto padronizados
-        - Conversão de fusos horários
-        - Escalas normalizadas
-        """)
+    with col1:
+        st.markdown(
+            """
+            ### Dados Públicos Governamentais
+
+            Este projeto utiliza **dados públicos oficiais** do **Bureau of Transportation Statistics (BTS)**,
+            uma agência do Departamento de Transportes dos EUA que mantém bases de dados sobre aviação civil.
+
+            #### 🔬 Processo de Tratamento:
+            """
+        )
+
+        tab1, tab2, tab3 = st.tabs(["🔍 Validação", "🧹 Limpeza", "⚖️ Normalização"])
+
+        with tab1:
+            st.markdown("""
+            **Verificação de consistência**
+            - Checagem de tipos de dados
+            - Identificação de valores ausentes
+            - Validação de datas
+            - Detecção de duplicatas
+            """)
+
+        with tab2:
+            st.markdown("""
+            **Tratamento de problemas**
+            - Remoção de duplicados
+            - Preenchimento de nulos
+            - Correção de inconsistências
+            - Filtragem de outliers
+            """)
+
+        with tab3:
+            st.markdown("""
+            **Padronização**
+            - Formatos de data uniformes
+            - Códigos de aeroporto padronizados
+            - Conversão de fusos horários
+            - Escalas normalizadas
+            """)
 
-with col2:
-    st.info(
-        "🔒 **Dados Públicos**\n\n✓ Sem informações pessoais\n✓ Fonte governamental\n✓ Uso educacional"
-    )
+    with col2:
+        st.info(
+            "🔒 **Dados Públicos**\n\n✓ Sem informações pessoais\n✓ Fonte governamental\n✓ Uso educacional"
+        )
 
-    with st.expander("📊 Ver Fonte"):
-        st.markdown("""
-        **Bureau of Transportation Statistics**
-        
-        [Acessar base de dados →](https://www.transtats.bts.gov/DL_SelectFields.aspx?gnoyr_VQ=FGK&QO_fu146_anzr=b0-gvzr)
-        """)
+        with st.expander("📊 Ver Fonte"):
+            st.markdown("""
+            **Bureau of Transportation Statistics**
 
-st.divider()
+            [Acessar base de dados →](https://www.transtats.bts.gov/DL_SelectFields.aspx?gnoyr_VQ=FGK&QO_fu146_anzr=b0-gvzr)
+            """)
 
-# Seção: Jornada do dado
-st.header("🔄 Pipeline de Processamento")
-
-col1, col2, col3 = st.columns(3)
-
-with col1:
-    if st.button("1️⃣\n\n**COLETA**\n\nExtração de Dados", key="btn_coleta", use_container_width=True, help="Clique para ver detalhes"):
-        if st.session_state.get('show_coleta', False):
-            st.session_state.show_coleta = False
-        else:
-            st.session_state.show_coleta = True
-            st.session_state.show_processamento = False
-    
-with col2:
-    if st.button("2️⃣\n\n**PROCESSAMENTO**\n\nTransformação", key="btn_processamento", use_container_width=True, help="Clique para ver detalhes"):
-        if st.session_state.get('show_processamento', False):
-            st.session_state.show_processamento = False
-        else:
-            st.session_state.show_processamento = True
-            st.session_state.show_coleta = False
-
-with col3:
-    if st.button("3️⃣\n\n**VISUALIZAÇÃO**\n\nDashboard", key="btn_visualizacao", use_container_width=True, help="Clique para ir ao Dashboard"):
-        st.switch_page("pages/Dashboard.py")
-
-# Mostrar detalhes se botões foram clicados
-if st.session_state.get('show_coleta', False):
-    st.markdown("#### 📂 Detalhes da Coleta de Dados")
-    col1, col2 = st.columns([1, 2])
-    with col1:
-        st.markdown("""
-        **Fonte de Dados:**
-        - Bureau of Transportation Statistics
-        - Dados públicos oficiais
-        - Formato: SQL estruturado
-        """)
-    with col2:
-        st.markdown("""
-        **Processo de Coleta:**
-        - Importação via arquivo SQL
-        - Carregamento em SQLite (memória)
-        - Volume: 1000+ registros de voos
-        - Campos: data, origem, destino, companhia, atraso
-        """)
 
-if st.session_state.get('show_processamento', False):
-    st.markdown("#### ⚙️ Detalhes do Processamento")
-    col1, col2 = st.columns(2)
-    with col1:
-        st.markdown("""
-        **Limpeza de Dados:**
-        - Remoção de duplicados
-        - Tratamento de valores nulos
-        - Validação de datas
-        - Filtro de outliers
-        """)
-    with col2:
-        st.markdown("""
-        **Feature Engineering:**
-        - Extração de dia da semana
-        - Criação de rotas (origem → destino)
-        - Separação de data e hora
-        - Normalização de códigos
-        """)
+@st.fragment
+def render_pipeline():
+    """Etapas do pipeline; os botões só reexecutam esta seção"""
+    # Seção: Jornada do dado
+    st.header("🔄 Pipeline de Processamento")
 
-st.divider()
+    col1, col2, col3 = st.columns(3)
 
-# Seção: Ética e boas práticas
-st.header("🛡️ Boas Práticas e Ética")
+    with col1:
+        if st.button("1️⃣\n\n**COLETA**\n\nExtração de Dados", key="btn_coleta", use_container_width=True, help="Clique para ver detalhes"):
+            if st.session_state.get('show_coleta', False):
+                st.session_state.show_coleta = False
+            else:
+                st.session_state.show_coleta = True
+                st.session_state.show_processamento = False
 
-col1, col2 = st.columns(2)
+    with col2:
+        if st.button("2️⃣\n\n**PROCESSAMENTO**\n\nTransformação", key="btn_processamento", use_container_width=True, help="Clique para ver detalhes"):
+            if st.session_state.get('show_processamento', False):
+                st.session_state.show_processamento = False
+            else:
+                st.session_state.show_processamento = True
+                st.session_state.show_coleta = False
+
+    with col3:
+        if st.button("3️⃣\n\n**VISUALIZAÇÃO**\n\nDashboard", key="btn_visualizacao", use_container_width=True, help="Clique para ir ao Dashboard"):
+            st.switch_page("pages/Dashboard.py")
+
+    # Mostrar detalhes se botões foram clicados
+    if st.session_state.get('show_coleta', False):
+        st.markdown("#### 📂 Detalhes da Coleta de Dados")
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            st.markdown("""
+            **Fonte de Dados:**
+            - Bureau of Transportation Statistics
+            - Dados públicos oficiais
+            - Formato: SQL estruturado
+            """)
+        with col2:
+            st.markdown("""
+            **Processo de Coleta:**
+            - Importação via arquivo SQL
+            - Carregamento em SQLite (memória)
+            - Volume: 1000+ registros de voos
+            - Campos: data, origem, destino, companhia, atraso
+            """)
+
+    if st.session_state.get('show_processamento', False):
+        st.markdown("#### ⚙️ Detalhes do Processamento")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("""
+            **Limpeza de Dados:**
+            - Remoção de duplicados
+            - Tratamento de valores nulos
+            - Validação de datas
+            - Filtro de outliers
+            """)
+        with col2:
+            st.markdown("""
+            **Feature Engineering:**
+            - Extração de dia da semana
+            - Criação de rotas (origem → destino)
+            - Separação de data e hora
+            - Normalização de códigos
+            """)
+
+
+@st.cache_data(show_spinner=False)
+def render_about():
+    """Boas práticas, funcionalidades e aprendizados"""
+    # Seção: Ética e boas práticas
+    st.header("🛡️ Boas Práticas e Ética")
 
-with col1:
-    st.markdown("### ✅ Práticas Aplicadas")
+    col1, col2 = st.columns(2)
 
-    with st.expander("✅ Uso Responsável", expanded=True):
-        st.markdown("""
-        - Dados públicos e abertos apenas
-        - Respeito às diretrizes da fonte
-        - Documentação transparente
-        - Código versionado
-        """)
+    with col1:
+        st.markdown("### ✅ Práticas Aplicadas")
+
+        with st.expander("✅ Uso Responsável", expanded=True):
+            st.markdown("""
+            - Dados públicos e abertos apenas
+            - Respeito às diretrizes da fonte
+            - Documentação transparente
+            - Código versionado
+            """)
+
+        with st.expander("✅ Dados Seguros"):
+            st.markdown("""
+            - Dados já anonimizados
+            - Sem informações pessoais
+            - Agregações estatísticas
+            - Fonte confiável
+            """)
+
+        with st.expander("✅ Transparência"):
+            st.markdown("""
+            - Código-fonte disponível
+            - Metodologia documentada
+            - Processo explicável
+            - Fonte citada
+            """)
 
-    with st.expander("✅ Dados Seguros"):
-        st.markdown("""
-        - Dados já anonimizados
-        - Sem informações pessoais
-        - Agregações estatísticas
-        - Fonte confiável
-        """)
+    with col2:
+        st.markdown("### ❌ O Que Evitamos")
+
+        with st.expander("❌ Uso Comercial", expanded=True):
+            st.markdown("""
+            - Projeto educacional apenas
+            - Dados não comercializados
+            - Uso para aprendizado
+            """)
+
+        with st.expander("❌ Coleta Desnecessária"):
+            st.markdown("""
+            - Sem dados pessoais
+            - Sem rastreamento
+            - Dados públicos apenas
+            """)
+
+        with st.expander("❌ Análises Enviesadas"):
+            st.markdown("""
+            - Atenção a vieses
+            - Limitações documentadas
+            - Análise crítica
+            """)
+
+    st.divider()
+
+    # Seção: O que o projeto faz
+    st.header("💻 Funcionalidades do Projeto")
 
-    with st.expander("✅ Transparência"):
-        st.markdown("""
-        - Código-fonte disponível
-        - Metodologia documentada
-        - Processo explicável
-        - Fonte citada
-        """)
+    st.markdown("""
+    Este projeto demonstra habilidades práticas em análise de dados aplicadas a um dataset real:
+    """)
 
-with col2:
-    st.markdown("### ❌ O Que Evitamos")
+    tab1, tab2, tab3 = st.tabs(
+        ["📊 Análise Exploratória", "🔮 Modelo Preditivo", "📈 Dashboard"]
+    )
 
-    with st.expander("❌ Uso Comercial", expanded=True):
+    with tab1:
         st.markdown("""
-        - Projeto educacional apenas
-        - Dados não comercializados
-        - Uso para aprendizado
+        ### Exploração de Dados
+
+        **O que fazemos:**
+        - Carregamento e limpeza de dados
+        - Estatísticas descritivas
+        - Identificação de padrões temporais
+        - Análise de rotas e companhias
+
+        **Tecnologias:**
+        - ✅ Pandas para manipulação
+        - ✅ SQLite para consultas
+        - ✅ Análise exploratória (EDA)
         """)
 
-    with st.expander("❌ Coleta Desnecessária"):
+    with tab2:
         st.markdown("""
-        - Sem dados pessoais
-        - Sem rastreamento
-        - Dados públicos apenas
+        ### Previsão de Atrasos
+
+        **O que fazemos:**
+        - Feature engineering
+        - Treinamento de modelo
+        - Avaliação de métricas
+        - Previsões de atrasos
+
+        **Tecnologias:**
+        - ✅ Scikit-learn
+        - ✅ Machine Learning
+        - ✅ Métricas de avaliação
         """)
 
-    with st.expander("❌ Análises Enviesadas"):
+    with tab3:
         st.markdown("""
-        - Atenção a vieses
-        - Limitações documentadas
-        - Análise crítica
+        ### Visualização Interativa
+
+        **O que fazemos:**
+        - Gráficos com Plotly
+        - Dashboard com Streamlit
+        - Filtros interativos
+        - Visualizações responsivas
+
+        **Tecnologias:**
+        - ✅ Plotly Express
+        - ✅ Streamlit
+        - ✅ Design responsivo
         """)
 
-st.divider()
+    st.divider()
 
-# Seção: O que o projeto faz
-st.header("💻 Funcionalidades do Projeto")
+    # Aprendizados
+    st.header("🎓 Aprendizados do Bootcamp")
 
-st.markdown("""
-Este projeto demonstra habilidades práticas em análise de dados aplicadas a um dataset real:
-""")
+    col1, col2, col3 = st.columns(3)
 
-tab1, tab2, tab3 = st.tabs(
-    ["📊 Análise Exploratória", "🔮 Modelo Preditivo", "📈 Dashboard"]
-)
+    with col1:
+        st.metric(
+            label="💼 Habilidades", value="Data Science", help="Análise, visualização e ML"
+        )
 
-with tab1:
-    st.markdown("""
-    ### Exploração de Dados
-    
-    **O que fazemos:**
-    - Carregamento e limpeza de dados
-    - Estatísticas descritivas
-    - Identificação de padrões temporais
-    - Análise de rotas e companhias
-    
-    **Tecnologias:**
-    - ✅ Pandas para manipulação
-    - ✅ SQLite para consultas
-    - ✅ Análise exploratória (EDA)
-    """)
+    with col2:
+        st.metric(label="🐍 Linguagem", value="Python", help="Pandas, Plotly, Streamlit")
 
-with tab2:
-    st.markdown("""
-    ### Previsão de Atrasos
-    
-    **O que fazemos:**
-    - Feature engineering
-    - Treinamento de modelo
-    - Avaliação de métricas
-    - Previsões de atrasos
-    
-    **Tecnologias:**
-    - ✅ Scikit-learn
-    - ✅ Machine Learning
-    - ✅ Métricas de avaliação
-    """)
+    with col3:
+        st.metric(
+            label="📚 Conceitos", value="Completos", help="Do dado bruto ao dashboard"
+        )
 
-with tab3:
     st.markdown("""
-    ### Visualização Interativa
-    
-    **O que fazemos:**
-    - Gráficos com Plotly
-    - Dashboard com Streamlit
-    - Filtros interativos
-    - Visualizações responsivas
-    
-    **Tecnologias:**
-    - ✅ Plotly Express
-    - ✅ Streamlit
-    - ✅ Design responsivo
-    """)
+    ### Principais aprendizados aplicados:
 
-st.divider()
+    - **Análise de Dados:** Limpeza, transformação e exploração de dados reais
+    - **Visualização:** Criação de dashboards interativos e gráficos informativos
+    - **Machine Learning:** Implementação de modelos preditivos básicos
+    - **Web Development:** Deploy de aplicação com Streamlit
+    - **Boas Práticas:** Código limpo, documentação e versionamento
+    """)
 
-# Aprendizados
-st.header("🎓 Aprendizados do Bootcamp")
 
-col1, col2, col3 = st.columns(3)
+@st.fragment
+def render_call_to_action():
+    """Convite para explorar o código"""
+    # Call to action
+    st.header("🚀 Quer explorar o código?")
 
-with col1:
-    st.metric(
-        label="💼 Habilidades", value="Data Science", help="Análise, visualização e ML"
-    )
+    col1, col2, col3 = st.columns([1, 2, 1])
 
-with col2:
-    st.metric(label="🐍 Linguagem", value="Python", help="Pandas, Plotly, Streamlit")
+    with col2:
+        st.markdown(
+            """
+        <div style='text-align: center; padding: 1rem; background: linear-gradient(135deg, rgba(102, 126, 234, 0.1) 0%, rgba(118, 75, 162, 0.1) 100%); border-radius: 10px;'>
+            <p style='font-size: 1.1em;'>
+            Este é um projeto educacional desenvolvido em um bootcamp de Data Science.
+            Todo o código está disponível para estudo e aprendizado.
+            </p>
+        </div>
+        """,
+            unsafe_allow_html=True,
+        )
 
-with col3:
-    st.metric(
-        label="📚 Conceitos", value="Completos", help="Do dado bruto ao dashboard"
-    )
+        st.markdown("<br>", unsafe_allow_html=True)
 
-st.markdown("""
-### Principais aprendizados aplicados:
+        col_a, col_b = st.columns(2)
 
-- **Análise de Dados:** Limpeza, transformação e exploração de dados reais
-- **Visualização:** Criação de dashboards interativos e gráficos informativos
-- **Machine Learning:** Implementação de modelos preditivos básicos
-- **Web Development:** Deploy de aplicação com Streamlit
-- **Boas Práticas:** Código limpo, documentação e versionamento
-""")
+        with col_a:
+            if st.button("💻 Ver Código", use_container_width=True, type="primary"):
+                st.info("📂 Repositório: github.com/seu-usuario/dashboard-streamlit")
 
-st.divider()
+        with col_b:
+            if st.button("📖 Documentação", use_container_width=True):
+                st.info("📚 Veja o README.md do projeto")
 
-# Call to action
-st.header("🚀 Quer explorar o código?")
 
-col1, col2, col3 = st.columns([1, 2, 1])
+@st.cache_data(show_spinner=False)
+def render_footer():
+    """Rodapé com tecnologias, dados e conceitos"""
+    # Footer
+    col1, col2, col3 = st.columns(3)
 
-with col2:
-    st.markdown(
-        """
-    <div style='text-align: center; padding: 1rem; background: linear-gradient(135deg, rgba(102, 126, 234, 0.1) 0%, rgba(118, 75, 162, 0.1) 100%); border-radius: 10px;'>
-        <p style='font-size: 1.1em;'>
-        Este é um projeto educacional desenvolvido em um bootcamp de Data Science.
-        Todo o código está disponível para estudo e aprendizado.
-        </p>
-    </div>
-    """,
-        unsafe_allow_html=True,
-    )
+    with col1:
+        st.markdown("**🎓 Tecnologias**")
+        st.caption("• Python & Pandas\n• Plotly & Streamlit\n• SQLite & SQL")
 
-    st.markdown("<br>", unsafe_allow_html=True)
+    with col2:
+        st.markdown("**📊 Dados**")
+        st.caption("• Fonte: BTS (Gov. EUA)\n• Dados públicos\n• Uso educacional")
 
-    col_a, col_b = st.columns(2)
+    with col3:
+        st.markdown("**💡 Conceitos**")
+        st.caption("• Análise de dados\n• Machine Learning\n• Data Visualization")
 
-    with col_a:
-        if st.button("💻 Ver Código", use_container_width=True, type="primary"):
-            st.info("📂 Repositório: github.com/seu-usuario/dashboard-streamlit")
+    st.caption(
+        "📚 Projeto educacional desenvolvido para fins de aprendizado. Dados públicos do Bureau of Transportation Statistics."
+    )
 
-    with col_b:
-        if st.button("📖 Documentação", use_container_width=True):
-            st.info("📚 Veja o README.md do projeto")
 
+render_intro()
+st.divider()
+render_pipeline()
+st.divider()
+render_about()
+st.divider()
+render_call_to_action()
 st.markdown("---")
-
-# Footer
-col1, col2, col3 = st.columns(3)
-
-with col1:
-    st.markdown("**🎓 Tecnologias**")
-    st.caption("• Python & Pandas\n• Plotly & Streamlit\n• SQLite & SQL")
-
-with col2:
-    st.markdown("**📊 Dados**")
-    st.caption("• Fonte: BTS (Gov. EUA)\n• Dados públicos\n• Uso educacional")
-
-with col3:
-    st.markdown("**💡 Conceitos**")
-    st.caption("• Análise de dados\n• Machine Learning\n• Data Visualization")
-
-st.caption(
-    "📚 Projeto educacional desenvolvido para fins de aprendizado. Dados públicos do Bureau of Transportation Statistics."
-)
+render_footer()
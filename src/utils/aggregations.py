@@ -0,0 +1,171 @@
+"""Transformações e agregações do Dashboard, separadas da renderização."""
+import numpy as np
+import pandas as pd
+
+from utils.airports import AirportActivity
+
+WEEKDAYS = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
+
+
+def today_airports(dfToday):
+    """Aeroportos do dia com coordenadas e total de voos (origem + destino)"""
+    return AirportActivity.from_flights(dfToday).frame()
+
+
+def today_routes(dfToday):
+    """Rotas do dia com coordenadas, número de voos e taxa de atraso prevista"""
+    return dfToday.dropna(
+        subset=['origem_latitude', 'origem_longitude', 'destino_latitude', 'destino_longitude']
+    ).groupby(['origem_aeroporto', 'destino_aeroporto'], as_index=False).agg(
+        origem_latitude=('origem_latitude', 'first'),
+        origem_longitude=('origem_longitude', 'first'),
+        destino_latitude=('destino_latitude', 'first'),
+        destino_longitude=('destino_longitude', 'first'),
+        voos=('atraso_previsto', 'size'),
+        taxa_atraso=('atraso_previsto', 'mean')
+    )
+
+
+def today_status(dfToday):
+    """Contagem de voos pontuais e atrasados"""
+    dfDelayed = dfToday['atraso_previsto'].value_counts().reset_index()
+    dfDelayed.columns = ['Status_Code', 'Total']
+    dfDelayed['Status_Nome'] = dfDelayed['Status_Code'].map({0: 'Pontual', 1: 'Atrasado'})
+    return dfDelayed
+
+
+def today_airport_delays(dfToday, n=5):
+    """Aeroportos de origem com maior taxa de atraso"""
+    airport_delays = dfToday.groupby('origem_aeroporto').agg({
+        'atraso_previsto': ['sum', 'count', 'mean']
+    }).reset_index()
+    airport_delays.columns = ['Aeroporto', 'Total_Atrasos', 'Total_Voos', 'Taxa_Atraso']
+    return airport_delays.sort_values('Taxa_Atraso', ascending=False).head(n)
+
+
+def today_hourly(dfToday):
+    """Voos pontuais, atrasados e taxa de atraso por hora"""
+    hourly_data = dfToday.groupby('hora_partida').agg({
+        'atraso_previsto': ['sum', 'count']
+    }).reset_index()
+    hourly_data.columns = ['Hora', 'Atrasados', 'Total_Voos']
+    hourly_data['Pontuais'] = hourly_data['Total_Voos'] - hourly_data['Atrasados']
+    hourly_data['Taxa_Atraso'] = (hourly_data['Atrasados'] / hourly_data['Total_Voos']) * 100
+    return hourly_data
+
+
+def history_columns(df):
+    """Garante as colunas usadas pelo Dashboard, com nomes alternativos de origem"""
+    # O histórico vem do cache compartilhado: colunas novas vão para uma cópia rasa
+    df = df.copy(deep=False)
+    if 'companhia_aerea' not in df.columns:
+        for alt in ['airline', 'companhia', 'airline_name', 'operadora', 'operator']:
+            if alt in df.columns:
+                df['companhia_aerea'] = df[alt]
+                break
+        else:
+            df['companhia_aerea'] = 'Desconhecida'
+
+    if 'dia_da_semana' not in df.columns:
+        if 'data_partida' in df.columns:
+            df['data_partida'] = pd.to_datetime(df['data_partida'])
+            df['dia_da_semana'] = df['data_partida'].dt.weekday
+        else:
+            df['dia_da_semana'] = -1
+
+    if 'linhas_aereas' not in df.columns:
+        if 'origem_aeroporto' in df.columns and 'destino_aeroporto' in df.columns:
+            df['linhas_aereas'] = df['origem_aeroporto'].astype(str) + " -> " + df['destino_aeroporto'].astype(str)
+        else:
+            df['linhas_aereas'] = ''
+
+    if 'hora_partida' not in df.columns and 'data_partida' in df.columns:
+        df['data_partida'] = pd.to_datetime(df['data_partida'])
+        df['hora_partida'] = df['data_partida'].dt.hour
+    return df
+
+
+def filter_dates(df, data_inicio, data_fim):
+    return df[
+        (df['data_apenas'] >= data_inicio) &
+        (df['data_apenas'] <= data_fim)
+    ]
+
+
+def filter_company(df, company):
+    return df[df['companhia_aerea'] == company]
+
+
+def top_companies(df, n=5):
+    return df['companhia_aerea'].value_counts().head(n)
+
+
+def top_delay_routes(df, n=5):
+    return df.groupby('linhas_aereas')['atraso_previsto'].sum().sort_values(ascending=False).head(n)
+
+
+def weekday_hour_counts(df, by='companhia_aerea'):
+    """Voos e atrasos por (chave, dia da semana, hora) em uma única passagem de bincount.
+
+    Dia da semana e hora saem de `data_partida` por aritmética inteira sobre
+    as horas desde a época (0 = segunda-feira, como em `dt.weekday`).
+    Retorna `(chaves, voos, atrasos)`, com voos e atrasos de forma
+    `(len(chaves), 7, 24)`; a grade total é a soma no primeiro eixo.
+    """
+    timestamps = df['data_partida']
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_localize(None)
+    valid = timestamps.notna().to_numpy()
+    hours = timestamps.to_numpy().astype('datetime64[h]').astype(np.int64)[valid]
+    # 01/01/1970 foi uma quinta-feira (weekday 3)
+    cells = ((hours // 24 + 3) % 7) * 24 + hours % 24
+
+    keyCodes, keys = pd.factorize(df[by].astype(str).to_numpy()[valid], sort=True)
+    codes = keyCodes * 168 + cells
+    delayed = (df['atraso_previsto'].to_numpy()[valid] > 0).astype(float)
+
+    size = len(keys) * 168
+    flights = np.bincount(codes, minlength=size).reshape(len(keys), 7, 24)
+    delays = np.bincount(codes, weights=delayed, minlength=size).astype(np.int64).reshape(len(keys), 7, 24)
+    return list(keys), flights, delays
+
+
+def weekday_hour_frame(keys, flights, delays):
+    """Contagens de `weekday_hour_counts` em formato longo, só com as células que têm voos
+    (para o cache compartilhado, que guarda frames)"""
+    flights = flights.reshape(len(keys), 168)
+    key, cell = np.nonzero(flights)
+    return pd.DataFrame({
+        'chave': np.asarray(keys, dtype=object)[key],
+        'celula': cell,
+        'voos': flights[key, cell],
+        'atrasos': delays.reshape(len(keys), 168)[key, cell]
+    })
+
+
+def weekday_hour_arrays(frame):
+    """Inverso de `weekday_hour_frame`: `(chaves, voos, atrasos)` como em `weekday_hour_counts`"""
+    keyCodes, keys = pd.factorize(frame['chave'].to_numpy(dtype=object), sort=True)
+    flights = np.zeros((len(keys), 168), dtype=np.int64)
+    delays = np.zeros((len(keys), 168), dtype=np.int64)
+    cells = frame['celula'].to_numpy(dtype=np.int64)
+    flights[keyCodes, cells] = frame['voos'].to_numpy()
+    delays[keyCodes, cells] = frame['atrasos'].to_numpy()
+    return list(keys), flights.reshape(len(keys), 7, 24), delays.reshape(len(keys), 7, 24)
+
+
+def weekday_hour_grid(flights, delays):
+    """Grades 7x24 de voos, atrasos e taxa de atraso prontas para o mapa de calor"""
+    rate = np.divide(delays, flights, out=np.full(flights.shape, np.nan), where=flights > 0)
+    return {
+        name: pd.DataFrame(values, index=WEEKDAYS, columns=range(24))
+        for name, values in [('Voos', flights), ('Atrasos', delays), ('Taxa de Atraso', rate)]
+    }
+
+
+def top_company_routes(dfCleaned, n=5):
+    return dfCleaned['linhas_aereas'].value_counts().head(n)
+
+
+def company_route_delays(dfCleaned, n=5):
+    return dfCleaned.groupby('linhas_aereas')['atraso_previsto'].mean().sort_values(ascending=False).head(n)
@@ -0,0 +1,94 @@
+"""Atividade do dia por aeroporto (pontos e contagens do globo) em arrays NumPy."""
+import numpy as np
+import pandas as pd
+
+SIDES = {'origem': 'departures', 'destino': 'arrivals'}
+
+
+class AirportActivity:
+    """Registro por aeroporto: id inteiro, coordenadas e partidas/chegadas.
+
+    Cada aeroporto ganha um id na primeira vez que aparece, com coordenadas
+    e nome do primeiro voo que o cita (as colunas `*_latitude`,
+    `*_longitude` e `*_nome_completo` de `enrichToday`). Voos novos só
+    somam às contagens, no lugar, com um `bincount` por lado; nenhum frame
+    intermediário é criado. Aeroportos sem coordenadas ficam registrados,
+    mas fora do globo.
+    """
+
+    def __init__(self, capacity=64):
+        self.size = 0
+        self.ids = {}
+        self.codes = np.empty(capacity, dtype=object)
+        self.names = np.empty(capacity, dtype=object)
+        self.latitude = np.full(capacity, np.nan)
+        self.longitude = np.full(capacity, np.nan)
+        self.departures = np.zeros(capacity, dtype=np.int64)
+        self.arrivals = np.zeros(capacity, dtype=np.int64)
+
+    @classmethod
+    def from_flights(cls, df):
+        return cls().add(df)
+
+    def _grow(self, needed):
+        capacity = len(self.codes)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        for attr, fill in [('codes', None), ('names', None), ('latitude', np.nan), ('longitude', np.nan),
+                           ('departures', 0), ('arrivals', 0)]:
+            current = getattr(self, attr)
+            grown = np.full(capacity, fill, dtype=current.dtype)
+            grown[:len(current)] = current
+            setattr(self, attr, grown)
+
+    def _register(self, uniques, latitude, longitude, names):
+        """Ids dos códigos `uniques`, criando os que ainda não existem"""
+        ids = np.fromiter((self.ids.get(code, -1) for code in uniques), dtype=np.int64, count=len(uniques))
+        new = np.flatnonzero(ids < 0)
+        if len(new):
+            slots = np.arange(self.size, self.size + len(new))
+            self._grow(self.size + len(new))
+            self.codes[slots] = uniques[new]
+            self.latitude[slots] = latitude[new]
+            self.longitude[slots] = longitude[new]
+            self.names[slots] = names[new]
+            self.ids.update(zip(uniques[new], slots.tolist()))
+            ids[new] = slots
+            self.size += len(new)
+        return ids
+
+    def add(self, df):
+        """Soma os voos às contagens (aeroportos novos são registrados no caminho)"""
+        for side, counter in SIDES.items():
+            codes, uniques = pd.factorize(df[f'{side}_aeroporto'].to_numpy())
+            if not len(uniques):
+                continue
+            rows = np.flatnonzero(codes >= 0)
+            codes = codes[rows]
+            # Primeira linha de cada código: atribuições em ordem reversa deixam a menor posição
+            first = np.empty(len(uniques), dtype=np.int64)
+            first[codes[::-1]] = rows[::-1]
+            ids = self._register(
+                np.asarray(uniques, dtype=object),
+                df[f'{side}_latitude'].to_numpy(dtype=float)[first],
+                df[f'{side}_longitude'].to_numpy(dtype=float)[first],
+                df[f'{side}_nome_completo'].to_numpy(dtype=object)[first]
+            )
+            getattr(self, counter)[:self.size] += np.bincount(ids[codes], minlength=self.size)
+        return self
+
+    @property
+    def total(self):
+        return self.departures[:self.size] + self.arrivals[:self.size]
+
+    def frame(self):
+        """Aeroportos com coordenadas e total de voos, no formato do globo"""
+        located = ~(np.isnan(self.latitude[:self.size]) | np.isnan(self.longitude[:self.size]))
+        return pd.DataFrame({
+            'aeroporto': self.codes[:self.size][located],
+            'latitude': self.latitude[:self.size][located],
+            'longitude': self.longitude[:self.size][located],
+            'nome_completo': self.names[:self.size][located],
+            'total': self.total[located].astype(float)
+        })
@@ -0,0 +1,53 @@
+"""Arquivos estáticos servidos pelo próprio app, em `src/static/`.
+
+Com `server.enableStaticServing` (`.streamlit/config.toml`) o Streamlit
+serve essa pasta em `app/static/`. A URL leva um `?v=` com o hash do
+conteúdo: o navegador guarda o arquivo por tempo indeterminado (o servidor
+responde com cache longo para URLs versionadas, ou revalida pelo ETag) e
+uma versão nova do arquivo muda a URL.
+
+Os arquivos são versionados junto do código; nada é baixado em tempo de
+execução. O fundo é o mapa-múndi de baixa resolução do Wikimedia Commons
+(`BACKGROUND_SOURCE`), o mesmo de antes, salvo sem alterações em
+`static/world_map.svg`. Enquanto o arquivo não estiver na pasta, o CSS
+aponta para a URL original, como antes: o visual não muda.
+"""
+import hashlib
+from pathlib import Path
+
+import streamlit as st
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / 'static'
+
+BACKGROUND_FILE = 'world_map.svg'
+# Original (domínio público); para servir localmente: curl -L -o src/static/world_map.svg <BACKGROUND_SOURCE>
+BACKGROUND_SOURCE = "https://upload.wikimedia.org/wikipedia/commons/8/80/World_map_-_low_resolution.svg"
+
+
+@st.cache_resource(show_spinner=False)
+def static_url(name):
+    """URL local e versionada de `static/<name>` (None se o arquivo não existir)"""
+    path = STATIC_DIR / name
+    if not path.exists():
+        return None
+    version = hashlib.sha1(path.read_bytes()).hexdigest()[:12]
+    return f"app/static/{name}?v={version}"
+
+
+@st.cache_resource(show_spinner=False)
+def background_css():
+    """CSS do fundo das páginas, montado uma vez por processo"""
+    url = static_url(BACKGROUND_FILE) or BACKGROUND_SOURCE
+    image = f"""background-image: linear-gradient(rgba(255,255,255,0.8), rgba(255,255,255,0.8)),
+                          url("{url}");"""
+    return f"""
+<style>
+    .stApp {{
+        background-color: #ffffff;
+        {image}
+        background-size: cover;
+        background-position: center;
+        background-repeat: no-repeat;
+    }}
+</style>
+"""
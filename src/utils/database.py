@@ -0,0 +1,162 @@
+"""Acesso ao histórico de previsões compartilhado entre as páginas."""
+import streamlit as st
+import pandas as pd
+import os
+from datetime import date
+from utils.storage import TABLE, get_backend, today_params
+from utils.shared_cache import dataset_version, shared_dataset
+from utils.metrics import timed, record_error, mark_cache_miss, cache_lookup
+from utils.memory_cache import memory_cached
+
+# Espelho local opcional (caminho ou URL) para rodar sem acesso ao GitHub
+OPENFLIGHTS_URL = os.getenv(
+    'OPENFLIGHTS_URL', "https://raw.githubusercontent.com/jpatokal/openflights/master/data/airports.dat"
+)
+
+@memory_cached
+def loadAirporsOpenFlights():
+    """Carrega dados de aeroportos do OpenFlights via GitHub"""
+    mark_cache_miss()
+    url = OPENFLIGHTS_URL
+    
+    # Colunas do arquivo airports.dat
+    colunas = [
+        'airport_id', 'name', 'city', 'country', 'iata', 'icao',
+        'latitude', 'longitude', 'altitude', 'timezone', 'dst',
+        'tz_database', 'type', 'source'
+    ]
+    
+    try:
+        dfAirports = pd.read_csv(url, header=None, names=colunas, na_values='\\N')
+        
+        # Filtrar apenas aeroportos com código IATA válido
+        dfAirports = dfAirports[dfAirports['iata'].notna()]
+        
+        # Criar dicionário para lookup rápido por código IATA
+        airportDict = {}
+        for _, row in dfAirports.iterrows():
+            airportDict[row['iata']] = {
+                'lat': row['latitude'],
+                'lon': row['longitude'],
+                'nome': f"{row['name']} - {row['city']}, {row['country']}"
+            }
+        
+        return airportDict
+    
+    except Exception as e:
+        record_error('loader.airports', e)
+        st.error(f"Erro ao carregar dados do OpenFlights: {str(e)}")
+        return {}
+
+HISTORY_TTL = 300
+# A seção de hoje sem o modo ao vivo: janela curta, só para não repetir a consulta em cada réplica e sessão
+TODAY_TTL = 30
+
+def readHistory():
+    """Consulta o histórico completo e deriva as colunas usadas pelo dashboard"""
+    backend = get_backend()
+    
+    with backend.connection() as conn:
+        query = f"SELECT * FROM {TABLE} ORDER BY data_partida"
+        
+        # Executar query
+        with timed('loader.history.query') as t:
+            df = backend.read_sql(query, conn)
+            t.rows = len(df)
+    
+    # Processamento dos dados (igual ao original)
+    with timed('transform.history', rows=len(df)):
+        return deriveHistoryColumns(df)
+
+def deriveHistoryColumns(df):
+    """Deriva data, rota e hora de partida a partir das colunas do banco"""
+    df['data_partida'] = pd.to_datetime(df['data_partida'])
+    df['data_apenas'] = df['data_partida'].dt.date
+    df['linhas_aereas'] = df['origem_aeroporto'] + " -> " + df['destino_aeroporto']
+    df['hora_partida'] = df['data_partida'].dt.hour
+    return df
+
+@memory_cached(ttl=HISTORY_TTL)
+def loadDataCached(version):
+    """Histórico de uma versão; a chave do cache em memória é a mesma versão do cache compartilhado"""
+    mark_cache_miss()
+    try:
+        # Uma réplica consulta o banco por janela de TTL; as demais leem do cache compartilhado
+        return shared_dataset('prediction_history', readHistory, ttl=HISTORY_TTL, version=version)
+    
+    except Exception as e:
+        record_error('loader.history', e)
+        st.error(f"❌ Erro ao carregar dados: {str(e)}")
+        return pd.DataFrame()
+
+def loadData():
+    """Histórico completo (cacheado), com tempo e hit/miss registrados"""
+    with timed('loader.history') as t, cache_lookup('loadData'):
+        df = loadDataCached(dataset_version(HISTORY_TTL))
+        t.rows = len(df)
+    return df
+
+def loadDataToday():
+    with timed('loader.today') as t:
+        df = readToday()
+        t.rows = len(df)
+    return df
+
+def queryToday(backend, day):
+    """Consulta os voos de `day` (filtro de data no dialeto do backend)"""
+    with backend.connection() as conn, timed('loader.today.query') as t:
+        df = backend.read_sql(backend.TODAY_QUERY, conn, params=today_params(day))
+        t.rows = len(df)
+    return df
+
+def readToday():
+    try:
+        backend = get_backend()
+    except Exception as e:
+        record_error('loader.today', e)
+        st.error(f"❌ Não foi possível conectar ao banco de dados: {str(e)}")
+        return pd.DataFrame()
+    
+    try:
+        # Uma réplica consulta o dia por janela de TODAY_TTL; as demais leem do cache compartilhado
+        day = date.today()
+        df = shared_dataset(f'prediction_today:{day}', lambda: queryToday(backend, day), ttl=TODAY_TTL)
+        
+        with timed('transform.today.enrich', rows=len(df)):
+            return enrichToday(df)
+    
+    except Exception as e:
+        record_error('loader.today', e)
+        st.error(f"❌ Erro ao carregar dados de hoje: {str(e)}")
+        return pd.DataFrame()
+
+def enrichToday(df, aeroportos_coords=None):
+    """Deriva colunas de data/rota e adiciona coordenadas dos aeroportos"""
+    df = deriveHistoryColumns(df)
+    
+    # Adicionar coordenadas dos aeroportos
+    if aeroportos_coords is None:
+        with cache_lookup('loadAirporsOpenFlights'):
+            aeroportos_coords = loadAirporsOpenFlights()
+    
+    df['origem_latitude'] = df['origem_aeroporto'].map(
+        lambda x: aeroportos_coords.get(x, {}).get('lat', None)
+    )
+    df['origem_longitude'] = df['origem_aeroporto'].map(
+        lambda x: aeroportos_coords.get(x, {}).get('lon', None)
+    )
+    df['origem_nome_completo'] = df['origem_aeroporto'].map(
+        lambda x: aeroportos_coords.get(x, {}).get('nome', x)
+    )
+    
+    df['destino_latitude'] = df['destino_aeroporto'].map(
+        lambda x: aeroportos_coords.get(x, {}).get('lat', None)
+    )
+    df['destino_longitude'] = df['destino_aeroporto'].map(
+        lambda x: aeroportos_coords.get(x, {}).get('lon', None)
+    )
+    df['destino_nome_completo'] = df['destino_aeroporto'].map(
+        lambda x: aeroportos_coords.get(x, {}).get('nome', x)
+    )
+    
+    return df
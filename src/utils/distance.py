@@ -0,0 +1,81 @@
+"""Serviço de distâncias entre aeroportos para as entradas de previsão."""
+import sys
+
+import numpy as np
+import pandas as pd
+
+from utils.geo import haversine_km
+
+# Memória aproximada de uma rota na tabela: tupla (origem, destino) e o float da distância
+ROUTE_ENTRY_BYTES = 100
+
+
+class RouteDistances:
+    """Tabela memoizada de distâncias (km) por rota, calculada em lote.
+
+    Cada rota (origem, destino) é calculada uma única vez; consultas
+    seguintes reutilizam o valor guardado. Aeroportos sem coordenadas
+    resultam em NaN.
+    """
+
+    def __init__(self, airports_df):
+        if airports_df.empty:
+            self._coords = pd.DataFrame(columns=['latitude', 'longitude'], dtype=float)
+        else:
+            self._coords = (
+                airports_df.drop_duplicates(subset=['iata'])
+                .set_index('iata')[['latitude', 'longitude']]
+                .astype(float)
+            )
+        self._coords_bytes = int(self._coords.memory_usage(deep=True).sum())
+        self._table = {}
+
+    def __len__(self):
+        return len(self._table)
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + self._coords_bytes + sys.getsizeof(self._table) + len(self._table) * ROUTE_ENTRY_BYTES
+
+    def lookup(self, origins, destinations):
+        """Retorna um array com a distância de cada par origem/destino"""
+        origins = pd.Series(origins, dtype=object).astype(str).str.strip().str.upper()
+        destinations = pd.Series(destinations, dtype=object).astype(str).str.strip().str.upper()
+        if origins.empty:
+            return np.empty(0, dtype=float)
+
+        # Trabalha sobre rotas únicas: milhões de linhas viram poucas milhares de rotas
+        codes, routes = pd.MultiIndex.from_arrays([origins.values, destinations.values]).factorize()
+        km = np.array([self._table.get(route, np.nan) for route in routes], dtype=float)
+
+        missing = np.array([route not in self._table for route in routes], dtype=bool)
+        if missing.any():
+            pending = routes[missing]
+            ori = self._coords.reindex(pending.get_level_values(0))
+            dest = self._coords.reindex(pending.get_level_values(1))
+            computed = haversine_km(
+                ori['latitude'].values, ori['longitude'].values,
+                dest['latitude'].values, dest['longitude'].values
+            )
+            km[missing] = computed
+            self._table.update(zip(pending, computed))
+
+        return km[codes]
+
+
+def fill_distances(df, distances, column='distancia_km'):
+    """Preenche `distancia_km` quando ausente ou zero, usando o serviço de distâncias"""
+    df = df.copy()
+    if column in df.columns:
+        km = pd.to_numeric(df[column], errors='coerce').astype(float)
+    else:
+        km = pd.Series(np.nan, index=df.index, dtype=float)
+
+    mask = km.isna() | (km <= 0)
+    if mask.any():
+        km[mask] = distances.lookup(
+            df.loc[mask, 'origem_aeroporto'],
+            df.loc[mask, 'destino_aeroporto']
+        ).round(1)
+
+    df[column] = km
+    return df
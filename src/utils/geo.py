@@ -0,0 +1,121 @@
+"""Geometria de rotas: arcos de grande círculo para o globo."""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Raio médio da Terra (km)
+EARTH_RADIUS_KM = 6371.0088
+
+# Pontos por arco: suficiente para uma curva suave no globo ortográfico
+ARC_POINTS = 32
+
+# Cache LRU de arcos por rota: (origem, destino, n_points) -> array (n_points, 2) com lat/lon.
+# Com 32 pontos cada arco ocupa 512 bytes: o limite mantém o cache em ~10 MB.
+ARC_CACHE_SIZE = 20_000
+_arc_cache = OrderedDict()
+_arc_lock = threading.Lock()
+
+
+def _to_xyz(lat, lon):
+    """Converte latitude/longitude (graus) em vetores unitários 3D"""
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lon = np.radians(np.asarray(lon, dtype=float))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Distância de grande círculo (km) entre pares de coordenadas, vetorizada"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    h = np.sin((lat2 - lat1) / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def great_circle_arcs(lat1, lon1, lat2, lon2, n_points=ARC_POINTS):
+    """Calcula os arcos de grande círculo de várias rotas de uma só vez.
+
+    Retorna dois arrays (n_rotas, n_points) com as latitudes e longitudes
+    de cada ponto do arco, interpolados por slerp entre origem e destino.
+    """
+    a = _to_xyz(lat1, lon1)
+    b = _to_xyz(lat2, lon2)
+
+    omega = np.arccos(np.clip(np.einsum('ij,ij->i', a, b), -1.0, 1.0))[:, None]
+    sin_omega = np.sin(omega)
+    t = np.linspace(0.0, 1.0, n_points)[None, :]
+
+    # Rotas com origem == destino não têm arco: cai para interpolação linear
+    safe = sin_omega > 1e-9
+    denom = np.where(safe, sin_omega, 1.0)
+    wa = np.where(safe, np.sin((1.0 - t) * omega) / denom, 1.0 - t)
+    wb = np.where(safe, np.sin(t * omega) / denom, t)
+
+    xyz = wa[..., None] * a[:, None, :] + wb[..., None] * b[:, None, :]
+    x, y, z = xyz[..., 0], xyz[..., 1], xyz[..., 2]
+
+    lats = np.degrees(np.arctan2(z, np.hypot(x, y)))
+    lons = np.degrees(np.arctan2(y, x))
+    return lats, lons
+
+
+def route_arcs(origins, destinations, lat1, lon1, lat2, lon2, n_points=ARC_POINTS):
+    """Retorna os arcos das rotas informadas, reaproveitando o cache por rota.
+
+    Apenas as rotas ainda não vistas são calculadas (em um único passo
+    vetorizado); o resultado segue a ordem de entrada.
+    """
+    keys = [(o, d, n_points) for o, d in zip(origins, destinations)]
+    if not keys:
+        return np.empty((0, n_points)), np.empty((0, n_points))
+
+    with _arc_lock:
+        arcs = [_arc_cache.get(key) for key in keys]
+        for key, arc in zip(keys, arcs):
+            if arc is not None:
+                _arc_cache.move_to_end(key)
+    missing = [i for i, arc in enumerate(arcs) if arc is None]
+
+    if missing:
+        idx = np.asarray(missing)
+        lats, lons = great_circle_arcs(
+            np.asarray(lat1, dtype=float)[idx],
+            np.asarray(lon1, dtype=float)[idx],
+            np.asarray(lat2, dtype=float)[idx],
+            np.asarray(lon2, dtype=float)[idx],
+            n_points
+        )
+        for j, i in enumerate(missing):
+            arcs[i] = np.column_stack([lats[j], lons[j]])
+        with _arc_lock:
+            for i in missing:
+                _arc_cache[keys[i]] = arcs[i]
+            # Sai a rota usada há mais tempo
+            while len(_arc_cache) > ARC_CACHE_SIZE:
+                _arc_cache.popitem(last=False)
+
+    arcs = np.stack(arcs)
+    return arcs[..., 0], arcs[..., 1]
+
+
+def flatten_with_separators(lats, lons):
+    """Achata arcos (n_rotas, n_points) em um único traço separado por NaN"""
+    gap = np.full((lats.shape[0], 1), np.nan)
+    return np.hstack([lats, gap]).ravel(), np.hstack([lons, gap]).ravel()
+
+
+def bucket_arcs(lats, lons, values, n_buckets=5):
+    """Agrupa os arcos em faixas de valor (0 a 1) para colorir por faixa.
+
+    O Plotly aceita uma única cor de linha por traço, então as rotas são
+    agrupadas em poucas faixas fixas; cada faixa vira um traço com NaN
+    separando as rotas. Retorna tuplas (faixa, lats_planas, lons_planas).
+    """
+    values = np.clip(np.asarray(values, dtype=float), 0.0, 1.0)
+    buckets = np.minimum((values * n_buckets).astype(int), n_buckets - 1)
+
+    for bucket in range(n_buckets):
+        mask = buckets == bucket
+        if mask.any():
+            flat_lats, flat_lons = flatten_with_separators(lats[mask], lons[mask])
+            yield bucket, flat_lats, flat_lons
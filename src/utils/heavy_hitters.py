@@ -0,0 +1,217 @@
+"""Top-N e contagem de rotas distintas aproximados, a partir de sketches diários."""
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.sketches import CountMinSketch, HyperLogLog, SpaceSaving
+from utils.watermark import InsertionWatermark
+
+# Tamanho fixo dos sketches diários: o erro escolhido na página só entra na consulta.
+# Cada resumo Space-Saving comporta o menor erro oferecido (1/0,001 chaves); o
+# count-min apenas aperta as estimativas e o HyperLogLog guarda 2^14 registradores
+# (~0,8%), reduzidos na consulta para a precisão pedida.
+MIN_EPSILON = 0.001
+CMS_EPSILON = 0.01
+HLL_PRECISION = 14
+# Memória aproximada de uma chave num resumo Space-Saving (entradas de contagem e erro, com os floats)
+SPACE_SAVING_ENTRY_BYTES = 100
+
+
+def _group_sum(keys, weights=None):
+    """Chaves distintas (ordenadas) e a soma dos pesos (contagem, sem pesos) de cada uma"""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return unique, np.bincount(inverse.ravel(), weights=weights, minlength=len(unique))
+
+
+def _slice(sortedKeys, key):
+    """Fatia de um array ordenado com os elementos iguais a `key`"""
+    return slice(np.searchsorted(sortedKeys, key, 'left'), np.searchsorted(sortedKeys, key, 'right'))
+
+
+def _summary_bytes(summary):
+    """Memória aproximada do resumo de um dia"""
+    tables = sum(summary[name][1].table.nbytes for name in ('companhias', 'atrasos_rota', 'rotas_companhia'))
+    keys = len(summary['companhias'][0].counts) + len(summary['atrasos_rota'][0].counts) + sum(
+        len(routes.counts) for routes in summary['rotas_companhia'][0].values()
+    )
+    return tables + summary['rotas_distintas'].registers.nbytes + keys * SPACE_SAVING_ENTRY_BYTES + sys.getsizeof(summary)
+
+
+class TopKStore:
+    """Sketches por dia (Space-Saving + count-min e HyperLogLog) mesclados por período.
+
+    Um único store por processo, com sketches de tamanho fixo: cada
+    previsão é incorporada uma vez (marca d'água por id, ignorando reruns
+    sobre a mesma versão do dataset) e fundida ao resumo do seu dia. Uma
+    consulta de período funde apenas os resumos diários, com custo
+    proporcional ao número de dias e não ao de voos; `epsilon` (erro das
+    contagens do Top-N, em fração do total) e `relative_error` (rotas
+    distintas) são aplicados nessa fusão.
+    """
+
+    def __init__(self):
+        self._days = {}
+        self._watermark = InsertionWatermark()
+        self._lock = threading.Lock()
+        self._nbytes = 0
+        self.build_seconds = 0.0
+
+    def __sizeof__(self):
+        # Medido a cada acesso pelo orçamento de memória: o total é mantido pelo ingest
+        return object.__sizeof__(self) + self._nbytes
+
+    def ingest(self, df):
+        """Incorpora as previsões ainda não vistas do histórico"""
+        with self._lock:
+            pending = self._watermark.pending(df)
+            if pending is None:
+                return
+            start = time.perf_counter()
+            rows, reset = pending
+            if reset:
+                self._days = {}
+
+            for day, summary in self._summarize(rows).items():
+                self._days[day] = self._merge(self._days[day], summary) if day in self._days else summary
+            self._watermark.advance(df, rows)
+            self._nbytes = sum(_summary_bytes(summary) for summary in self._days.values())
+            self.build_seconds += time.perf_counter() - start
+
+    def _summarize(self, rows):
+        """Resumos por dia das linhas novas, com os sketches de todos os dias construídos de uma vez"""
+        if rows.empty:
+            return {}
+        rows = rows.dropna(subset=['data_apenas', 'companhia_aerea', 'linhas_aereas'])
+        dayCodes, days = pd.factorize(rows['data_apenas'])
+        companyCodes, companies = pd.factorize(rows['companhia_aerea'])
+        routeCodes, routes = pd.factorize(rows['linhas_aereas'])
+        delays = np.nan_to_num(rows['atraso_previsto'].clip(lower=0).to_numpy(dtype=float))
+        companies, routes = np.asarray(companies, dtype=object), np.asarray(routes, dtype=object)
+        nDays, nCompanies, nRoutes = len(days), len(companies), len(routes)
+        capacity = SpaceSaving.for_error(MIN_EPSILON).capacity
+
+        # Contagens exatas por (dia, chave) a partir de uma chave inteira combinada, ordenada por dia
+        companyKeys, companyCount = _group_sum(dayCodes * nCompanies + companyCodes)
+        companyDay, company = np.divmod(companyKeys, nCompanies)
+        routeKeys, routeDelay = _group_sum(dayCodes * nRoutes + routeCodes, delays)
+        routeDay, route = np.divmod(routeKeys, nRoutes)
+        pairKeys, pairCount = _group_sum((dayCodes * nCompanies + companyCodes) * nRoutes + routeCodes)
+        pairDayCompany, pairRoute = np.divmod(pairKeys, nRoutes)
+        pairDay, pairCompany = np.divmod(pairDayCompany, nCompanies)
+        pairs, pairCodes = np.unique(pairCompany * nRoutes + pairRoute, return_inverse=True)
+
+        companyCms = CountMinSketch.grouped(companyDay, nDays, companies, company, companyCount, CMS_EPSILON)
+        delayCms = CountMinSketch.grouped(routeDay, nDays, routes, route, routeDelay, CMS_EPSILON)
+        pairLabels = companies[pairs // nRoutes] + '|' + routes[pairs % nRoutes]
+        pairCms = CountMinSketch.grouped(pairDay, nDays, pairLabels, pairCodes.ravel(), pairCount, CMS_EPSILON)
+        distinct = HyperLogLog.grouped(routeDay, nDays, routes, route, HLL_PRECISION)
+
+        summaries = {}
+        for code, day in enumerate(days):
+            companySlice, routeSlice = _slice(companyDay, code), _slice(routeDay, code)
+            pairSlice = _slice(pairDay, code)
+            # Rotas de cada companhia no dia: (dia, companhia) é o prefixo da chave ordenada
+            routesByCompany = {}
+            dayCompanies = pairDayCompany[pairSlice]
+            bounds = np.flatnonzero(np.r_[True, np.diff(dayCompanies) != 0, True]) + pairSlice.start
+            for first, last in zip(bounds[:-1], bounds[1:]):
+                routesByCompany[companies[pairCompany[first]]] = SpaceSaving.from_arrays(
+                    routes[pairRoute[first:last]], pairCount[first:last], capacity
+                )
+            summaries[day] = {
+                'companhias': (
+                    SpaceSaving.from_arrays(companies[company[companySlice]], companyCount[companySlice], capacity),
+                    companyCms[code]
+                ),
+                'atrasos_rota': (
+                    SpaceSaving.from_arrays(routes[route[routeSlice]], routeDelay[routeSlice], capacity),
+                    delayCms[code]
+                ),
+                'rotas_companhia': (routesByCompany, pairCms[code]),
+                'rotas_distintas': distinct[code]
+            }
+        return summaries
+
+    @staticmethod
+    def _merge(day, new):
+        """Resumo do dia com as previsões novas, sem alterar o guardado (que pode estar em consulta)"""
+        def spaceSaving(*summaries):
+            merged = SpaceSaving(summaries[0].capacity)
+            for summary in summaries:
+                merged.merge(summary)
+            return merged
+
+        def countMin(*sketches):
+            merged = CountMinSketch(CMS_EPSILON)
+            for sketch in sketches:
+                merged.merge(sketch)
+            return merged
+
+        routes = dict(day['rotas_companhia'][0])
+        for company, summary in new['rotas_companhia'][0].items():
+            routes[company] = spaceSaving(routes[company], summary) if company in routes else summary
+        return {
+            'companhias': (
+                spaceSaving(day['companhias'][0], new['companhias'][0]),
+                countMin(day['companhias'][1], new['companhias'][1])
+            ),
+            'atrasos_rota': (
+                spaceSaving(day['atrasos_rota'][0], new['atrasos_rota'][0]),
+                countMin(day['atrasos_rota'][1], new['atrasos_rota'][1])
+            ),
+            'rotas_companhia': (routes, countMin(day['rotas_companhia'][1], new['rotas_companhia'][1])),
+            'rotas_distintas': HyperLogLog(HLL_PRECISION).merge(day['rotas_distintas']).merge(new['rotas_distintas'])
+        }
+
+    def _range(self, start, end):
+        with self._lock:
+            return [sketches for day, sketches in self._days.items() if start <= day <= end]
+
+    def _top(self, summaries, sketches, n, epsilon, prefix=''):
+        summary = SpaceSaving.for_error(max(epsilon, MIN_EPSILON))
+        for item in summaries:
+            summary.merge(item)
+        cms = CountMinSketch(CMS_EPSILON)
+        for item in sketches:
+            cms.merge(item)
+
+        top = summary.top(n * 2)
+        if not top:
+            return pd.DataFrame(columns=['Chave', 'Estimativa', 'Erro Máximo'])
+
+        keys = [key for key, _, _ in top]
+        # Ambos superestimam: o mínimo entre Space-Saving e count-min é o mais justo
+        cmsEstimates = cms.estimate([f"{prefix}{key}" for key in keys])
+        rows = [
+            {'Chave': key, 'Estimativa': min(count, cmsCount), 'Erro Máximo': min(error, CMS_EPSILON * cms.total)}
+            for (key, count, error), cmsCount in zip(top, cmsEstimates)
+        ]
+        return pd.DataFrame(rows).sort_values('Estimativa', ascending=False).head(n)
+
+    def top_companies(self, start, end, n=5, epsilon=0.01):
+        days = self._range(start, end)
+        return self._top([d['companhias'][0] for d in days], [d['companhias'][1] for d in days], n, epsilon)
+
+    def top_delay_routes(self, start, end, n=5, epsilon=0.01):
+        days = self._range(start, end)
+        return self._top([d['atrasos_rota'][0] for d in days], [d['atrasos_rota'][1] for d in days], n, epsilon)
+
+    def top_company_routes(self, company, start, end, n=5, epsilon=0.01):
+        days = self._range(start, end)
+        return self._top(
+            [d['rotas_companhia'][0][company] for d in days if company in d['rotas_companhia'][0]],
+            [d['rotas_companhia'][1] for d in days],
+            n,
+            epsilon,
+            prefix=f"{company}|"
+        )
+
+    def distinct_routes(self, start, end, relative_error=0.01):
+        """Estimativa de rotas distintas no período"""
+        hll = HyperLogLog(HLL_PRECISION)
+        for day in self._range(start, end):
+            hll.merge(day['rotas_distintas'])
+        return hll.folded(HyperLogLog.for_error(relative_error).p).count()
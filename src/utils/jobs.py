@@ -0,0 +1,333 @@
+"""Fila persistente de previsões em lote executada em segundo plano.
+
+Cada upload vira um job gravado em SQLite e dividido em blocos. Threads de
+trabalho enviam os blocos à API de predição e gravam o resultado de cada
+bloco assim que ele chega (checkpoint), então reruns, refresh do navegador
+ou desconexões não perdem trabalho. Um bloco reservado fica com um prazo
+(lease): se o processo cair no meio, outro worker o retoma quando o prazo
+vence, sem tirar de processos vivos os blocos que eles estão executando.
+Qualquer sessão acompanha o progresso e baixa os resultados pelo id do job.
+
+Configuração:
+    JOBS_DB           arquivo SQLite da fila (padrão: jobs.db)
+    JOBS_WORKERS      threads de trabalho por processo (padrão: 2)
+    JOBS_LEASE        segundos que um bloco fica reservado a um worker (padrão: 300)
+    BATCH_CHUNK_SIZE  voos por requisição à API (padrão: 200)
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+import requests
+
+from utils.metrics import record_error, timed
+from utils.prediction_client import CircuitOpenError, get_prediction_client
+
+PENDING = 'pendente'
+RUNNING = 'executando'
+DONE = 'concluido'
+FAILED = 'falhou'
+# Status finais de um job: falhou quando nenhum bloco teve sucesso
+FINISHED = (DONE, FAILED)
+
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 2.0
+# Maior que uma requisição com todas as novas tentativas do cliente (timeouts de 3 s + 30 s, 3 tentativas)
+LEASE_SECONDS = float(os.getenv('JOBS_LEASE', 300))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    filename TEXT,
+    created_at REAL NOT NULL,
+    finished_at REAL,
+    status TEXT NOT NULL,
+    total_rows INTEGER NOT NULL,
+    total_chunks INTEGER NOT NULL,
+    chunk_size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_chunks (
+    job_id TEXT NOT NULL,
+    chunk INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    lease_until REAL,
+    not_before REAL,
+    PRIMARY KEY (job_id, chunk)
+);
+CREATE INDEX IF NOT EXISTS idx_job_chunks_status ON job_chunks (status);
+"""
+
+
+class JobStore:
+    """Tabelas de jobs e blocos em SQLite; seguro entre threads e processos"""
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # Filas criadas antes do lease/backoff ganham as colunas novas
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(job_chunks)")}
+            for column in ('lease_until', 'not_before'):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE job_chunks ADD COLUMN {column} REAL")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create(self, payloads, chunk_size, filename=None):
+        job_id = uuid.uuid4().hex[:12]
+        chunks = [payloads[i:i + chunk_size] for i in range(0, len(payloads), chunk_size)]
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, filename, created_at, status, total_rows, total_chunks, chunk_size) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, filename, time.time(), PENDING, len(payloads), len(chunks), chunk_size)
+            )
+            conn.executemany(
+                "INSERT INTO job_chunks (job_id, chunk, status, payload) VALUES (?, ?, ?, ?)",
+                [(job_id, i, PENDING, json.dumps(chunk)) for i, chunk in enumerate(chunks)]
+            )
+        return job_id
+
+    def claim(self, lease=LEASE_SECONDS):
+        """Reserva o próximo bloco disponível (mais antigo primeiro) por `lease` segundos.
+
+        Disponível é o bloco pendente cujo backoff já passou, ou o bloco em
+        execução cujo lease venceu (o worker que o tinha morreu).
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                """SELECT c.job_id, c.chunk, c.payload, c.attempts FROM job_chunks c
+                   JOIN jobs j ON j.id = c.job_id
+                   WHERE (c.status = ? AND COALESCE(c.not_before, 0) <= ?)
+                      OR (c.status = ? AND COALESCE(c.lease_until, 0) < ?)
+                   ORDER BY j.created_at, c.chunk LIMIT 1""",
+                (PENDING, now, RUNNING, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                """UPDATE job_chunks SET status = ?, attempts = attempts + 1, lease_until = ?, not_before = NULL
+                   WHERE job_id = ? AND chunk = ?""",
+                (RUNNING, now + lease, row[0], row[1])
+            )
+            conn.execute("UPDATE jobs SET status = ? WHERE id = ? AND status = ?", (RUNNING, row[0], PENDING))
+        return row[0], row[1], json.loads(row[2]), row[3] + 1
+
+    def finish_chunk(self, job_id, chunk, attempt, status, result=None, error=None):
+        """Grava o resultado do bloco, se `attempt` ainda for a reserva vigente; fecha o job no último bloco"""
+        with self._connect() as conn:
+            updated = conn.execute(
+                """UPDATE job_chunks SET status = ?, result = ?, error = ?, lease_until = NULL
+                   WHERE job_id = ? AND chunk = ? AND status = ? AND attempts = ?""",
+                (status, json.dumps(result) if result is not None else None, error, job_id, chunk, RUNNING, attempt)
+            ).rowcount
+            if not updated:
+                # Lease vencido e bloco retomado por outro worker: o resultado dele prevalece
+                return
+            counts = dict(conn.execute(
+                "SELECT status, COUNT(*) FROM job_chunks WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+            if not counts.get(PENDING) and not counts.get(RUNNING):
+                conn.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ?",
+                    (DONE if counts.get(DONE) else FAILED, time.time(), job_id)
+                )
+
+    def release_chunk(self, job_id, chunk, attempt, error, delay=0.0, refund=False):
+        """Devolve o bloco à fila para nova tentativa depois de `delay` segundos.
+
+        Com `refund`, a reserva não conta como tentativa (o pedido nem chegou à API).
+        """
+        with self._connect() as conn:
+            conn.execute(
+                """UPDATE job_chunks SET status = ?, error = ?, lease_until = NULL, not_before = ?, attempts = attempts - ?
+                   WHERE job_id = ? AND chunk = ? AND status = ? AND attempts = ?""",
+                (PENDING, error, time.time() + delay, int(refund), job_id, chunk, RUNNING, attempt)
+            )
+
+    def progress(self, job_id):
+        with self._connect() as conn:
+            job = conn.execute(
+                "SELECT filename, created_at, finished_at, status, total_rows, total_chunks FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+            if job is None:
+                return None
+            counts = dict(conn.execute(
+                "SELECT status, COUNT(*) FROM job_chunks WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+            last_error = conn.execute(
+                "SELECT error FROM job_chunks WHERE job_id = ? AND error IS NOT NULL ORDER BY chunk DESC LIMIT 1",
+                (job_id,)
+            ).fetchone()
+        filename, created_at, finished_at, status, total_rows, total_chunks = job
+        finished = counts.get(DONE, 0) + counts.get(FAILED, 0)
+        return {
+            'id': job_id, 'arquivo': filename, 'status': status,
+            'criado_em': created_at, 'concluido_em': finished_at,
+            'voos': total_rows, 'blocos': total_chunks,
+            'blocos_concluidos': counts.get(DONE, 0), 'blocos_com_falha': counts.get(FAILED, 0),
+            'fracao': finished / total_chunks if total_chunks else 1.0,
+            'ultimo_erro': last_error[0] if last_error else None
+        }
+
+    def results(self, job_id):
+        """Voos e respostas em formato colunar (uma linha por voo, na ordem do arquivo)"""
+        with self._connect() as conn:
+            chunks = conn.execute(
+                "SELECT status, payload, result, error FROM job_chunks WHERE job_id = ? ORDER BY chunk", (job_id,)
+            ).fetchall()
+        frames = []
+        for status, payload, result, error in chunks:
+            flights = pd.DataFrame(json.loads(payload))
+            if result:
+                # Respostas achatadas em colunas (probabilidade, mensagem, metricas_internas.*)
+                responses = pd.json_normalize(json.loads(result))
+                frame = pd.concat([flights, responses], axis=1)
+                frame['status'] = 'Sucesso'
+            else:
+                frame = flights
+                frame['status'] = 'Falha'
+                frame['erro'] = error
+            frames.append(frame)
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True)
+        df.insert(0, 'voo', np.arange(1, len(df) + 1))
+        return df
+
+    def raw_responses(self, job_id, voos):
+        """Respostas completas da API apenas para os voos pedidos (lê só os blocos necessários)"""
+        with self._connect() as conn:
+            size = conn.execute("SELECT chunk_size FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+            wanted = sorted({(voo - 1) // size for voo in voos})
+            marks = ','.join('?' * len(wanted))
+            chunks = conn.execute(
+                f"SELECT chunk, result, error FROM job_chunks WHERE job_id = ? AND chunk IN ({marks})",
+                (job_id, *wanted)
+            ).fetchall()
+        by_chunk = {chunk: (json.loads(result) if result else None, error) for chunk, result, error in chunks}
+        responses = {}
+        for voo in voos:
+            result, error = by_chunk.get((voo - 1) // size, (None, None))
+            responses[voo] = result[(voo - 1) % size] if result else {'erro': error}
+        return responses
+
+
+class JobQueue:
+    """Threads de trabalho que consomem os blocos pendentes do JobStore"""
+
+    def __init__(self, store, client, workers=2, poll_interval=1.0):
+        self.store = store
+        self.client = client
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self.threads = [
+            threading.Thread(target=self._work, name=f"batch-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, payloads, chunk_size, filename=None):
+        job_id = self.store.create(payloads, chunk_size, filename)
+        self._wake.set()
+        return job_id
+
+    def _work(self):
+        while True:
+            if not self._run_once():
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _run_once(self):
+        """Processa um bloco; False se não havia bloco disponível ou se houve erro"""
+        claimed = None
+        try:
+            claimed = self.store.claim()
+            if claimed is None:
+                return False
+            self._process(*claimed)
+            return True
+        except Exception as e:
+            # Nenhum erro derruba o worker: o bloco volta à fila (ou vence o lease, se nem isso der)
+            record_error('jobs.worker', e)
+            if claimed is not None:
+                job_id, chunk, _, attempt = claimed
+                try:
+                    self._retry(job_id, chunk, attempt, f"{type(e).__name__}: {e}")
+                except Exception as releaseError:
+                    record_error('jobs.worker', releaseError)
+            return False
+
+    def _process(self, job_id, chunk, payload, attempt):
+        if attempt > MAX_ATTEMPTS:
+            # Retomado após leases vencidos seguidos
+            return self.store.finish_chunk(job_id, chunk, attempt, FAILED, error="Tentativas esgotadas (lease vencido)")
+        try:
+            with timed('predict.batch.chunk', rows=len(payload)):
+                response = self.client.predict_batch(payload)
+        except CircuitOpenError as e:
+            # Circuito aberto: o bloco espera o circuito meio-abrir sem gastar tentativa,
+            # senão uma queda maior que a soma dos backoffs esgotaria todos os blocos em andamento
+            return self.store.release_chunk(
+                job_id, chunk, attempt, str(e), delay=max(e.retry_in, RETRY_DELAY), refund=True
+            )
+        except requests.RequestException as e:
+            record_error('predict.batch.chunk', e)
+            return self._retry(job_id, chunk, attempt, str(e))
+
+        if response.status_code == 200:
+            result = response.json()
+            if not isinstance(result, list) or len(result) != len(payload):
+                # Sem uma resposta por voo não há como alinhar resultado e linha do arquivo
+                received = len(result) if isinstance(result, list) else type(result).__name__
+                return self.store.finish_chunk(
+                    job_id, chunk, attempt, FAILED, error=f"Resposta com {received} itens para {len(payload)} voos"
+                )
+            self.store.finish_chunk(job_id, chunk, attempt, DONE, result=result)
+        elif response.status_code >= 500:
+            self._retry(job_id, chunk, attempt, f"Status {response.status_code}: {response.text[:200]}")
+        else:
+            # Erro de validação: repetir o mesmo bloco não resolve
+            self.store.finish_chunk(
+                job_id, chunk, attempt, FAILED, error=f"Status {response.status_code}: {response.text[:500]}"
+            )
+
+    def _retry(self, job_id, chunk, attempt, error):
+        if attempt >= MAX_ATTEMPTS:
+            self.store.finish_chunk(job_id, chunk, attempt, FAILED, error=error)
+            return
+        # O backoff fica gravado no bloco: nenhum worker o pega antes do prazo
+        self.store.release_chunk(job_id, chunk, attempt, error, delay=RETRY_DELAY * attempt)
+
+
+@st.cache_resource
+def get_job_queue():
+    """Fila de jobs do processo; blocos interrompidos voltam quando o lease vence"""
+    store = JobStore(os.getenv('JOBS_DB', 'jobs.db'))
+    return JobQueue(store, get_prediction_client(), workers=int(os.getenv('JOBS_WORKERS', 2)))
+
+
+def batch_chunk_size():
+    return int(os.getenv('BATCH_CHUNK_SIZE', 200))
@@ -0,0 +1,170 @@
+"""Percentis de latência do modelo (tempo_resposta_ms) mantidos em sketches por dia."""
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from utils.sketches import compress_groups, group_quantiles
+from utils.watermark import InsertionWatermark
+
+# Dimensões de corte: nome exibido -> coluna do histórico (None = todas as previsões)
+DIMENSIONS = {
+    'total': None,
+    'modelo': 'modelo_versao',
+    'rota': 'linhas_aereas'
+}
+
+QUANTILES = {'p50': 0.50, 'p95': 0.95, 'p99': 0.99}
+
+
+def latency_frame(df):
+    """Extrai dia (UTC, datetime64[D]), latência e dimensões do histórico de previsões"""
+    timestamp = df['request_at'] if 'request_at' in df.columns else df['data_partida']
+    out = pd.DataFrame({
+        'dia': pd.to_datetime(timestamp, errors='coerce', utc=True).dt.tz_localize(None).dt.floor('D'),
+        'latencia_ms': pd.to_numeric(df['tempo_resposta_ms'], errors='coerce')
+    })
+    out['modelo_versao'] = df['modelo_versao'].astype(str) if 'modelo_versao' in df.columns else 'desconhecida'
+    out['linhas_aereas'] = df['linhas_aereas'].astype(str) if 'linhas_aereas' in df.columns else ''
+    return out.dropna(subset=['dia', 'latencia_ms'])
+
+
+@dataclass
+class DayDigests:
+    """Centróides t-digest de todas as chaves de uma dimensão num dia, em arrays"""
+    keys: np.ndarray        # chave de cada centróide
+    means: np.ndarray
+    weights: np.ndarray
+    extremes: pd.DataFrame  # mínimo/máximo por chave
+
+    def merge(self, other, compression):
+        """Funde as previsões novas de um dia já resumido"""
+        keys = np.concatenate([self.keys, other.keys])
+        codes, labels = pd.factorize(keys)
+        g, means, weights = compress_groups(
+            codes, np.concatenate([self.means, other.means]), np.concatenate([self.weights, other.weights]), compression
+        )
+        extremes = pd.concat([self.extremes, other.extremes]).groupby(level=0).agg({'minimo': 'min', 'maximo': 'max'})
+        return DayDigests(np.asarray(labels, dtype=object)[g], means, weights, extremes)
+
+    @property
+    def nbytes(self):
+        # extremes: dois float64 e o ponteiro da chave por linha (memory_usage custa ~1 ms por dia)
+        return self.keys.nbytes + self.means.nbytes + self.weights.nbytes + len(self.extremes) * 24
+
+
+class LatencySketchStore:
+    """Sketches de latência por (dimensão, dia, chave), atualizados incrementalmente.
+
+    Cada dia guarda, por dimensão, os centróides t-digest de todas as chaves
+    em arrays (`DayDigests`). A cada atualização só as previsões inseridas
+    desde a anterior (marca d'água por id) são convertidas e fundidas aos
+    dias que tocam; os digests de todos os grupos (dia, chave) são
+    construídos de uma vez (`compress_groups`). Consultas de período
+    recomprimem juntos os centróides dos dias escolhidos.
+    """
+
+    def __init__(self, compression=200):
+        self.compression = compression
+        self._days = {dimension: {} for dimension in DIMENSIONS}
+        self._watermark = InsertionWatermark()
+        self._lock = threading.Lock()
+        self._nbytes = 0
+        self.build_seconds = 0.0
+
+    def __sizeof__(self):
+        # Medido a cada acesso pelo orçamento de memória: o total é mantido pelo ingest
+        return object.__sizeof__(self) + self._nbytes
+
+    def ingest(self, df):
+        """Incorpora as previsões ainda não vistas do histórico"""
+        with self._lock:
+            pending = self._watermark.pending(df)
+            if pending is None:
+                return
+            start = time.perf_counter()
+            rows, reset = pending
+            if reset:
+                self._days = {dimension: {} for dimension in DIMENSIONS}
+
+            frame = latency_frame(rows)
+            if not frame.empty:
+                for dimension, column in DIMENSIONS.items():
+                    self._add(self._days[dimension], frame, column)
+            self._watermark.advance(df, rows)
+            self._nbytes = sum(digests.nbytes for days in self._days.values() for digests in days.values())
+            self.build_seconds += time.perf_counter() - start
+
+    def _add(self, stored, frame, column):
+        latencies = frame['latencia_ms'].to_numpy(dtype=float)
+        dayCodes, dayValues = pd.factorize(frame['dia'].to_numpy(dtype='datetime64[D]'))
+        if column is None:
+            keyCodes, keyValues = np.zeros(len(frame), dtype=np.int64), np.array(['todas'], dtype=object)
+        else:
+            keyCodes, keyValues = pd.factorize(frame[column].to_numpy(dtype=object))
+        # Grupo (dia, chave) num único inteiro: os grupos saem ordenados por dia
+        width = len(keyValues)
+        codes = dayCodes.astype(np.int64) * width + keyCodes
+
+        g, means, weights = compress_groups(codes, latencies, np.ones(len(codes)), self.compression)
+        extremes = pd.DataFrame({'minimo': latencies, 'maximo': latencies}).groupby(codes).agg(
+            {'minimo': 'min', 'maximo': 'max'}
+        )
+        extremeCodes = extremes.index.to_numpy()
+
+        centroidDays = g // width
+        extremeDays = extremeCodes // width
+        for dayCode in np.unique(centroidDays):
+            lo, hi = np.searchsorted(centroidDays, [dayCode, dayCode + 1])
+            elo, ehi = np.searchsorted(extremeDays, [dayCode, dayCode + 1])
+            dayExtremes = extremes.iloc[elo:ehi]
+            dayExtremes.index = pd.Index(keyValues[extremeCodes[elo:ehi] % width], name='chave')
+            digests = DayDigests(keyValues[g[lo:hi] % width], means[lo:hi], weights[lo:hi], dayExtremes)
+
+            day = pd.Timestamp(dayValues[dayCode]).date()
+            stored[day] = stored[day].merge(digests, self.compression) if day in stored else digests
+
+    def days(self):
+        with self._lock:
+            return sorted(self._days['total'])
+
+    def _summary(self, dimension, start, end, by, label):
+        """Contagem e percentis do período, agrupados por chave (`by='chave'`) ou por dia"""
+        with self._lock:
+            parts = [(day, digests) for day, digests in self._days[dimension].items() if start <= day <= end]
+        columns = [label, 'Previsões', *QUANTILES]
+        if not parts:
+            return pd.DataFrame(columns=columns)
+
+        if by == 'chave':
+            labels = np.concatenate([d.keys for _, d in parts])
+            extremeLabels = np.concatenate([d.extremes.index.to_numpy(dtype=object) for _, d in parts])
+        else:
+            labels = np.concatenate([np.full(len(d.keys), day, dtype=object) for day, d in parts])
+            extremeLabels = np.concatenate([np.full(len(d.extremes), day, dtype=object) for day, d in parts])
+        codes, uniques = pd.factorize(labels)
+        g, means, weights = compress_groups(
+            codes, np.concatenate([d.means for _, d in parts]), np.concatenate([d.weights for _, d in parts]),
+            self.compression
+        )
+        extremes = pd.concat([d.extremes for _, d in parts]).set_axis(extremeLabels).groupby(level=0).agg(
+            {'minimo': 'min', 'maximo': 'max'}
+        ).reindex(uniques)
+
+        values = group_quantiles(
+            g, means, weights, extremes['minimo'].to_numpy(), extremes['maximo'].to_numpy(), list(QUANTILES.values())
+        )
+        out = pd.DataFrame(values, columns=list(QUANTILES))
+        out.insert(0, 'Previsões', np.bincount(g, weights=weights, minlength=len(uniques)).round().astype(int))
+        out.insert(0, label, np.asarray(uniques, dtype=object))
+        return out[columns]
+
+    def daily_percentiles(self, start, end):
+        """Percentis por dia (todas as previsões) no período"""
+        return self._summary('total', start, end, 'dia', 'Dia').sort_values('Dia', ignore_index=True)
+
+    def percentiles_by(self, dimension, start, end):
+        """Percentis do período agrupados por uma dimensão (modelo, rota)"""
+        return self._summary(dimension, start, end, 'chave', 'Chave')
@@ -0,0 +1,212 @@
+"""Modo ao vivo da seção de hoje do Dashboard.
+
+Uma thread por processo acompanha as inserções em `prediction_history`
+(LISTEN/NOTIFY no PostgreSQL; consulta periódica nos backends embarcados)
+e lê só as linhas com id maior que o último visto. As linhas novas de hoje
+entram como deltas nos agregados em memória (aeroportos, rotas, status,
+atrasos por aeroporto e por hora), então cada atualização da página custa
+o mesmo, não importa quantos voos o dia já tem.
+
+Configuração:
+    LIVE_INTERVAL   segundos entre atualizações da página e consultas (padrão: 5)
+"""
+import os
+import threading
+import time
+from datetime import date
+
+import pandas as pd
+
+from utils.airports import AirportActivity
+from utils.database import enrichToday, loadAirporsOpenFlights
+from utils.memory_cache import memory_cached
+from utils.metrics import cache_lookup, record_error, timed
+from utils.storage import TABLE, get_backend, today_params
+
+LIVE_INTERVAL = float(os.getenv('LIVE_INTERVAL', 5))
+
+MAX_ID_QUERY = f"SELECT MAX(id) AS max_id FROM {TABLE}"
+SINCE_QUERY = f"SELECT * FROM {TABLE} WHERE id > {{last_id}} ORDER BY id"
+
+
+class TodayAggregates:
+    """Somas e contagens do dia mantidas por deltas; as saídas têm o mesmo
+    formato das funções `today_*` de `utils.aggregations`"""
+
+    def __init__(self):
+        self.airports = AirportActivity()
+        self.routes = pd.DataFrame(columns=[
+            'origem_latitude', 'origem_longitude', 'destino_latitude', 'destino_longitude', 'voos', 'atrasos'
+        ])
+        self.status = pd.Series(dtype=int)
+        self.originDelays = pd.DataFrame(columns=['atrasos', 'voos'])
+        self.hourly = pd.DataFrame(columns=['atrasos', 'voos'])
+        self.flights = 0
+
+    def apply(self, df):
+        """Soma as linhas novas aos agregados (custo proporcional às linhas novas)"""
+        if df.empty:
+            return
+        self.flights += len(df)
+
+        self.airports.add(df)
+
+        coords = ['origem_latitude', 'origem_longitude', 'destino_latitude', 'destino_longitude']
+        routes = df.dropna(subset=coords).groupby(['origem_aeroporto', 'destino_aeroporto']).agg(
+            **{column: (column, 'first') for column in coords},
+            voos=('atraso_previsto', 'size'),
+            atrasos=('atraso_previsto', 'sum')
+        )
+        self.routes = self._add(self.routes, routes, ['voos', 'atrasos'])
+
+        self.status = self.status.add(df['atraso_previsto'].value_counts(), fill_value=0)
+        self.originDelays = self._add(self.originDelays, self._sum_count(df, 'origem_aeroporto'), ['atrasos', 'voos'])
+        self.hourly = self._add(self.hourly, self._sum_count(df, 'hora_partida'), ['atrasos', 'voos'])
+
+    @staticmethod
+    def _sum_count(df, key):
+        return df.groupby(key)['atraso_previsto'].agg(atrasos='sum', voos='count')
+
+    @staticmethod
+    def _add(current, delta, counters):
+        """Soma os contadores chave a chave; as demais colunas ficam com o primeiro valor visto"""
+        if current.empty:
+            return delta
+        merged = current.combine_first(delta)
+        merged[counters] = current[counters].add(delta[counters], fill_value=0)
+        return merged
+
+    def route_rates(self):
+        out = self.routes.rename_axis(['origem_aeroporto', 'destino_aeroporto']).reset_index()
+        out['voos'] = out['voos'].astype(int)
+        out['taxa_atraso'] = out['atrasos'] / out['voos']
+        return out.drop(columns='atrasos')
+
+    def status_counts(self):
+        out = self.status.astype(int).sort_values(ascending=False).rename_axis('Status_Code').reset_index(name='Total')
+        out['Status_Nome'] = out['Status_Code'].map({0: 'Pontual', 1: 'Atrasado'})
+        return out
+
+    def airport_delays(self, n=5):
+        out = self.originDelays.rename_axis('Aeroporto').reset_index()
+        out['Taxa_Atraso'] = out['atrasos'] / out['voos']
+        out = out.rename(columns={'atrasos': 'Total_Atrasos', 'voos': 'Total_Voos'})
+        return out[['Aeroporto', 'Total_Atrasos', 'Total_Voos', 'Taxa_Atraso']].sort_values('Taxa_Atraso', ascending=False).head(n)
+
+    def hourly_counts(self):
+        out = self.hourly.sort_index().rename_axis('Hora').reset_index()
+        out = out.rename(columns={'atrasos': 'Atrasados', 'voos': 'Total_Voos'})[['Hora', 'Atrasados', 'Total_Voos']]
+        out['Pontuais'] = out['Total_Voos'] - out['Atrasados']
+        out['Taxa_Atraso'] = (out['Atrasados'] / out['Total_Voos']) * 100
+        return out
+
+
+class TodayFeed:
+    """Dataset de hoje em memória, atualizado por uma thread que segue as inserções"""
+
+    def __init__(self, backend, interval=LIVE_INTERVAL, coords=None):
+        self.backend = backend
+        self.interval = interval
+        self.coords = coords
+        self.day = None
+        self.last_id = 0
+        self.updated_at = None
+        self.error = None
+        self._frames = []
+        self._nbytes = 0
+        self._aggregates = TodayAggregates()
+        self._lock = threading.Lock()
+        self.reload()
+        self._thread = threading.Thread(target=self._run, name='today-feed', daemon=True)
+        self._thread.start()
+
+    def reload(self):
+        """Carrega o dia inteiro (na criação e na virada do dia)"""
+        # O dia da carga é o mesmo que filtra as linhas do poll, seja qual for o fuso do banco
+        day = date.today()
+        with self.backend.connection() as conn, timed('loader.today.live.reload') as t:
+            # O maior id é lido antes do dia: nada inserido entre as duas consultas se perde nem é aplicado duas vezes
+            maxId = self.backend.read_sql(MAX_ID_QUERY, conn)['max_id'].iloc[0]
+            df = self.backend.read_sql(self.backend.TODAY_QUERY, conn, params=today_params(day))
+            t.rows = len(df)
+        df = enrichToday(df, self.coords)
+        aggregates = TodayAggregates()
+        aggregates.apply(df)
+        with self._lock:
+            self.day = day
+            self.last_id = int(max(maxId if pd.notna(maxId) else 0, df['id'].max() if len(df) else 0))
+            self._frames = [df]
+            self._nbytes = int(df.memory_usage(deep=True).sum())
+            self._aggregates = aggregates
+            self.updated_at = time.time()
+
+    def poll(self):
+        """Aplica as linhas inseridas desde a última leitura; devolve quantas eram de hoje"""
+        if date.today() != self.day:
+            self.reload()
+            return 0
+        with self.backend.connection() as conn, timed('loader.today.live.poll') as t:
+            new = self.backend.read_sql(SINCE_QUERY.format(last_id=self.last_id), conn)
+            t.rows = len(new)
+        if new.empty:
+            self.updated_at = time.time()
+            return 0
+
+        lastId = int(new['id'].max())
+        new = enrichToday(new, self.coords)
+        new = new[new['data_apenas'] == self.day]
+        with self._lock, timed('aggregate.today.live.delta', rows=len(new)):
+            self._aggregates.apply(new)
+            if not new.empty:
+                self._frames.append(new)
+                self._nbytes += int(new.memory_usage(deep=True).sum())
+            self.last_id = lastId
+            self.updated_at = time.time()
+        return len(new)
+
+    def _run(self):
+        while True:
+            try:
+                self.backend.wait_for_rows(self.interval)
+                self.poll()
+                self.error = None
+            except Exception as e:
+                record_error('live.today', e)
+                self.error = str(e)
+                time.sleep(self.interval)
+
+    def __sizeof__(self):
+        # Medido a cada acesso pelo orçamento de memória: os frames são somados ao chegar
+        return object.__sizeof__(self) + self._nbytes
+
+    def views(self):
+        """Agregados prontos para os gráficos: (aeroportos, rotas, status, aeroportos com atraso, por hora)"""
+        with self._lock:
+            aggregates = self._aggregates
+            return (
+                aggregates.airports.frame(), aggregates.route_rates(), aggregates.status_counts(),
+                aggregates.airport_delays(), aggregates.hourly_counts()
+            )
+
+    @property
+    def flights(self):
+        return self._aggregates.flights
+
+    def frame(self):
+        """Voos de hoje (os deltas são concatenados só quando alguém pede o dataset)"""
+        with self._lock:
+            if len(self._frames) > 1:
+                self._frames = [pd.concat(self._frames, ignore_index=True)]
+            return self._frames[0] if self._frames else pd.DataFrame()
+
+
+@memory_cached(pinned=True)
+def get_today_feed():
+    """Feed de hoje compartilhado pelas sessões; a thread de acompanhamento nasce com ele.
+
+    Fixo no orçamento de memória: conta no total, mas nunca é despejado (um
+    segundo feed abriria outra thread).
+    """
+    with cache_lookup('loadAirporsOpenFlights'):
+        coords = loadAirporsOpenFlights()
+    return TodayFeed(get_backend(), coords=coords)
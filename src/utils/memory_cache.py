@@ -0,0 +1,289 @@
+"""Cache em memória do processo, com orçamento global, para datasets e frames derivados.
+
+Substitui o `st.cache_data` (sem limite de tamanho e que devolve uma cópia
+por chamada) nos loaders e agregações das páginas:
+    - o tamanho de cada entrada é medido (`memory_usage(deep=True)` para
+      DataFrames, `nbytes` para arrays) e a soma fica abaixo do orçamento;
+    - ao estourar o orçamento sai a entrada de menor prioridade
+      GreedyDual-Size: custo de recálculo por MB somado a um relógio que
+      avança a cada despejo, então entradas sem uso envelhecem como no LRU
+      e as grandes e baratas de recalcular saem primeiro;
+    - todas as sessões recebem o mesmo objeto, que deve ser tratado como
+      somente leitura, em vez de uma cópia por sessão;
+    - chamadas simultâneas com a mesma chave calculam uma vez só.
+
+Estruturas de vida longa que crescem depois de criadas (stores de
+sketches, tabelas memoizadas) entram como residentes (`resident=True`):
+o tamanho é medido de novo a cada acesso, pelo `__sizeof__` do objeto, e
+o custo inclui o tempo que o objeto declara em `build_seconds`. Elas
+disputam o mesmo orçamento e podem ser despejadas (a próxima execução
+recria e reabastece o store). As que não podem ser recriadas à vontade,
+como o feed de hoje com sua thread, são fixas (`pinned=True`): contam
+no orçamento, mas nunca são despejadas nem limpas.
+
+Parâmetros cujo nome começa com `_` não entram na chave, como no
+`st.cache_data`. Com o painel de depuração ativo, `render_cache_panel`
+mostra as entradas, seus tamanhos e os despejos.
+
+Configuração:
+    CACHE_MEMORY_MB   orçamento do processo em MB (padrão: 1024)
+"""
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.metrics import debug_enabled, record_cache
+from utils.profiling import admin_authorized
+
+CACHE_MEMORY_MB = float(os.getenv('CACHE_MEMORY_MB', 1024))
+
+_MISSING = object()
+
+
+def sizeof(value):
+    """Bytes ocupados por um valor cacheado (aproximado para objetos Python)"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+@dataclass
+class CacheEntry:
+    name: str
+    value: object
+    size: int
+    cost: float                     # segundos gastos para calcular
+    expires: float = None           # time.time() de expiração (None = sem TTL)
+    priority: float = 0.0
+    resident: bool = False          # medido de novo a cada acesso
+    pinned: bool = False            # conta no orçamento, mas nunca sai
+    hits: int = 0
+    created: float = field(default_factory=time.time)
+    last_access: float = field(default_factory=time.time)
+
+
+class MemoryBudgetCache:
+    """Entradas com tamanho medido; despejo GreedyDual-Size acima de `budget` bytes"""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+        self._entries = {}
+        self._clock = 0.0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _priority(self, entry):
+        return self._clock + max(entry.cost, 1e-3) / max(entry.size / 2 ** 20, 1e-3)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.used -= entry.size
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            if entry.expires is not None and entry.expires <= time.time():
+                self._remove(key)
+                return _MISSING
+            entry.hits += 1
+            entry.last_access = time.time()
+            if entry.resident:
+                self._measure(entry)
+            entry.priority = self._priority(entry)
+            if entry.resident and self.used > self.budget:
+                self._evict(keep=key)
+            return entry.value
+
+    def _measure(self, entry):
+        """Atualiza tamanho e custo de uma entrada residente, que cresce depois de guardada"""
+        size = sizeof(entry.value)
+        self.used += size - entry.size
+        entry.size = size
+        entry.cost = max(entry.cost, getattr(entry.value, 'build_seconds', 0.0))
+
+    def put(self, name, key, value, cost, ttl=None, resident=False, pinned=False):
+        size = sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.budget and not pinned:
+                # Maior que o orçamento inteiro: devolvido a quem pediu, mas não guardado
+                self.rejected += 1
+                return
+            entry = CacheEntry(
+                name, value, size, cost, time.time() + ttl if ttl else None, resident=resident or pinned, pinned=pinned
+            )
+            entry.priority = self._priority(entry)
+            self._entries[key] = entry
+            self.used += size
+            self._evict()
+
+    def _evict(self, keep=None):
+        now = time.time()
+        for key in [k for k, e in self._entries.items() if e.expires is not None and e.expires <= now]:
+            self._remove(key)
+        while self.used > self.budget:
+            # As fixas (e a residente que acabou de crescer) ficam; as demais saem por prioridade
+            candidates = [item for item in self._entries.items() if item[0] != keep and not item[1].pinned]
+            if not candidates:
+                break
+            key, entry = min(candidates, key=lambda item: item[1].priority)
+            # O relógio sobe até a prioridade despejada: quem não é usado fica para trás
+            self._clock = entry.priority
+            self._remove(key)
+            self.evictions += 1
+
+    @contextmanager
+    def _single_flight(self, key):
+        with self._lock:
+            lock, waiting = self._inflight.get(key, (threading.Lock(), 0))
+            self._inflight[key] = (lock, waiting + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._lock:
+                lock, waiting = self._inflight[key]
+                if waiting == 1:
+                    del self._inflight[key]
+                else:
+                    self._inflight[key] = (lock, waiting - 1)
+
+    def get_or_compute(self, name, key, compute, ttl=None, resident=False, pinned=False):
+        value = self.get(key)
+        if value is _MISSING:
+            with self._single_flight(key):
+                # Outra sessão pode ter calculado enquanto esta esperava
+                value = self.get(key)
+                if value is _MISSING:
+                    start = time.perf_counter()
+                    value = compute()
+                    self.put(name, key, value, time.perf_counter() - start, ttl, resident, pinned)
+                    self._count(name, hit=False)
+                    return value
+        self._count(name, hit=True)
+        return value
+
+    def _count(self, name, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        record_cache(f"memory:{name}", hit)
+
+    def clear(self, name=None):
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if (name is None or e.name == name) and not e.pinned]:
+                self._remove(key)
+
+    def entries(self):
+        """Uma linha por entrada, da mais pesada para a mais leve"""
+        now = time.time()
+        with self._lock:
+            rows = [
+                {'Função': e.name + (' (fixa)' if e.pinned else ' (residente)' if e.resident else ''),
+                 'Chave': ', '.join(map(str, key[2:]))[:120], 'Tamanho (MB)': e.size / 2 ** 20,
+                 'Cálculo (ms)': e.cost * 1000, 'Acertos': e.hits, 'Idade (s)': now - e.created,
+                 'Último acesso (s)': now - e.last_access,
+                 'Expira em (s)': e.expires - now if e.expires is not None else None, 'Prioridade': e.priority}
+                for key, e in self._entries.items()
+            ]
+        columns = ['Função', 'Chave', 'Tamanho (MB)', 'Cálculo (ms)', 'Acertos', 'Idade (s)',
+                   'Último acesso (s)', 'Expira em (s)', 'Prioridade']
+        return pd.DataFrame(rows, columns=columns).sort_values('Tamanho (MB)', ascending=False)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'orcamento': self.budget, 'em_uso': self.used, 'entradas': len(self._entries),
+                'acertos': self.hits, 'falhas': self.misses, 'despejos': self.evictions, 'rejeitados': self.rejected
+            }
+
+
+memory_cache = MemoryBudgetCache(int(CACHE_MEMORY_MB * 2 ** 20))
+
+
+def _key_part(value):
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+def memory_cached(func=None, *, ttl=None, name=None, resident=False, pinned=False):
+    """Equivalente a `@st.cache_data`, dentro do orçamento de memória do processo.
+
+    Com `resident`/`pinned`, substitui o `@st.cache_resource` de objetos
+    compartilhados que crescem com o uso (ver o docstring do módulo).
+    """
+    def decorate(func):
+        signature = inspect.signature(func)
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            # Arquivo + nome: as páginas rodam como __main__ e redefinem a função a cada execução
+            key = (func.__code__.co_filename, func.__qualname__) + tuple(
+                _key_part(value) for param, value in bound.arguments.items() if not param.startswith('_')
+            )
+            return memory_cache.get_or_compute(label, key, lambda: func(*args, **kwargs), ttl, resident, pinned)
+
+        wrapper.clear = lambda: memory_cache.clear(label)
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
+
+
+def render_cache_panel():
+    """Entradas do cache em memória e uso do orçamento (junto do painel de depuração).
+
+    O painel é só leitura; limpar o cache esfria todas as sessões da réplica,
+    então o botão exige a mesma autorização do profiling: `?debug=<PROFILE_TOKEN>`
+    ou `?debug=1` com um administrador logado (PROFILE_ADMINS).
+    """
+    canClear = admin_authorized(st.query_params.get('debug'))
+    if not (debug_enabled() or canClear):
+        return
+    stats = memory_cache.snapshot()
+    with st.expander("🧠 Cache em memória", expanded=False):
+        st.progress(
+            min(stats['em_uso'] / stats['orcamento'], 1.0),
+            text=f"{stats['em_uso'] / 2 ** 20:,.1f} de {stats['orcamento'] / 2 ** 20:,.0f} MB "
+                 f"(CACHE_MEMORY_MB) · {stats['entradas']} entradas"
+        )
+        st.caption(
+            f"Acertos: {stats['acertos']} · falhas: {stats['falhas']} · despejos: {stats['despejos']} · "
+            f"maiores que o orçamento: {stats['rejeitados']}"
+        )
+        st.dataframe(memory_cache.entries(), hide_index=True, width="stretch")
+        if canClear and st.button("Limpar cache em memória"):
+            memory_cache.clear()
+            st.rerun()
@@ -0,0 +1,207 @@
+"""Medição de tempos do caminho crítico (loaders, transformações, gráficos).
+
+Cada etapa medida alimenta um registro global do processo (exportado em
+formato texto do Prometheus em `METRICS_FILE`) e a lista da sessão atual,
+exibida no painel de depuração (`DEBUG_PANEL=1` ou `?debug=1`).
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+logger = logging.getLogger(__name__)
+
+# Limites (s) dos buckets do histograma de duração
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+SESSION_KEY = "_metrics_events"
+EXPORT_INTERVAL = 15
+
+
+class StageTimer:
+    """Resultado de uma medição; `rows` pode ser preenchido pelo chamador"""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.rows = None
+        self.seconds = 0.0
+
+
+class MetricsRegistry:
+    """Agregados por processo: histogramas por etapa, cache hit/miss e erros"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.rows = {}
+        self.cache = {}
+        self.errors = {}
+        self._last_export = 0.0
+
+    def observe(self, stage, seconds, rows=None):
+        with self._lock:
+            entry = self.stages.setdefault(stage, {'count': 0, 'sum': 0.0, 'buckets': [0] * len(BUCKETS)})
+            entry['count'] += 1
+            entry['sum'] += seconds
+            for i, limit in enumerate(BUCKETS):
+                if seconds <= limit:
+                    entry['buckets'][i] += 1
+            if rows is not None:
+                self.rows[stage] = rows
+
+    def cache_result(self, name, hit):
+        with self._lock:
+            key = (name, 'hit' if hit else 'miss')
+            self.cache[key] = self.cache.get(key, 0) + 1
+
+    def error(self, stage):
+        with self._lock:
+            self.errors[stage] = self.errors.get(stage, 0) + 1
+
+    def summary(self):
+        """DataFrame com contagem, média e linhas por etapa"""
+        with self._lock:
+            rows = [
+                {'Etapa': stage, 'Execuções': e['count'], 'Média (ms)': e['sum'] / e['count'] * 1000,
+                 'Total (s)': e['sum'], 'Linhas': self.rows.get(stage), 'Erros': self.errors.get(stage, 0)}
+                for stage, e in self.stages.items()
+            ]
+        return pd.DataFrame(rows, columns=['Etapa', 'Execuções', 'Média (ms)', 'Total (s)', 'Linhas', 'Erros'])
+
+    def to_prometheus(self):
+        with self._lock:
+            lines = [
+                "# HELP dashboard_stage_duration_seconds Duração das etapas do dashboard.",
+                "# TYPE dashboard_stage_duration_seconds histogram"
+            ]
+            for stage, e in sorted(self.stages.items()):
+                for limit, count in zip(BUCKETS, e['buckets']):
+                    lines.append(f'dashboard_stage_duration_seconds_bucket{{stage="{stage}",le="{limit}"}} {count}')
+                lines.append(f'dashboard_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {e["count"]}')
+                lines.append(f'dashboard_stage_duration_seconds_sum{{stage="{stage}"}} {e["sum"]:.6f}')
+                lines.append(f'dashboard_stage_duration_seconds_count{{stage="{stage}"}} {e["count"]}')
+
+            lines += ["# HELP dashboard_stage_rows Linhas processadas na última execução da etapa.",
+                      "# TYPE dashboard_stage_rows gauge"]
+            lines += [f'dashboard_stage_rows{{stage="{stage}"}} {rows}' for stage, rows in sorted(self.rows.items())]
+
+            lines += ["# HELP dashboard_cache_requests_total Consultas a caches por resultado.",
+                      "# TYPE dashboard_cache_requests_total counter"]
+            lines += [f'dashboard_cache_requests_total{{cache="{name}",result="{result}"}} {count}'
+                      for (name, result), count in sorted(self.cache.items())]
+
+            lines += ["# HELP dashboard_errors_total Erros capturados por etapa.",
+                      "# TYPE dashboard_errors_total counter"]
+            lines += [f'dashboard_errors_total{{stage="{stage}"}} {count}' for stage, count in sorted(self.errors.items())]
+        return "\n".join(lines) + "\n"
+
+    def export(self, path, force=False):
+        """Grava o arquivo de métricas (no máximo a cada EXPORT_INTERVAL segundos)"""
+        now = time.monotonic()
+        if not force and now - self._last_export < EXPORT_INTERVAL:
+            return
+        self._last_export = now
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+
+registry = MetricsRegistry()
+
+_local = threading.local()
+
+
+def _session_events():
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    return st.session_state.setdefault(SESSION_KEY, [])
+
+
+@contextmanager
+def timed(stage, rows=None):
+    """Mede o bloco e registra a etapa (também em caso de exceção)"""
+    timer = StageTimer(stage)
+    timer.rows = rows
+    start = time.perf_counter()
+    ok = True
+    try:
+        yield timer
+    except Exception:
+        ok = False
+        registry.error(stage)
+        raise
+    finally:
+        timer.seconds = time.perf_counter() - start
+        registry.observe(stage, timer.seconds, timer.rows)
+        events = _session_events()
+        if events is not None:
+            events.append({'Etapa': stage, 'ms': timer.seconds * 1000, 'Linhas': timer.rows, 'OK': ok})
+
+
+def record_error(stage, error):
+    """Registra um erro tratado (exibido via st.error) sem perder o traceback"""
+    registry.error(stage)
+    logger.error("Erro em %s", stage, exc_info=error)
+
+
+def mark_cache_miss():
+    """Chamado dentro de funções cacheadas: só executa quando o cache erra"""
+    _local.miss = True
+
+
+@contextmanager
+def cache_lookup(name):
+    """Registra hit/miss de uma chamada a uma função com `mark_cache_miss`"""
+    _local.miss = False
+    yield
+    registry.cache_result(name, hit=not _local.miss)
+
+
+def record_cache(name, hit):
+    registry.cache_result(name, hit)
+
+
+def render_chart(fig, stage):
+    """st.plotly_chart medido (serialização da figura incluída)"""
+    with timed(f"render.{stage}"):
+        st.plotly_chart(fig, width="stretch")
+
+
+def begin_rerun():
+    """Zera os eventos da sessão no início de cada execução do script"""
+    if get_script_run_ctx(suppress_warning=True) is not None:
+        st.session_state[SESSION_KEY] = []
+
+
+def debug_enabled():
+    return os.getenv('DEBUG_PANEL') == '1' or st.query_params.get('debug') == '1'
+
+
+def render_debug_panel():
+    """Painel de depuração por sessão com os tempos da última execução"""
+    if not debug_enabled():
+        return
+    events = _session_events() or []
+    with st.expander("🛠️ Desempenho desta execução", expanded=False):
+        if events:
+            df = pd.DataFrame(events)
+            st.caption(f"{len(df)} etapas medidas · {df['ms'].sum():.0f} ms no total")
+            st.dataframe(df, hide_index=True, width="stretch")
+        st.caption("Acumulado do processo")
+        st.dataframe(registry.summary(), hide_index=True, width="stretch")
+
+
+def export_metrics():
+    """Exporta as métricas para METRICS_FILE, quando configurado"""
+    path = os.getenv('METRICS_FILE')
+    if path:
+        try:
+            registry.export(path)
+        except OSError as e:
+            logger.warning("Falha ao exportar métricas para %s: %s", path, e)
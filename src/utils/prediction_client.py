@@ -0,0 +1,132 @@
+"""Cliente HTTP compartilhado da API de predição.
+
+Uma única `requests.Session` por processo (conexões keep-alive em pool),
+timeouts de conexão/leitura, novas tentativas com backoff para falhas
+transitórias e um circuit breaker que falha imediatamente enquanto o
+backend está fora do ar, em vez de prender cada sessão até o timeout.
+
+Configuração:
+    PREDICTION_API_URL        URL base (padrão: http://localhost:8080)
+    PREDICTION_CONNECT_TIMEOUT / PREDICTION_READ_TIMEOUT   em segundos
+"""
+import os
+import threading
+import time
+
+import requests
+import streamlit as st
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+PREDICT_PATH = "/api/v1/predict"
+BATCH_PATH = "/api/v1/predict/batch"
+
+DEFAULT_URL = "http://localhost:8080"
+
+load_dotenv()
+CONNECT_TIMEOUT = float(os.getenv('PREDICTION_CONNECT_TIMEOUT', 3.05))
+READ_TIMEOUT = float(os.getenv('PREDICTION_READ_TIMEOUT', 30))
+
+
+class CircuitOpenError(ConnectionError):
+    """Backend considerado fora do ar; a requisição nem foi enviada"""
+
+    def __init__(self, retry_in):
+        super().__init__(f"API de predição indisponível; nova tentativa em {retry_in:.0f} s")
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Abre após `failure_threshold` falhas seguidas; depois de `reset_timeout`
+    deixa passar uma requisição de teste (meio-aberto) para decidir se fecha"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'fechado'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'meio-aberto'
+        return 'aberto'
+
+    def before_request(self):
+        with self._lock:
+            state = self.state
+            if state == 'fechado':
+                return
+            if state == 'meio-aberto' and not self._probing:
+                self._probing = True
+                return
+            raise CircuitOpenError(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)))
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class PredictionClient:
+    """Cliente da API de predição; seguro para uso entre sessões (threads)"""
+
+    def __init__(self, base_url, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 retries=2, backoff=0.3, pool_size=20, breaker=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+        # A predição é idempotente, então POST pode ser repetido em falhas transitórias
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({'POST'}),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _post(self, path, payload):
+        self.breaker.before_request()
+        try:
+            response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+        except requests.RequestException:
+            self.breaker.record_failure()
+            raise
+        # Erros 5xx contam como indisponibilidade; 4xx são erros do pedido, não do backend
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def predict(self, payload):
+        return self._post(PREDICT_PATH, payload)
+
+    def predict_batch(self, payloads):
+        return self._post(BATCH_PATH, payloads)
+
+    def url(self, path=PREDICT_PATH):
+        return f"{self.base_url}{path}"
+
+
+@st.cache_resource
+def get_prediction_client():
+    """Cliente compartilhado configurado por PREDICTION_API_URL"""
+    return PredictionClient(os.getenv('PREDICTION_API_URL', DEFAULT_URL))
@@ -0,0 +1,126 @@
+"""Captura opcional de perfil (cProfile) de uma execução completa de página.
+
+Ativação (restrita a administradores):
+    PROFILE_TOKEN=<segredo>    + ?profile=<segredo> na URL
+    PROFILE_ADMINS=a@x.com,... + ?profile=1 com o usuário logado (st.login)
+    PROFILE_PAGES=1            perfila a primeira execução de cada sessão de administrador
+                               (PROFILE_ADMINS), sem parâmetro na URL
+
+Cada pedido vale para uma única execução: o parâmetro `profile` sai da URL
+depois de usado. Só um perfil roda por vez no processo (a partir do Python
+3.12 um segundo `cProfile` ativo levanta ValueError, e o perfil registra
+todas as threads); enquanto um perfil estiver em andamento, os demais
+pedidos são adiados para a próxima execução. Mesmo assim, no 3.12+ o
+perfil inclui o trabalho de outras sessões que rodarem ao mesmo tempo.
+
+Os perfis são gravados em `PROFILE_DIR` (padrão: profiles/) no formato do
+pstats, legível por `python -m pstats`, snakeviz ou tuna.
+"""
+import cProfile
+import hmac
+import os
+import pstats
+import re
+import threading
+import unicodedata
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+TOP_FUNCTIONS = 20
+
+# Um perfil por processo: adquirido sem bloquear, quem não consegue segue sem perfil
+_profile_lock = threading.Lock()
+
+
+def _is_admin():
+    admins = {email.strip().lower() for email in os.getenv('PROFILE_ADMINS', '').split(',') if email.strip()}
+    if not admins:
+        return False
+    try:
+        return bool(st.user.is_logged_in) and str(st.user.email).lower() in admins
+    except Exception:
+        return False
+
+
+def admin_authorized(requested):
+    """`requested` (valor de um parâmetro da URL) é o PROFILE_TOKEN, ou `1` com um administrador logado"""
+    if not requested:
+        return False
+    token = os.getenv('PROFILE_TOKEN')
+    if token and hmac.compare_digest(requested, token):
+        return True
+    return requested == '1' and _is_admin()
+
+
+def profiling_requested():
+    """Indica se esta execução deve ser perfilada"""
+    # Mesmo no modo automático, só sessões de administradores são perfiladas
+    if os.getenv('PROFILE_PAGES') == '1' and not st.session_state.get('_perfil_sessao') and _is_admin():
+        return True
+    return admin_authorized(st.query_params.get('profile'))
+
+
+def _slug(name):
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^A-Za-z0-9]+', '_', name).strip('_') or 'pagina'
+
+
+def save_profile(profiler, page_name):
+    """Grava o perfil em PROFILE_DIR/<timestamp>_<pagina>.prof"""
+    directory = os.getenv('PROFILE_DIR', 'profiles')
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{datetime.now():%Y%m%d-%H%M%S}_{_slug(page_name)}.prof")
+    profiler.dump_stats(path)
+    return path
+
+
+def top_functions(profiler, limit=TOP_FUNCTIONS):
+    """Funções com maior tempo acumulado"""
+    stats = pstats.Stats(profiler).stats
+    rows = [
+        {'Função': f"{func} ({os.path.basename(filename)}:{line})", 'Chamadas': calls,
+         'Tempo próprio (ms)': own * 1000, 'Tempo acumulado (ms)': cumulative * 1000}
+        for (filename, line, func), (_, calls, own, cumulative, _) in stats.items()
+    ]
+    df = pd.DataFrame(rows, columns=['Função', 'Chamadas', 'Tempo próprio (ms)', 'Tempo acumulado (ms)'])
+    return df.sort_values('Tempo acumulado (ms)', ascending=False).head(limit)
+
+
+@contextmanager
+def profile_rerun(page_name):
+    """Perfila o bloco quando solicitado e resume as funções mais caras"""
+    if not profiling_requested():
+        yield
+        return
+    if not _profile_lock.acquire(blocking=False):
+        st.caption("🔬 Outro perfil está em andamento neste processo; o perfil fica para a próxima execução.")
+        yield
+        return
+
+    try:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Outra ferramenta de profiling (ou debugger) já ativa no processo
+            st.caption("🔬 Outra ferramenta de profiling está ativa; execução não perfilada.")
+            yield
+            return
+        # O pedido é atendido uma vez: a próxima execução da sessão roda sem perfil
+        st.session_state['_perfil_sessao'] = True
+        if 'profile' in st.query_params:
+            del st.query_params['profile']
+        try:
+            yield
+        finally:
+            profiler.disable()
+            path = save_profile(profiler, page_name)
+    finally:
+        _profile_lock.release()
+
+    with st.expander("🔬 Perfil desta execução", expanded=False):
+        st.caption(f"Perfil completo salvo em `{path}`")
+        st.dataframe(top_functions(profiler), hide_index=True, width="stretch")
@@ -0,0 +1,212 @@
+"""Cache compartilhado entre réplicas do dashboard (SQLite local ou Redis).
+
+Cada versão de um dataset é calculada por uma única réplica e gravada como
+Parquet; as demais réplicas leem o blob em vez de consultar o banco.
+
+Configuração pela variável `SHARED_CACHE`:
+    sqlite:///caminho/para/cache.db  -> arquivo SQLite compartilhado
+    redis://host:6379/0              -> servidor Redis (requer o pacote `redis`)
+    memory://                        -> stand-in local do Redis (testes/desenvolvimento)
+Sem a variável, o cache compartilhado fica desativado.
+"""
+import io
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import pandas as pd
+import streamlit as st
+
+from utils.metrics import record_cache
+
+NAMESPACE = "flightontime"
+
+
+def serialize_frame(value):
+    """Serializa DataFrame/Series em Parquet (colunar e comprimido)"""
+    frame = value.to_frame() if isinstance(value, pd.Series) else value
+    buffer = io.BytesIO()
+    frame.to_parquet(buffer, compression='zstd')
+    kind = b'S' if isinstance(value, pd.Series) else b'F'
+    return kind + buffer.getvalue()
+
+
+def deserialize_frame(blob):
+    frame = pd.read_parquet(io.BytesIO(blob[1:]))
+    return frame.iloc[:, 0] if blob[:1] == b'S' else frame
+
+
+class LocalRedis:
+    """Stand-in em memória com o subconjunto da API do Redis usado aqui"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _alive(self, key):
+        item = self._data.get(key)
+        if item and item[1] is not None and item[1] < time.time():
+            del self._data[key]
+            return None
+        return item
+
+    def get(self, key):
+        with self._lock:
+            item = self._alive(key)
+            return item[0] if item else None
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and self._alive(key):
+                return None
+            self._data[key] = (value, time.time() + ex if ex else None)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            return int(self._data.pop(key, None) is not None)
+
+
+class RedisCacheBackend:
+    """Backend sobre um cliente Redis (ou `LocalRedis`)"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl):
+        self.client.set(key, value, ex=int(ttl))
+
+    def add(self, key, value, ttl):
+        """Grava apenas se a chave não existir (usado como lock entre réplicas)"""
+        return bool(self.client.set(key, value, ex=int(ttl), nx=True))
+
+    def delete(self, key):
+        self.client.delete(key)
+
+
+class SQLiteCacheBackend:
+    """Backend em arquivo SQLite, compartilhado pelas réplicas da mesma máquina/volume"""
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS shared_cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value FROM shared_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO shared_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl)
+            )
+            conn.execute("DELETE FROM shared_cache WHERE expires_at <= ?", (time.time(),))
+
+    def add(self, key, value, ttl):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM shared_cache WHERE key = ? AND expires_at <= ?", (key, time.time()))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO shared_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl)
+            )
+            return cursor.rowcount == 1
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM shared_cache WHERE key = ?", (key,))
+
+
+class SharedCache:
+    """Cálculo único por versão de dataset, lido por todas as réplicas"""
+
+    def __init__(self, backend, lock_ttl=120, wait_timeout=60, poll_interval=0.25):
+        self.backend = backend
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+
+    def get_or_compute(self, name, version, compute, ttl):
+        """Retorna a versão do dataset do cache ou a calcula (uma réplica por vez)"""
+        key = f"{NAMESPACE}:{name}:{version}"
+
+        blob = self.backend.get(key)
+        record_cache(f"shared:{name}", hit=blob is not None)
+        if blob is not None:
+            return deserialize_frame(blob)
+
+        lock = f"{key}:lock"
+        if self.backend.add(lock, uuid.uuid4().hex.encode(), self.lock_ttl):
+            try:
+                value = compute()
+                self.backend.set(key, serialize_frame(value), ttl)
+                return value
+            finally:
+                self.backend.delete(lock)
+
+        # Outra réplica está calculando esta versão: aguarda o resultado
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            blob = self.backend.get(key)
+            if blob is not None:
+                return deserialize_frame(blob)
+        return compute()
+
+
+def create_backend(url):
+    """Cria o backend a partir da URL de configuração"""
+    if url.startswith("sqlite:///"):
+        return SQLiteCacheBackend(url[len("sqlite:///"):])
+    if url.startswith("memory://"):
+        return RedisCacheBackend(LocalRedis())
+    if url.startswith(("redis://", "rediss://")):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("Instale o pacote `redis` para usar SHARED_CACHE=redis://") from e
+        return RedisCacheBackend(redis.Redis.from_url(url))
+    raise ValueError(f"SHARED_CACHE não suportado: {url}")
+
+
+@st.cache_resource
+def get_shared_cache():
+    """Cache compartilhado configurado em SHARED_CACHE (None quando desativado)"""
+    url = os.getenv('SHARED_CACHE')
+    return SharedCache(create_backend(url)) if url else None
+
+
+def dataset_version(ttl):
+    """Versão corrente de um dataset renovado a cada `ttl` segundos (a mesma em todas as réplicas)"""
+    return int(time.time() // ttl)
+
+
+def shared_dataset(name, compute, ttl, version=None):
+    """Dataset versionado por janela de `ttl` segundos, compartilhado entre réplicas.
+
+    Quem também cacheia o resultado localmente passa a `version` que usou
+    na própria chave, para as duas camadas virarem de versão juntas.
+    """
+    cache = get_shared_cache()
+    version = dataset_version(ttl) if version is None else version
+    value = compute() if cache is None else cache.get_or_compute(name, version, compute, ttl=ttl * 2)
+    # A versão acompanha o frame para cachear agregações derivadas dele
+    value.attrs['versao'] = f"{name}:{version}"
+    return value
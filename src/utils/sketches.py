@@ -0,0 +1,385 @@
+"""Sketches mergeáveis para agregações aproximadas sobre históricos grandes."""
+import numpy as np
+import pandas as pd
+
+
+class TDigest:
+    """t-digest (variante "merging") para quantis aproximados.
+
+    Guarda centróides (média, peso) com resolução maior nas caudas, o que
+    mantém p95/p99 precisos com poucas centenas de centróides. Dois digests
+    podem ser combinados com `merge`, então quantis de um período saem da
+    fusão dos digests de cada dia, sem reordenar os dados brutos.
+    """
+
+    def __init__(self, compression=200):
+        self.compression = compression
+        self.means = np.empty(0, dtype=float)
+        self.weights = np.empty(0, dtype=float)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def __len__(self):
+        return len(self.means)
+
+    def update(self, values):
+        """Incorpora um lote de valores (vetorizado)"""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._compress(
+            np.concatenate([self.means, values]),
+            np.concatenate([self.weights, np.ones(values.size)])
+        )
+        return self
+
+    def merge(self, other):
+        """Funde outro digest neste (in-place)"""
+        if other.count == 0:
+            return self
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(
+            np.concatenate([self.means, other.means]),
+            np.concatenate([self.weights, other.weights])
+        )
+        return self
+
+    @classmethod
+    def merged(cls, digests, compression=200):
+        """Novo digest com a fusão de vários digests"""
+        result = cls(compression)
+        for digest in digests:
+            result.merge(digest)
+        return result
+
+    def quantile(self, q):
+        """Quantil(is) aproximado(s) para q em [0, 1]"""
+        q = np.asarray(q, dtype=float)
+        if self.count == 0:
+            return np.full(q.shape, np.nan)
+
+        total = self.count
+        # Cada centróide representa o ponto médio do seu peso acumulado
+        positions = np.concatenate([[0.0], np.cumsum(self.weights) - self.weights / 2.0, [total]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return np.interp(np.clip(q, 0.0, 1.0) * total, positions, values)
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind='stable')
+        means = means[order]
+        weights = weights[order]
+
+        total = weights.sum()
+        q = (np.cumsum(weights) - weights / 2.0) / total
+
+        # Função de escala k1: centróides estreitos nas caudas, largos na mediana
+        k = self.compression / (2.0 * np.pi) * np.arcsin(2.0 * q - 1.0)
+        bucket = np.floor(k - k[0]).astype(np.int64)
+
+        starts = np.flatnonzero(np.r_[True, np.diff(bucket) != 0])
+        merged_weights = np.add.reduceat(weights, starts)
+        merged_means = np.add.reduceat(means * weights, starts) / merged_weights
+
+        self.means = merged_means
+        self.weights = merged_weights
+
+
+def compress_groups(groups, means, weights, compression=200):
+    """Compressão t-digest de muitos grupos de uma vez.
+
+    Mesmo critério de `TDigest._compress`, aplicado a cada grupo (códigos
+    inteiros) com uma única ordenação, em vez de um objeto `TDigest` por
+    grupo. Devolve os centróides `(grupo, média, peso)` ordenados por grupo
+    e média.
+    """
+    groups = np.asarray(groups, dtype=np.int64)
+    means = np.asarray(means, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    if groups.size == 0:
+        return groups, means, weights
+
+    order = np.lexsort((means, groups))
+    groups, means, weights = groups[order], means[order], weights[order]
+
+    first = np.r_[True, groups[1:] != groups[:-1]]
+    starts = np.flatnonzero(first)
+    member = np.cumsum(first) - 1
+    cumulative = np.cumsum(weights)
+    within = cumulative - (cumulative - weights)[starts][member]
+    total = within[np.r_[starts[1:] - 1, groups.size - 1]][member]
+
+    q = (within - weights / 2.0) / total
+    k = compression / (2.0 * np.pi) * np.arcsin(np.clip(2.0 * q - 1.0, -1.0, 1.0))
+    bucket = np.floor(k - k[starts][member]).astype(np.int64)
+
+    merged = np.flatnonzero(first | np.r_[True, bucket[1:] != bucket[:-1]])
+    mergedWeights = np.add.reduceat(weights, merged)
+    mergedMeans = np.add.reduceat(means * weights, merged) / mergedWeights
+    return groups[merged], mergedMeans, mergedWeights
+
+
+def group_quantiles(groups, means, weights, mins, maxs, q):
+    """Quantis de cada grupo a partir dos centróides de `compress_groups`.
+
+    `mins`/`maxs` são indexados pelo código do grupo (0..n-1, todos
+    presentes). Cada grupo é interpolado como em `TDigest.quantile`; os
+    grupos ocupam faixas disjuntas do eixo ([2g, 2g + 1]) para que uma
+    única chamada a `np.interp` atenda a todos.
+    """
+    q = np.clip(np.asarray(q, dtype=float), 0.0, 1.0)
+    n = len(mins)
+    totals = np.bincount(groups, weights=weights, minlength=n)
+    cumulative = np.cumsum(weights)
+    starts = np.searchsorted(groups, np.arange(n))
+    within = cumulative - (cumulative - weights)[starts][groups]
+
+    codes = np.arange(n)
+    positions = np.concatenate([2.0 * codes, 2.0 * groups + (within - weights / 2.0) / totals[groups], 2.0 * codes + 1.0])
+    values = np.concatenate([mins, means, maxs])
+    order = np.argsort(positions, kind='stable')
+    targets = 2.0 * codes[:, None] + q[None, :]
+    return np.interp(targets.ravel(), positions[order], values[order]).reshape(n, len(q))
+
+
+def hash_keys(keys, seed=0):
+    """Hash 64 bits vetorizado de chaves arbitrárias (strings, números)"""
+    return pd.util.hash_array(np.asarray(keys, dtype=object), hash_key=f"{seed:016d}")
+
+
+def _bit_length(x):
+    """Número de bits significativos de cada elemento de um array uint64"""
+    x = x.copy()
+    n = np.zeros(x.shape, dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        mask = x >= (np.uint64(1) << np.uint64(shift))
+        n += mask * shift
+        x = np.where(mask, x >> np.uint64(shift), x)
+    return n + (x > 0)
+
+
+class CountMinSketch:
+    """Count-min sketch para estimar contagens (ou somas) por chave.
+
+    Superestima no máximo `epsilon * total` com probabilidade `1 - delta`.
+    Dois sketches com os mesmos parâmetros são mesclados somando as tabelas.
+    """
+
+    def __init__(self, epsilon=0.001, delta=0.01):
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = int(np.ceil(np.e / epsilon))
+        self.depth = int(np.ceil(np.log(1.0 / delta)))
+        self.table = np.zeros((self.depth, self.width), dtype=float)
+        self.total = 0.0
+
+    def update(self, keys, weights=None):
+        """Incorpora chaves com pesos (contagem 1 por padrão)"""
+        keys = np.asarray(keys, dtype=object)
+        weights = np.ones(len(keys)) if weights is None else np.asarray(weights, dtype=float)
+        for row in range(self.depth):
+            idx = (hash_keys(keys, row) % np.uint64(self.width)).astype(np.int64)
+            self.table[row] += np.bincount(idx, weights=weights, minlength=self.width)
+        self.total += float(weights.sum())
+        return self
+
+    @classmethod
+    def grouped(cls, groups, n_groups, labels, codes, weights, epsilon=0.001, delta=0.01):
+        """Um sketch por grupo, construídos de uma vez.
+
+        Cada linha soma `weights` à chave `labels[codes]` no grupo `groups`;
+        o hash de cada chave distinta é calculado uma única vez.
+        """
+        template = cls(epsilon, delta)
+        weights = np.asarray(weights, dtype=float)
+        tables = np.empty((n_groups, template.depth, template.width))
+        for row in range(template.depth):
+            idx = (hash_keys(labels, row) % np.uint64(template.width)).astype(np.int64)
+            flat = np.bincount(groups * template.width + idx[codes], weights=weights, minlength=n_groups * template.width)
+            tables[:, row] = flat.reshape(n_groups, template.width)
+        totals = np.bincount(groups, weights=weights, minlength=n_groups)
+
+        sketches = []
+        for table, total in zip(tables, totals):
+            sketch = cls(epsilon, delta)
+            sketch.table = table
+            sketch.total = float(total)
+            sketches.append(sketch)
+        return sketches
+
+    def estimate(self, keys):
+        keys = np.asarray(keys, dtype=object)
+        estimates = np.full(len(keys), np.inf)
+        for row in range(self.depth):
+            idx = (hash_keys(keys, row) % np.uint64(self.width)).astype(np.int64)
+            estimates = np.minimum(estimates, self.table[row][idx])
+        return estimates
+
+    def merge(self, other):
+        self.table += other.table
+        self.total += other.total
+        return self
+
+
+class SpaceSaving:
+    """Resumo de heavy hitters (Space-Saving) mergeável, com pesos.
+
+    Guarda no máximo `capacity` chaves com contagem e erro máximo; chaves
+    fora do resumo têm contagem de no máximo `floor`. Com capacidade
+    `ceil(1 / epsilon)` o erro de cada contagem fica abaixo de
+    `epsilon * total`.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.floor = 0.0
+        self.total = 0.0
+
+    @classmethod
+    def for_error(cls, epsilon):
+        return cls(int(np.ceil(1.0 / epsilon)))
+
+    def update(self, keys, weights=None):
+        """Incorpora um lote: agrega o lote exatamente e funde no resumo"""
+        weights = np.ones(len(keys)) if weights is None else np.asarray(weights, dtype=float)
+        counts = pd.Series(weights).groupby(np.asarray(keys, dtype=object)).sum()
+        return self.merge(self.from_counts(counts, self.capacity))
+
+    @classmethod
+    def from_counts(cls, counts, capacity):
+        """Resumo a partir de contagens exatas (Series chave -> contagem)"""
+        return cls.from_arrays(counts.index.to_numpy(), counts.to_numpy(), capacity)
+
+    @classmethod
+    def from_arrays(cls, keys, counts, capacity):
+        """Resumo a partir de contagens exatas em arrays paralelos (chaves distintas)"""
+        summary = cls(capacity)
+        counts = np.asarray(counts, dtype=float)
+        positive = counts > 0
+        keys, counts = np.asarray(keys, dtype=object)[positive], counts[positive]
+        summary.total = float(counts.sum())
+        if len(counts) > capacity:
+            ranked = np.argsort(-counts, kind='stable')
+            summary.floor = float(counts[ranked[capacity]])
+            keys, counts = keys[ranked[:capacity]], counts[ranked[:capacity]]
+        summary.counts = dict(zip(keys.tolist(), counts.tolist()))
+        summary.errors = dict.fromkeys(summary.counts, 0.0)
+        return summary
+
+    def merge(self, other):
+        """Funde outro resumo neste (in-place)"""
+        keys = set(self.counts) | set(other.counts)
+        counts = {
+            key: self.counts.get(key, self.floor) + other.counts.get(key, other.floor)
+            for key in keys
+        }
+        errors = {
+            key: self.errors.get(key, self.floor) + other.errors.get(key, other.floor)
+            for key in keys
+        }
+        floor = self.floor + other.floor
+
+        if len(counts) > self.capacity:
+            ranked = sorted(counts, key=counts.get, reverse=True)
+            floor = max(floor, counts[ranked[self.capacity]])
+            ranked = ranked[:self.capacity]
+            counts = {key: counts[key] for key in ranked}
+            errors = {key: errors[key] for key in ranked}
+
+        self.counts = counts
+        self.errors = errors
+        self.floor = floor
+        self.total += other.total
+        return self
+
+    def top(self, n):
+        """As n chaves mais frequentes: (chave, contagem estimada, erro máximo)"""
+        ranked = sorted(self.counts, key=self.counts.get, reverse=True)[:n]
+        return [(key, self.counts[key], self.errors[key]) for key in ranked]
+
+
+class HyperLogLog:
+    """HyperLogLog para contagem aproximada de valores distintos.
+
+    O erro padrão é ~1.04 / sqrt(2^p); sketches com a mesma precisão são
+    mesclados pelo máximo dos registradores.
+    """
+
+    def __init__(self, p=14):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    @classmethod
+    def for_error(cls, relative_error):
+        p = int(np.ceil(np.log2((1.04 / relative_error) ** 2)))
+        return cls(min(max(p, 4), 18))
+
+    @property
+    def relative_error(self):
+        return 1.04 / np.sqrt(self.m)
+
+    def update(self, keys):
+        hashes = hash_keys(keys)
+        if hashes.size == 0:
+            return self
+        idx, rank = self._registers_of(hashes)
+        np.maximum.at(self.registers, idx, rank)
+        return self
+
+    def _registers_of(self, hashes):
+        """Registrador e posto (rank) de cada hash"""
+        idx = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        rank = ((64 - self.p) - _bit_length(rest) + 1).astype(np.uint8)
+        return idx, rank
+
+    @classmethod
+    def grouped(cls, groups, n_groups, labels, codes, p=14):
+        """Um sketch por grupo com as chaves `labels[codes]`, construídos de uma vez"""
+        template = cls(p)
+        idx, rank = template._registers_of(hash_keys(labels))
+        registers = np.zeros(n_groups * template.m, dtype=np.uint8)
+        np.maximum.at(registers, groups * template.m + idx[codes], rank[codes])
+
+        sketches = []
+        for row in registers.reshape(n_groups, template.m):
+            sketch = cls(p)
+            sketch.registers = row
+            sketches.append(sketch)
+        return sketches
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def folded(self, p):
+        """Sketch equivalente com precisão menor `p` (erro maior, o mesmo fluxo de chaves)"""
+        if p >= self.p:
+            return self
+        d = self.p - p
+        registers = self.registers.reshape(1 << p, 1 << d).astype(np.int64)
+        # Os d bits que saem do índice passam a ser os primeiros bits do resto do hash
+        low = np.arange(1 << d, dtype=np.uint64)
+        rank = np.where(low == 0, registers + d, d - _bit_length(low) + 1)
+        folded = HyperLogLog(p)
+        folded.registers = np.where(registers > 0, rank, 0).max(axis=1).astype(np.uint8)
+        return folded
+
+    def count(self):
+        alpha = 0.7213 / (1.0 + 1.079 / self.m)
+        estimate = alpha * self.m ** 2 / np.sum(np.exp2(-self.registers.astype(float)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        # Correção para cardinalidades pequenas (linear counting)
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * np.log(self.m / zeros)
+        return float(estimate)
@@ -0,0 +1,333 @@
+"""Backends de armazenamento do histórico de previsões.
+
+O carregamento (`utils.database`) fala com um backend com a mesma interface
+para PostgreSQL e para bancos embarcados, que permitem rodar o dashboard,
+os benchmarks e os testes de carga numa única máquina, sem Postgres.
+
+Configuração pela variável `DB_BACKEND`:
+    postgres (padrão)                -> PostgreSQL com DB_HOST, DB_PORT, DB_NAME, ...
+    sqlite:///caminho/historico.db   -> arquivo SQLite
+    sqlite://                        -> SQLite em memória (CI / testes de carga)
+    duckdb:///caminho/historico.duckdb -> DuckDB (requer o pacote `duckdb`)
+
+Os backends embarcados criam a tabela na primeira conexão a partir de
+`DB_SEED`:
+    mock (padrão)         -> src/pages/MOCK_DATA.sql
+    synthetic:<linhas>    -> gerador sintético (utils.synthetic), ex.: synthetic:1000000
+
+`DB_POOL_SIZE` (padrão 5) limita as conexões simultâneas em todos os backends;
+`backend.stats` registra uso, pico e esperas por conexão.
+
+`backend.TODAY_QUERY` recebe o dia como parâmetro (`today_params(dia)`),
+no dialeto de cada backend.
+
+`backend.wait_for_rows(timeout)` avisa que há linhas novas: no PostgreSQL
+via LISTEN/NOTIFY (instale o gatilho de `NOTIFY_TRIGGER_SQL` uma vez no
+banco); nos embarcados apenas espera `timeout`, e quem chama consulta de novo.
+"""
+import select
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+from dotenv import load_dotenv
+
+TABLE = "prediction_history"
+MOCK_SQL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pages', 'MOCK_DATA.sql')
+SEED_CHUNK = 1_000_000
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+
+NOTIFY_CHANNEL = f"{TABLE}_insert"
+# Uma notificação por comando INSERT (inserções em massa não geram uma por linha)
+NOTIFY_TRIGGER_SQL = f"""
+CREATE OR REPLACE FUNCTION notify_{TABLE}_insert() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{NOTIFY_CHANNEL}', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS {TABLE}_notify ON {TABLE};
+CREATE TRIGGER {TABLE}_notify AFTER INSERT ON {TABLE}
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_{TABLE}_insert();
+"""
+
+load_dotenv()
+
+
+def today_params(day):
+    """Parâmetros de `TODAY_QUERY`: o dia vem do app, não do relógio (e fuso) do banco"""
+    return {'dia': day.isoformat()}
+
+
+def mock_frame(path=MOCK_SQL):
+    """Lê MOCK_DATA.sql (executado num SQLite temporário) como DataFrame"""
+    with open(path, encoding='utf-8') as f:
+        script = f.read()
+    conn = sqlite3.connect(':memory:')
+    try:
+        conn.executescript(script)
+        df = pd.read_sql_query("SELECT * FROM MOCK_DATA ORDER BY id", conn)
+    finally:
+        conn.close()
+    for column in ['data_partida', 'request_at']:
+        df[column] = pd.to_datetime(df[column], utc=True).dt.tz_localize(None)
+    return df
+
+
+def seed_frames(seed):
+    """Blocos de dados iniciais conforme DB_SEED"""
+    if seed == 'mock':
+        yield mock_frame()
+    elif seed.startswith('synthetic:'):
+        from utils.synthetic import generate_chunks
+        yield from generate_chunks(int(seed.split(':', 1)[1]), chunk_size=SEED_CHUNK)
+    else:
+        raise ValueError(f"DB_SEED não suportado: {seed}")
+
+
+class PoolStats:
+    """Limita as conexões simultâneas e mede a saturação do pool"""
+
+    def __init__(self, size=POOL_SIZE):
+        self.size = size
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.peak = 0
+        self.acquired = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+
+    @contextmanager
+    def slot(self):
+        start = time.perf_counter()
+        waited = not self._slots.acquire(blocking=False)
+        if waited:
+            self._slots.acquire()
+        with self._lock:
+            self.acquired += 1
+            self.in_use += 1
+            self.peak = max(self.peak, self.in_use)
+            if waited:
+                self.waited += 1
+                self.wait_seconds += time.perf_counter() - start
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    def reset(self):
+        with self._lock:
+            self.peak = self.in_use
+            self.acquired = self.waited = 0
+            self.wait_seconds = 0.0
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'tamanho': self.size, 'em_uso': self.in_use, 'pico': self.peak,
+                'aquisicoes': self.acquired, 'esperas': self.waited, 'espera_s': self.wait_seconds
+            }
+
+
+class PostgresBackend:
+    """PostgreSQL com pool de conexões (psycopg2)"""
+
+    name = 'postgres'
+    TODAY_QUERY = f"""
+        SELECT * FROM {TABLE}
+        WHERE DATE(data_partida) = %(dia)s
+        ORDER BY data_partida
+    """
+
+    def __init__(self, config, minconn=1, maxconn=POOL_SIZE):
+        from psycopg2 import pool
+        # As sessões do Streamlit rodam em threads: o pool precisa ser thread-safe
+        self.pool = pool.ThreadedConnectionPool(minconn, maxconn, **config)
+        self.stats = PoolStats(maxconn)
+        self.config = config
+        self._listener = None
+
+    @contextmanager
+    def connection(self):
+        # Espera por uma conexão livre em vez de falhar com PoolError quando o pool esgota
+        with self.stats.slot():
+            conn = self.pool.getconn()
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                # Encerrada a transação: a conexão não volta ao pool "idle in transaction", com now() congelado
+                self.pool.putconn(conn)
+
+    def read_sql(self, query, conn, params=None):
+        return pd.read_sql_query(query, conn, params=params)
+
+    def wait_for_rows(self, timeout):
+        """Espera um NOTIFY de inserção por até `timeout` segundos; True se chegou algum"""
+        if self._listener is None or self._listener.closed:
+            import psycopg2
+            # Conexão dedicada fora do pool: fica presa no LISTEN enquanto o processo viver
+            self._listener = psycopg2.connect(**self.config)
+            self._listener.autocommit = True
+            with self._listener.cursor() as cur:
+                cur.execute(f"LISTEN {NOTIFY_CHANNEL}")
+        if select.select([self._listener], [], [], timeout) == ([], [], []):
+            return False
+        self._listener.poll()
+        notified = bool(self._listener.notifies)
+        self._listener.notifies.clear()
+        return notified
+
+
+class SQLiteBackend:
+    """SQLite embarcado; em memória quando `path` é None"""
+
+    name = 'sqlite'
+    # data_partida é gravada como texto 'AAAA-MM-DD HH:MM:SS', então o intervalo é uma comparação de strings
+    TODAY_QUERY = f"""
+        SELECT * FROM {TABLE}
+        WHERE data_partida >= :dia AND data_partida < date(:dia, '+1 day')
+        ORDER BY data_partida
+    """
+
+    def __init__(self, path=None, seed='mock'):
+        if path:
+            self.target, self.uri = path, False
+            self._keeper = None
+        else:
+            # Banco em memória compartilhado entre conexões; a conexão guardiã o mantém vivo
+            self.target, self.uri = f"file:flightontime-{uuid.uuid4().hex}?mode=memory&cache=shared", True
+            self._keeper = self._connect()
+        self._lock = threading.Lock()
+        self.stats = PoolStats()
+        self.bootstrap(seed)
+
+    def _connect(self):
+        return sqlite3.connect(self.target, uri=self.uri, timeout=30, check_same_thread=False)
+
+    def _has_table(self, conn):
+        return conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (TABLE,)
+        ).fetchone() is not None
+
+    def bootstrap(self, seed):
+        """Cria e popula a tabela quando ela ainda não existe"""
+        with self._lock, self.connection() as conn:
+            if not self._has_table(conn):
+                for frame in seed_frames(seed):
+                    frame.to_sql(TABLE, conn, if_exists='append', index=False)
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_data_partida ON {TABLE} (data_partida)")
+            # O modo ao vivo lê as linhas com id maior que o último visto
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_id ON {TABLE} (id)")
+            conn.commit()
+
+    @contextmanager
+    def connection(self):
+        with self.stats.slot():
+            conn = self._connect()
+            try:
+                yield conn
+            finally:
+                conn.close()
+
+    def read_sql(self, query, conn, params=None):
+        return pd.read_sql_query(query, conn, params=params)
+
+    def wait_for_rows(self, timeout):
+        """Sem notificações no SQLite: quem chama consulta de novo a cada `timeout` segundos"""
+        time.sleep(timeout)
+        return True
+
+
+class DuckDBBackend:
+    """DuckDB embarcado (colunar); em memória quando `path` é None"""
+
+    name = 'duckdb'
+    TODAY_QUERY = f"""
+        SELECT * FROM {TABLE}
+        WHERE data_partida >= CAST($dia AS DATE) AND data_partida < CAST($dia AS DATE) + INTERVAL 1 DAY
+        ORDER BY data_partida
+    """
+
+    def __init__(self, path=None, seed='mock'):
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError("Instale o pacote `duckdb` para usar DB_BACKEND=duckdb://") from e
+        self._db = duckdb.connect(path or ':memory:')
+        self._lock = threading.Lock()
+        self.stats = PoolStats()
+        self.bootstrap(seed)
+
+    def bootstrap(self, seed):
+        with self._lock:
+            exists = self._db.execute(
+                "SELECT 1 FROM information_schema.tables WHERE table_name = ?", [TABLE]
+            ).fetchone()
+            if exists:
+                return
+            for i, frame in enumerate(seed_frames(seed)):
+                self._db.register('seed_frame', frame)
+                if i == 0:
+                    self._db.execute(f"CREATE TABLE {TABLE} AS SELECT * FROM seed_frame")
+                else:
+                    self._db.execute(f"INSERT INTO {TABLE} SELECT * FROM seed_frame")
+                self._db.unregister('seed_frame')
+
+    @contextmanager
+    def connection(self):
+        # Cada thread usa um cursor próprio sobre o mesmo banco
+        with self.stats.slot():
+            conn = self._db.cursor()
+            try:
+                yield conn
+            finally:
+                conn.close()
+
+    def read_sql(self, query, conn, params=None):
+        return conn.execute(query, params).df() if params else conn.execute(query).df()
+
+    def wait_for_rows(self, timeout):
+        """Sem notificações no DuckDB: quem chama consulta de novo a cada `timeout` segundos"""
+        time.sleep(timeout)
+        return True
+
+
+def postgres_config():
+    return {
+        'host': os.getenv('DB_HOST'),
+        'port': int(os.getenv('DB_PORT', 5432)),
+        'database': os.getenv('DB_NAME'),
+        'user': os.getenv('DB_USER'),
+        'password': os.getenv('DB_PASSWORD')
+    }
+
+
+def create_backend(url, seed='mock'):
+    """Cria o backend a partir da URL de configuração"""
+    if url in ('postgres', 'postgresql'):
+        return PostgresBackend(postgres_config())
+    if url.startswith("sqlite://"):
+        return SQLiteBackend(url[len("sqlite:///"):] or None, seed)
+    if url.startswith("duckdb://"):
+        return DuckDBBackend(url[len("duckdb:///"):] or None, seed)
+    raise ValueError(f"DB_BACKEND não suportado: {url}")
+
+
+@st.cache_resource
+def get_backend():
+    """Backend configurado em DB_BACKEND (PostgreSQL por padrão)"""
+    return create_backend(os.getenv('DB_BACKEND', 'postgres'), os.getenv('DB_SEED', 'mock'))
+
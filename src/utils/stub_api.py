@@ -0,0 +1,151 @@
+"""API de predição simulada para testes locais, benchmarks e testes de carga.
+
+Expõe os mesmos endpoints do backend real, com respostas determinísticas:
+    POST /api/v1/predict        -> um voo
+    POST /api/v1/predict/batch  -> lista de voos
+
+Latência, taxa de erro e limites de payload são configuráveis para medir o
+cliente em condições realistas (e degradadas):
+
+    python src/utils/stub_api.py --port 8080 --latency-ms 40 --per-row-ms 0.5 --error-rate 0.01 --max-batch 500
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REQUIRED_FIELDS = ['companhia', 'origem_aeroporto', 'destino_aeroporto', 'data_partida', 'distancia_km']
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 0.0         # latência base por requisição
+    jitter_ms: float = 0.0          # variação uniforme somada à latência base
+    per_row_ms: float = 0.0         # custo adicional por voo (lotes)
+    error_rate: float = 0.0         # fração de requisições que respondem 500
+    max_batch: int = 0              # voos por lote (0 = sem limite) -> 413 acima disso
+    max_body_bytes: int = 0         # tamanho do corpo (0 = sem limite) -> 413 acima disso
+
+
+def predict(flight):
+    """Previsão determinística a partir do conteúdo do voo"""
+    key = f"{flight['companhia']}|{flight['origem_aeroporto']}|{flight['destino_aeroporto']}|{flight['data_partida']}"
+    probabilidade = (zlib.crc32(key.encode('utf-8')) % 1000) / 1000
+    return {
+        'probabilidade': probabilidade,
+        'mensagem': 'Alta chance de atraso' if probabilidade >= 0.5 else 'Baixa chance de atraso',
+        'metricas_internas': {
+            'risco_historico_origem': (zlib.crc32(flight['origem_aeroporto'].encode('utf-8')) % 500) / 1000,
+            'risco_historico_companhia': (zlib.crc32(flight['companhia'].encode('utf-8')) % 500) / 1000,
+            'fonte': 'stub'
+        }
+    }
+
+
+def validate(flight):
+    missing = [field for field in REQUIRED_FIELDS if field not in flight]
+    if missing:
+        return f"Campos obrigatórios ausentes: {', '.join(missing)}"
+    return None
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Cabeçalho e corpo saem em escritas separadas; com Nagle ligado, conexões
+    # keep-alive esperariam o ACK atrasado (~40 ms) a cada resposta
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        config = self.server.config
+        length = int(self.headers.get('Content-Length', 0))
+        if config.max_body_bytes and length > config.max_body_bytes:
+            # Descarta o corpo para manter a conexão keep-alive utilizável
+            self.rfile.read(length)
+            return self._send(413, {'erro': f'Payload acima de {config.max_body_bytes} bytes'})
+        try:
+            body = json.loads(self.rfile.read(length) or b'null')
+        except ValueError:
+            return self._send(400, {'erro': 'JSON inválido'})
+
+        if self.path == '/api/v1/predict':
+            flights = [body] if isinstance(body, dict) else None
+        elif self.path == '/api/v1/predict/batch':
+            flights = body if isinstance(body, list) else None
+        else:
+            return self._send(404, {'erro': f'Endpoint não encontrado: {self.path}'})
+
+        if flights is None:
+            return self._send(400, {'erro': 'Formato de payload inválido'})
+        if config.max_batch and len(flights) > config.max_batch:
+            return self._send(413, {'erro': f'Lote acima de {config.max_batch} voos'})
+        for i, flight in enumerate(flights):
+            problem = validate(flight) if isinstance(flight, dict) else 'Voo deve ser um objeto JSON'
+            if problem:
+                return self._send(400, {'erro': problem, 'indice': i})
+
+        delay = config.latency_ms + random.uniform(0, config.jitter_ms) + config.per_row_ms * len(flights)
+        if delay:
+            time.sleep(delay / 1000)
+        if config.error_rate and random.random() < config.error_rate:
+            return self._send(500, {'erro': 'Falha simulada'})
+
+        results = [predict(flight) for flight in flights]
+        self._send(200, results[0] if isinstance(body, dict) else results)
+
+
+def create_server(host='127.0.0.1', port=8080, config=None):
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.config = config or StubConfig()
+    return server
+
+
+def start_in_thread(host='127.0.0.1', port=8080, config=None):
+    """Sobe o servidor numa thread daemon; devolve o servidor (use .shutdown() para parar)"""
+    server = create_server(host, port, config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API de predição simulada")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--per-row-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--max-batch', type=int, default=0)
+    parser.add_argument('--max-body-bytes', type=int, default=0)
+    args = parser.parse_args()
+    config = StubConfig(
+        args.latency_ms, args.jitter_ms, args.per_row_ms,
+        args.error_rate, args.max_batch, args.max_body_bytes
+    )
+    server = create_server(args.host, args.port, config)
+    print(f"API simulada em http://{args.host}:{args.port}/api/v1/predict")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""Gerador sintético (com semente) de `prediction_history` para testes de escala.
+
+Segue o esquema de MOCK_DATA.sql, mas com códigos IATA reais, companhias
+aceitas pelo backend, perfil horário de partidas e taxas de atraso
+plausíveis. Gera em blocos, então escala de 10 mil a 50 milhões de linhas
+sem materializar tudo em memória:
+
+    python src/utils/synthetic.py --rows 1000000 --out historico.parquet
+"""
+import argparse
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+# IATA -> (latitude, longitude, peso de tráfego)
+AIRPORTS_BR = {
+    'GRU': (-23.4356, -46.4731, 43), 'CGH': (-23.6261, -46.6564, 22), 'BSB': (-15.8711, -47.9186, 16),
+    'GIG': (-22.8090, -43.2506, 14), 'CNF': (-19.6244, -43.9719, 11), 'VCP': (-23.0074, -47.1345, 11),
+    'SDU': (-22.9105, -43.1631, 10), 'REC': (-8.1265, -34.9236, 9), 'POA': (-29.9944, -51.1714, 8),
+    'SSA': (-12.9086, -38.3225, 8), 'FOR': (-3.7763, -38.5326, 7), 'CWB': (-25.5285, -49.1758, 6),
+    'FLN': (-27.6703, -48.5525, 4), 'BEL': (-1.3792, -48.4763, 4), 'MAO': (-3.0386, -60.0497, 3),
+    'GYN': (-16.6320, -49.2207, 3)
+}
+AIRPORTS_US = {
+    'ATL': (33.6407, -84.4277, 104), 'DFW': (32.8998, -97.0403, 81), 'DEN': (39.8561, -104.6737, 78),
+    'ORD': (41.9742, -87.9073, 74), 'LAX': (33.9416, -118.4085, 75), 'JFK': (40.6413, -73.7781, 62),
+    'LAS': (36.0840, -115.1537, 57), 'MCO': (28.4312, -81.3081, 57), 'MIA': (25.7959, -80.2870, 52),
+    'CLT': (35.2144, -80.9473, 53), 'SEA': (47.4502, -122.3088, 51), 'PHX': (33.4342, -112.0116, 48),
+    'EWR': (40.6895, -74.1745, 49), 'SFO': (37.6213, -122.3790, 50), 'IAH': (29.9902, -95.3368, 46),
+    'BOS': (42.3656, -71.0096, 40), 'MSP': (44.8848, -93.2223, 35), 'DTW': (42.2162, -83.3554, 32),
+    'PHL': (39.8744, -75.2424, 28), 'LGA': (40.7769, -73.8740, 32), 'BWI': (39.1754, -76.6683, 26),
+    'SLC': (40.7899, -111.9791, 26), 'DCA': (38.8512, -77.0402, 25), 'MDW': (41.7868, -87.7522, 22),
+    'HOU': (29.6454, -95.2789, 14)
+}
+
+# Companhia -> taxa base de atraso previsto
+CARRIERS_BR = {'LATAM Airlines': 0.18, 'GOL Linhas Aéreas': 0.21, 'Azul Linhas Aéreas': 0.16}
+CARRIERS_US = {'American Airlines': 0.22, 'Delta Air Lines': 0.17, 'United Airlines': 0.21, 'Southwest Airlines': 0.24}
+CARRIERS_INTL = {'LATAM Airlines': 0.20, 'American Airlines': 0.23, 'Delta Air Lines': 0.19, 'United Airlines': 0.22}
+
+# Participação de mercado (mesma ordem dos dicionários acima)
+SHARE_BR = [0.38, 0.33, 0.29]
+SHARE_US = [0.30, 0.27, 0.23, 0.20]
+SHARE_INTL = [0.40, 0.25, 0.15, 0.20]
+
+# Proporção de voos domésticos BR, domésticos EUA e internacionais BR <-> EUA
+REGION_SHARE = [0.40, 0.57, 0.03]
+
+# Partidas por hora do dia: bancos de manhã e fim de tarde, quase nada de madrugada
+HOURLY_PROFILE = np.array([
+    0.4, 0.2, 0.1, 0.1, 0.3, 1.6, 4.8, 6.5, 6.8, 6.2, 5.6, 5.3,
+    5.4, 5.5, 5.6, 5.8, 6.1, 6.4, 6.3, 5.7, 4.6, 3.5, 2.2, 1.1
+])
+HOURLY_PROFILE = HOURLY_PROFILE / HOURLY_PROFILE.sum()
+
+# Efeito (logit) da hora sobre o atraso: atrasos se acumulam ao longo do dia
+HOUR_EFFECT = np.clip((np.arange(24) - 6) / 15.0, 0.0, 1.0) - 0.4
+
+# Meses de alta temporada (jan, jul, dez) com mais atrasos
+MONTH_EFFECT = np.array([0.25, 0.05, 0.0, -0.05, -0.1, 0.05, 0.3, 0.15, -0.1, -0.05, 0.0, 0.3])
+
+MODEL_VERSIONS = [1.0, 1.1, 1.2]
+
+COLUMNS = [
+    'id', 'companhia_aerea', 'origem_aeroporto', 'destino_aeroporto', 'data_partida',
+    'dia_da_semana', 'atraso_previsto', 'probabilidade_atraso', 'modelo_versao',
+    'tempo_resposta_ms', 'status', 'request_at'
+]
+
+
+def airport_coords():
+    """Dicionário IATA -> coordenadas no formato de loadAirporsOpenFlights()"""
+    return {
+        iata: {'lat': lat, 'lon': lon, 'nome': iata}
+        for iata, (lat, lon, _) in {**AIRPORTS_BR, **AIRPORTS_US}.items()
+    }
+
+
+def _codes(airports):
+    codes = np.array(list(airports))
+    weights = np.array([w for _, _, w in airports.values()], dtype=float)
+    return codes, weights / weights.sum()
+
+
+def _pair(rng, ori_codes, ori_weights, dest_codes, dest_weights, n):
+    ori = rng.choice(len(ori_codes), size=n, p=ori_weights)
+    dest = rng.choice(len(dest_codes), size=n, p=dest_weights)
+    if ori_codes is dest_codes:
+        # Origem == destino: desloca o destino para outro aeroporto
+        same = ori == dest
+        dest[same] = (dest[same] + 1 + rng.integers(0, len(dest_codes) - 1, same.sum())) % len(dest_codes)
+    return ori_codes[ori], dest_codes[dest]
+
+
+def _carriers(rng, carriers, share, n):
+    names = np.array(list(carriers))
+    idx = rng.choice(len(names), size=n, p=share)
+    return names[idx], np.array(list(carriers.values()))[idx]
+
+
+def generate_chunk(n_rows, rng, start, days, first_id=1):
+    """Gera um bloco de `n_rows` previsões"""
+    region = rng.choice(3, size=n_rows, p=REGION_SHARE)
+    ori = np.empty(n_rows, dtype=object)
+    dest = np.empty(n_rows, dtype=object)
+    carrier = np.empty(n_rows, dtype=object)
+    base_rate = np.empty(n_rows, dtype=float)
+
+    br_codes, br_weights = _codes(AIRPORTS_BR)
+    us_codes, us_weights = _codes(AIRPORTS_US)
+
+    mask = region == 0
+    ori[mask], dest[mask] = _pair(rng, br_codes, br_weights, br_codes, br_weights, mask.sum())
+    carrier[mask], base_rate[mask] = _carriers(rng, CARRIERS_BR, SHARE_BR, mask.sum())
+
+    mask = region == 1
+    ori[mask], dest[mask] = _pair(rng, us_codes, us_weights, us_codes, us_weights, mask.sum())
+    carrier[mask], base_rate[mask] = _carriers(rng, CARRIERS_US, SHARE_US, mask.sum())
+
+    mask = region == 2
+    n_intl = int(mask.sum())
+    outbound = rng.random(n_intl) < 0.5
+    br, us = _pair(rng, br_codes, br_weights, us_codes, us_weights, n_intl)
+    ori[mask] = np.where(outbound, br, us)
+    dest[mask] = np.where(outbound, us, br)
+    carrier[mask], base_rate[mask] = _carriers(rng, CARRIERS_INTL, SHARE_INTL, n_intl)
+
+    day = rng.integers(0, days, n_rows)
+    hour = rng.choice(24, size=n_rows, p=HOURLY_PROFILE)
+    seconds = day * 86400 + hour * 3600 + rng.integers(0, 3600, n_rows)
+    data_partida = pd.Timestamp(start) + pd.to_timedelta(seconds, unit='s')
+
+    month = data_partida.month.to_numpy() - 1
+    hub = np.isin(ori, ['GRU', 'CGH', 'ATL', 'ORD', 'JFK', 'EWR', 'LGA', 'SFO', 'DFW']).astype(float)
+    logit = (
+        np.log(base_rate / (1 - base_rate))
+        + HOUR_EFFECT[hour] + MONTH_EFFECT[month] + 0.25 * hub
+        + rng.normal(0.0, 1.5, n_rows)
+    )
+    probabilidade = 1.0 / (1.0 + np.exp(-logit))
+
+    # Versões do modelo entram em produção ao longo do período
+    version_idx = np.minimum(day * len(MODEL_VERSIONS) // max(days, 1), len(MODEL_VERSIONS) - 1)
+    latency = rng.lognormal(np.log(80.0), 0.45, n_rows) * (1.0 - 0.1 * version_idx)
+
+    return pd.DataFrame({
+        'id': np.arange(first_id, first_id + n_rows),
+        'companhia_aerea': carrier,
+        'origem_aeroporto': ori,
+        'destino_aeroporto': dest,
+        'data_partida': data_partida,
+        'dia_da_semana': data_partida.weekday,
+        'atraso_previsto': (probabilidade >= 0.5).astype(int),
+        'probabilidade_atraso': probabilidade.round(2),
+        'modelo_versao': np.array(MODEL_VERSIONS)[version_idx],
+        'tempo_resposta_ms': latency.round(2),
+        'status': 1.0,
+        'request_at': data_partida - pd.to_timedelta(rng.integers(3600, 30 * 86400, n_rows), unit='s')
+    }, columns=COLUMNS)
+
+
+def generate_chunks(n_rows, seed=42, start=None, days=365, chunk_size=1_000_000):
+    """Gera o histórico em blocos; por padrão o período termina hoje"""
+    start = start or (date.today() - timedelta(days=days - 1))
+    produced = 0
+    chunk = 0
+    while produced < n_rows:
+        size = min(chunk_size, n_rows - produced)
+        rng = np.random.default_rng([seed, chunk])
+        yield generate_chunk(size, rng, start, days, first_id=produced + 1)
+        produced += size
+        chunk += 1
+
+
+def generate_history(n_rows, seed=42, start=None, days=365):
+    """Histórico completo em um único DataFrame (para tamanhos que cabem em memória)"""
+    return pd.concat(list(generate_chunks(n_rows, seed, start, days)), ignore_index=True)
+
+
+def write_parquet(path, n_rows, seed=42, start=None, days=365, chunk_size=1_000_000):
+    """Grava o histórico em Parquet bloco a bloco, sem materializar tudo"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in generate_chunks(n_rows, seed, start, days, chunk_size):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression='zstd')
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera prediction_history sintético")
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--out', default='prediction_history.parquet')
+    args = parser.parse_args()
+    write_parquet(args.out, args.rows, args.seed, days=args.days)
+    print(f"{args.rows:,} linhas gravadas em {args.out}")
+
+
+if __name__ == '__main__':
+    main()
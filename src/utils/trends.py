@@ -0,0 +1,203 @@
+"""Taxa de atraso prevista em janelas móveis (7, 28 e 90 dias) a partir de somas prefixadas por dia."""
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from utils.watermark import InsertionWatermark
+
+# Dimensões de corte: nome exibido -> coluna do histórico (None = todos os voos)
+DIMENSIONS = {
+    'total': None,
+    'companhia': 'companhia_aerea',
+    'rota': 'linhas_aereas'
+}
+
+WINDOWS = [7, 28, 90]
+
+# Objeto e cabeçalhos dos três arrays de cada chave, além dos dados
+KEY_OVERHEAD_BYTES = 400
+
+
+def daily_counts(frame, column):
+    """Voos e atrasos por (chave, dia), ordenados por chave e dia: `(chaves, dias, voos, atrasos, inícios)`.
+
+    `inícios` marca onde começa o trecho de cada chave nos arrays de dias e contagens.
+    """
+    keys = np.full(len(frame), 'todas', dtype=object) if column is None else frame[column].astype(str).to_numpy()
+    keyCodes, keyValues = pd.factorize(keys)
+    days = frame['dia'].to_numpy()
+    first = days.min()
+    span = days.max() - first + 1
+    # (chave, dia) num único inteiro: ordenar agrupa por chave e ordena os dias de cada uma
+    groups, inverse = np.unique(keyCodes.astype(np.int64) * span + (days - first), return_inverse=True)
+    inverse = inverse.ravel()
+    flights = np.bincount(inverse, minlength=len(groups))
+    delays = np.bincount(inverse, weights=frame['atraso'].to_numpy(), minlength=len(groups)).astype(np.int64)
+    groupKeys = groups // span
+    starts = np.flatnonzero(np.r_[True, groupKeys[1:] != groupKeys[:-1]])
+    groupDays = (groups % span + first).astype('datetime64[D]')
+    return np.asarray(keyValues, dtype=object)[groupKeys[starts]], groupDays, flights, delays, starts
+
+
+@dataclass
+class KeySums:
+    """Somas prefixadas de uma chave, só nos dias em que ela teve voos"""
+    days: np.ndarray     # datetime64[D], em ordem
+    flights: np.ndarray  # voos acumulados até cada dia (inclusive)
+    delays: np.ndarray
+
+    @classmethod
+    def from_daily(cls, days, flights, delays):
+        return cls(days, np.cumsum(flights), np.cumsum(delays))
+
+    def merge(self, days, flights, delays):
+        """Soma contagens diárias novas; devolve um objeto novo (consultas em andamento não são afetadas)"""
+        if days[0] > self.days[-1]:
+            # Caso comum: só dias depois do último, anexados ao fim das somas
+            return KeySums(
+                np.concatenate([self.days, days]),
+                np.concatenate([self.flights, self.flights[-1] + np.cumsum(flights)]),
+                np.concatenate([self.delays, self.delays[-1] + np.cumsum(delays)])
+            )
+        # Previsões tardias para dias passados: só esta chave é refeita
+        allDays, inverse = np.unique(np.concatenate([self.days, days]), return_inverse=True)
+        merged = []
+        for sums, daily in ((self.flights, flights), (self.delays, delays)):
+            counts = np.zeros(len(allDays), dtype=np.int64)
+            np.add.at(counts, inverse.ravel(), np.concatenate([np.diff(sums, prepend=0), daily]))
+            merged.append(np.cumsum(counts))
+        return KeySums(allDays, *merged)
+
+    def at(self, days):
+        """Voos e atrasos acumulados até cada dia de `days` (inclusive)"""
+        position = np.searchsorted(self.days, days, side='right') - 1
+        before = position < 0
+        position = position.clip(0)
+        return np.where(before, 0, self.flights[position]), np.where(before, 0, self.delays[position])
+
+    @property
+    def nbytes(self):
+        return self.days.nbytes + self.flights.nbytes + self.delays.nbytes + KEY_OVERHEAD_BYTES
+
+
+class DelayTrendStore:
+    """Somas prefixadas diárias de voos e atrasos por (dimensão, chave).
+
+    Cada chave guarda as somas só nos dias em que teve voos (`KeySums`):
+    rotas que voam poucas vezes não ocupam uma linha por dia do histórico.
+    Cada previsão é contada uma única vez: a marca d'água por id seleciona
+    as linhas inseridas desde a atualização anterior, e só as chaves
+    tocadas por elas mudam (dias novos são anexados ao fim; dias passados
+    refazem apenas aquela chave). Um rerun sobre a mesma versão do dataset
+    não toca em nada. A taxa de qualquer janela sai da diferença entre
+    duas somas, achadas por busca binária nos dias da chave.
+    """
+
+    def __init__(self):
+        self._sums = {dimension: {} for dimension in DIMENSIONS}
+        self._first = None
+        self._last = None
+        self._watermark = InsertionWatermark()
+        self._lock = threading.Lock()
+        self._nbytes = 0
+        self.build_seconds = 0.0
+
+    def __sizeof__(self):
+        # Medido a cada acesso pelo orçamento de memória: o total é mantido pelo ingest
+        return object.__sizeof__(self) + self._nbytes
+
+    def ingest(self, df):
+        """Incorpora às somas as previsões ainda não vistas do histórico"""
+        with self._lock:
+            pending = self._watermark.pending(df)
+            if pending is None:
+                return
+            start = time.perf_counter()
+            rows, reset = pending
+            if reset:
+                self._sums = {dimension: {} for dimension in DIMENSIONS}
+                self._first = self._last = None
+                self._nbytes = 0
+
+            days = pd.to_datetime(rows['data_apenas'], errors='coerce').to_numpy(dtype='datetime64[D]')
+            valid = ~np.isnat(days)
+            if valid.any():
+                frame = pd.DataFrame({
+                    'dia': days[valid].astype(np.int64),
+                    'atraso': (rows['atraso_previsto'].to_numpy()[valid] > 0).astype(np.int64),
+                    **{column: rows[column].to_numpy()[valid] for column in DIMENSIONS.values() if column}
+                })
+                for dimension, column in DIMENSIONS.items():
+                    self._add(dimension, *daily_counts(frame, column))
+                first, last = days[valid].min(), days[valid].max()
+                self._first = first if self._first is None else min(self._first, first)
+                self._last = last if self._last is None else max(self._last, last)
+            self._watermark.advance(df, rows)
+            self.build_seconds += time.perf_counter() - start
+
+    def _add(self, dimension, keys, days, flights, delays, starts):
+        """Soma as contagens novas às chaves que elas tocam"""
+        # Dicionário novo (cópia rasa): consultas em andamento continuam com as somas anteriores
+        sums = dict(self._sums[dimension])
+        ends = np.r_[starts[1:], len(days)]
+        for key, lo, hi in zip(keys, starts.tolist(), ends.tolist()):
+            current = sums.get(key)
+            if current is None:
+                sums[key] = KeySums.from_daily(days[lo:hi], flights[lo:hi], delays[lo:hi])
+            else:
+                sums[key] = current.merge(days[lo:hi], flights[lo:hi], delays[lo:hi])
+                self._nbytes -= current.nbytes
+            self._nbytes += sums[key].nbytes
+        self._sums[dimension] = sums
+
+    def _period(self, start, end):
+        """Dias do período dentro do intervalo coberto pelo histórico"""
+        if self._first is None:
+            return np.array([], dtype='datetime64[D]')
+        first = max(np.datetime64(pd.Timestamp(start).date(), 'D'), self._first)
+        last = min(np.datetime64(pd.Timestamp(end).date(), 'D'), self._last)
+        return np.arange(first, last + 1, dtype='datetime64[D]')
+
+    def top_keys(self, dimension, start, end, n=5):
+        """Chaves com mais voos no período (diferença das somas nas pontas)"""
+        with self._lock:
+            sums = self._sums[dimension]
+        period = self._period(start, end)
+        if not len(period):
+            return []
+        bounds = np.array([period[0] - 1, period[-1]])
+        totals = {}
+        for key, keySums in sums.items():
+            flights, _ = keySums.at(bounds)
+            if flights[1] > flights[0]:
+                totals[key] = flights[1] - flights[0]
+        return sorted(totals, key=lambda key: (-totals[key], key))[:n]
+
+    def rolling_rates(self, dimension, window, start, end, keys=None):
+        """Taxa de atraso dos últimos `window` dias, para cada dia do período e chave"""
+        with self._lock:
+            sums = self._sums[dimension]
+        columns = ['Dia', 'Chave', 'Voos', 'Atrasos', 'Taxa de Atraso']
+        period = self._period(start, end)
+        keys = list(sums) if keys is None else list(keys)
+        if not len(period) or not keys:
+            return pd.DataFrame(columns=columns)
+
+        # Janela [d - window + 1, d]: diferença entre a soma em d e em d - window
+        frames = []
+        for key in keys:
+            keySums = sums.get(key)
+            if keySums is None:
+                flights = delays = np.zeros(len(period), dtype=np.int64)
+            else:
+                flightsEnd, delaysEnd = keySums.at(period)
+                flightsStart, delaysStart = keySums.at(period - window)
+                flights, delays = flightsEnd - flightsStart, delaysEnd - delaysStart
+            frames.append(pd.DataFrame({'Dia': period, 'Chave': key, 'Voos': flights, 'Atrasos': delays}))
+        out = pd.concat(frames, ignore_index=True).sort_values(['Dia'], kind='stable', ignore_index=True)
+        out['Dia'] = pd.to_datetime(out['Dia'])
+        out['Taxa de Atraso'] = out['Atrasos'] / out['Voos'].where(out['Voos'] > 0)
+        return out[columns]
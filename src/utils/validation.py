@@ -0,0 +1,147 @@
+"""Validação vetorizada do CSV de previsões em lote, antes do envio à API.
+
+Uma linha inválida fazia a API recusar o lote inteiro (400). Aqui todas as
+regras são aplicadas de uma vez sobre as colunas do arquivo; as linhas
+válidas seguem normalizadas para o payload e as inválidas voltam com o
+número da linha no CSV e os motivos, para correção e novo envio.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.distance import fill_distances
+
+REQUIRED_COLUMNS = ['companhia', 'origem_aeroporto', 'destino_aeroporto', 'data_partida']
+PAYLOAD_COLUMNS = REQUIRED_COLUMNS + ['distancia_km']
+
+# data_partida aceita é o horário local da partida, sem fuso: AAAA-MM-DD[T ]HH:MM[:SS[.fração]].
+# Datas sem hora e horários com Z/offset são rejeitados, em vez de convertidos para um fuso escolhido aqui.
+DEPARTURE_PATTERN = r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?'
+OFFSET_PATTERN = DEPARTURE_PATTERN + r'\s*(?:Z|[+-]\d{2}(?::?\d{2})?)'
+
+# Maior distância de grande círculo possível é ~20.015 km (meia circunferência)
+MAX_DISTANCE_KM = 20_100.0
+
+
+class MissingColumnsError(ValueError):
+    """O arquivo não tem as colunas obrigatórias; nenhuma linha pode ser validada"""
+
+    def __init__(self, missing):
+        super().__init__(f"Colunas obrigatórias ausentes: {', '.join(missing)}")
+        self.missing = missing
+
+
+def _per_unique(series, normalize):
+    """Aplica `normalize` aos valores distintos e espalha o resultado pelas linhas.
+
+    Códigos, companhias e horários se repetem muito num lote: as operações
+    de texto rodam sobre milhares de valores, não sobre milhões de linhas.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    values = normalize(pd.Series(uniques, dtype='string'))
+    return pd.Series(values.to_numpy()[codes], index=series.index).where(codes >= 0)
+
+
+def _parse_departures(values):
+    """Horários no formato local estrito; o resto (inclusive com fuso) vira NaT"""
+    values = values.str.strip()
+    strict = values.str.fullmatch(DEPARTURE_PATTERN).fillna(False).astype(bool)
+    parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    # Só valores sem fuso chegam ao parser: um offset numa linha não desloca as demais
+    parsed[strict] = pd.to_datetime(values[strict], format='ISO8601', errors='coerce')
+    return parsed
+
+
+def _reasons(checks, index):
+    """Junta, por linha, as mensagens das regras que falharam.
+
+    Cada regra vira um bit; só as combinações distintas de falhas são
+    convertidas em texto.
+    """
+    flags = np.zeros(len(index), dtype=np.int64)
+    for bit, (_, failed) in enumerate(checks):
+        # Regras sobre colunas `string` dão booleanos anuláveis: NA conta como aprovado
+        failed = pd.Series(failed, index=index).astype('boolean').fillna(False).to_numpy(dtype=bool)
+        flags |= failed.astype(np.int64) << bit
+    combos, inverse = np.unique(flags, return_inverse=True)
+    messages = np.array(
+        ['; '.join(message for bit, (message, _) in enumerate(checks) if combo >> bit & 1) for combo in combos],
+        dtype=object
+    )
+    return pd.Series(messages[inverse.ravel()], index=index)
+
+
+def validate_batch(df, carriers, airport_codes=None, distances=None):
+    """Separa o CSV em `(válidos, rejeitados)`.
+
+    `carriers` mapeia os nomes aceitos (sem diferenciar maiúsculas) para o
+    nome enviado à API; `airport_codes` é o índice de códigos IATA
+    conhecidos (sem ele, só o formato é verificado); `distances` é o
+    `RouteDistances` usado para completar `distancia_km` ausente ou zero.
+    Os válidos têm as colunas do payload; os rejeitados, as colunas
+    originais mais `linha` e `motivo`.
+    """
+    missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise MissingColumnsError(missing)
+
+    carrierKeys = {name.strip().casefold(): value for name, value in carriers.items()}
+    companhia = _per_unique(df['companhia'], lambda v: v.str.strip().str.casefold().map(carrierKeys))
+    origem = _per_unique(df['origem_aeroporto'], lambda v: v.str.strip().str.upper())
+    destino = _per_unique(df['destino_aeroporto'], lambda v: v.str.strip().str.upper())
+    partida = _per_unique(df['data_partida'], _parse_departures)
+    withOffset = _per_unique(df['data_partida'], lambda v: v.str.strip().str.fullmatch(OFFSET_PATTERN))
+    withOffset = withOffset.fillna(False).astype(bool)
+
+    if 'distancia_km' in df.columns:
+        informed = _per_unique(df['distancia_km'], lambda v: v.str.strip().replace('', pd.NA))
+        km = pd.to_numeric(informed, errors='coerce').astype('Float64').astype(float)
+        notNumeric = informed.notna() & km.isna()
+    else:
+        km = pd.Series(np.nan, index=df.index)
+        notNumeric = pd.Series(False, index=df.index)
+
+    origemOk = _per_unique(origem, lambda v: v.str.fullmatch(r'[A-Z]{3}')).fillna(False).astype(bool)
+    destinoOk = _per_unique(destino, lambda v: v.str.fullmatch(r'[A-Z]{3}')).fillna(False).astype(bool)
+
+    checks = [
+        ("companhia não suportada", companhia.isna()),
+        ("origem_aeroporto não é um código IATA", ~origemOk),
+        ("destino_aeroporto não é um código IATA", ~destinoOk),
+        ("origem igual ao destino", origemOk & (origem == destino)),
+        ("data_partida com fuso horário (informe o horário local, sem Z ou offset)", withOffset),
+        ("data_partida inválida (use AAAA-MM-DDTHH:MM[:SS])", partida.isna() & ~withOffset),
+        ("distancia_km não numérica", notNumeric),
+        (f"distancia_km fora do intervalo 0–{MAX_DISTANCE_KM:.0f} km", (km < 0) | (km > MAX_DISTANCE_KM))
+    ]
+    if airport_codes is not None and len(airport_codes):
+        checks += [
+            ("origem_aeroporto desconhecido", origemOk & ~origem.isin(airport_codes)),
+            ("destino_aeroporto desconhecido", destinoOk & ~destino.isin(airport_codes))
+        ]
+
+    normalized = pd.DataFrame({
+        'companhia': companhia,
+        'origem_aeroporto': origem,
+        'destino_aeroporto': destino,
+        'data_partida': np.datetime_as_string(partida.to_numpy(dtype='datetime64[s]'), unit='s'),
+        'distancia_km': km.where(km > 0)
+    }, index=df.index)
+
+    reasons = _reasons(checks, df.index)
+    if distances is not None:
+        # Distância calculada só para as linhas que passaram nas demais regras
+        pending = (reasons == '') & normalized['distancia_km'].isna()
+        if pending.any():
+            filled = fill_distances(normalized.loc[pending], distances)['distancia_km']
+            normalized.loc[pending, 'distancia_km'] = filled
+            reasons = reasons.where(~pending | filled.reindex(df.index).notna(), "distância da rota não calculável")
+    else:
+        reasons = reasons.where(normalized['distancia_km'].notna() | (reasons != ''), "distancia_km ausente")
+
+    valid = reasons == ''
+    rejects = df[~valid].copy()
+    # Linha no arquivo (o cabeçalho é a linha 1)
+    rejects.insert(0, 'linha', np.flatnonzero(~valid.to_numpy()) + 2)
+    rejects['motivo'] = reasons[~valid]
+    accepted = normalized[valid][PAYLOAD_COLUMNS].astype({'distancia_km': float})
+    return accepted, rejects
@@ -0,0 +1,43 @@
+"""Marca d'água de inserção para os stores incrementais do histórico.
+
+Os stores (sketches de latência, Top-N, tendências) recebem o histórico
+completo a cada rerun, mas só devem processar o que ainda não viram. A
+marca d'água é o maior `id` de `prediction_history` já incorporado: as
+linhas novas saem de uma comparação sobre a coluna de ids, antes de
+qualquer conversão, e previsões inseridas depois para datas passadas
+também entram. A versão do dataset (`df.attrs['versao']`, de
+`shared_dataset`) evita até essa comparação quando nada mudou.
+"""
+import numpy as np
+
+
+class InsertionWatermark:
+    """Maior id incorporado e a última versão do dataset vista"""
+
+    def __init__(self):
+        self.last_id = None
+        self.version = None
+
+    def pending(self, df):
+        """`(linhas novas, recomeçar)`; None quando esta versão do dataset já foi incorporada.
+
+        `recomeçar` indica que os ids voltaram para trás (tabela recriada):
+        o store deve descartar o que tem e incorporar o histórico inteiro.
+        """
+        version = df.attrs.get('versao')
+        if version is not None and version == self.version:
+            return None
+        ids = df['id'].to_numpy() if 'id' in df.columns else np.arange(len(df))
+        reset = self.last_id is not None and len(ids) > 0 and ids.max() < self.last_id
+        if self.last_id is None or reset:
+            self.last_id = None
+            return df, reset
+        return df[ids > self.last_id], False
+
+    def advance(self, df, rows):
+        """Registra `rows` (as linhas novas de `df`) como incorporadas"""
+        self.version = df.attrs.get('versao')
+        if len(rows):
+            # Sem coluna id, a posição no frame faz o papel do id
+            lastId = int(rows['id'].max()) if 'id' in rows.columns else len(df) - 1
+            self.last_id = lastId if self.last_id is None else max(self.last_id, lastId)
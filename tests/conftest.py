@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos do app são importados como `utils.*`, a partir de src/ (como no `streamlit run src/app.py`)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
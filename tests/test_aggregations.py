@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from utils.aggregations import weekday_hour_arrays, weekday_hour_counts, weekday_hour_frame, weekday_hour_grid
+from utils.shared_cache import deserialize_frame, serialize_frame
+
+
+def flights(n=500, seed=7):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'data_partida': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 60 * 24 * 90, n), unit='min'),
+        'companhia_aerea': rng.choice(['Delta', 'United', 'LATAM'], n),
+        'atraso_previsto': rng.integers(0, 2, n)
+    })
+
+
+def test_weekday_hour_counts_survive_the_shared_cache():
+    keys, counts, delays = weekday_hour_counts(flights())
+    blob = serialize_frame(weekday_hour_frame(keys, counts, delays))
+    sharedKeys, sharedCounts, sharedDelays = weekday_hour_arrays(deserialize_frame(blob))
+    assert sharedKeys == keys
+    assert (sharedCounts == counts).all() and (sharedDelays == delays).all()
+
+
+def crosstab(df, values=None):
+    """Grade 7x24 de referência (voos, ou soma de `values`) com pd.crosstab"""
+    grid = pd.crosstab(
+        df['data_partida'].dt.weekday, df['data_partida'].dt.hour,
+        values=None if values is None else df[values], aggfunc=None if values is None else 'sum'
+    )
+    return grid.reindex(index=range(7), columns=range(24), fill_value=0).fillna(0).astype(int).to_numpy()
+
+
+def test_weekday_hour_counts_match_crosstab_and_skip_missing_departures():
+    df = flights()
+    df.loc[df.sample(40, random_state=1).index, 'data_partida'] = pd.NaT
+    keys, counts, delays = weekday_hour_counts(df)
+
+    valid = df.dropna(subset=['data_partida'])
+    assert counts.sum() == len(valid)
+    assert (counts.sum(axis=0) == crosstab(valid)).all()
+    assert (delays.sum(axis=0) == crosstab(valid, 'atraso_previsto')).all()
+
+    company = valid[valid['companhia_aerea'] == 'LATAM']
+    assert (counts[keys.index('LATAM')] == crosstab(company)).all()
+    assert (delays[keys.index('LATAM')] == crosstab(company, 'atraso_previsto')).all()
+
+    grid = weekday_hour_grid(counts.sum(axis=0), delays.sum(axis=0))
+    assert grid['Voos'].shape == (7, 24)
+    # Células sem voos ficam NaN nas duas
+    with np.errstate(invalid='ignore'):
+        expected = crosstab(valid, 'atraso_previsto') / crosstab(valid)
+    assert np.allclose(grid['Taxa de Atraso'].to_numpy(), expected, equal_nan=True)
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from utils.airports import AirportActivity
+
+COORDS = {'GRU': (-23.4, -46.5), 'JFK': (40.6, -73.8), 'MIA': (25.8, -80.3), 'LIS': (38.8, -9.1)}
+
+
+def flights(n, codes, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({'origem_aeroporto': rng.choice(codes, n), 'destino_aeroporto': rng.choice(codes, n)})
+    for side in ['origem', 'destino']:
+        # Aeroportos fora de COORDS ficam sem coordenadas (registrados, mas fora do globo)
+        df[f'{side}_latitude'] = df[f'{side}_aeroporto'].map({code: lat for code, (lat, _) in COORDS.items()})
+        df[f'{side}_longitude'] = df[f'{side}_aeroporto'].map({code: lon for code, (_, lon) in COORDS.items()})
+        df[f'{side}_nome_completo'] = df[f'{side}_aeroporto'] + ' Airport'
+    return df
+
+
+def expected_counts(df):
+    """Partidas + chegadas por aeroporto, com groupby"""
+    departures = df.groupby('origem_aeroporto').size()
+    arrivals = df.groupby('destino_aeroporto').size()
+    return departures.add(arrivals, fill_value=0).astype(float)
+
+
+def assert_counts(activity, df):
+    located = expected_counts(df)[lambda counts: counts.index.isin(list(COORDS))]
+    frame = activity.frame().set_index('aeroporto')
+    pd.testing.assert_series_equal(frame['total'].sort_index(), located.sort_index(), check_names=False)
+    assert frame['latitude'].to_dict() == {code: COORDS[code][0] for code in frame.index}
+    assert frame['nome_completo'].to_dict() == {code: f"{code} Airport" for code in frame.index}
+    # Os sem coordenadas continuam contados
+    assert activity.size == len(expected_counts(df))
+
+
+def test_full_load_matches_groupby():
+    df = flights(500, ['GRU', 'JFK', 'MIA', 'XXX'], seed=1)
+    assert_counts(AirportActivity.from_flights(df), df)
+
+
+def test_incremental_ingest_matches_groupby():
+    first = flights(300, ['GRU', 'JFK', 'XXX'], seed=2)
+    # Os deltas trazem aeroportos novos (MIA, LIS) além de contagens para os já vistos
+    deltas = [flights(n, ['GRU', 'MIA', 'LIS', 'YYY'], seed=seed) for seed, n in [(3, 40), (4, 1), (5, 0), (6, 200)]]
+    activity = AirportActivity(capacity=2).add(first)
+    seen = first
+    for delta in deltas:
+        activity.add(delta)
+        if len(delta):
+            seen = pd.concat([seen, delta], ignore_index=True)
+        assert_counts(activity, seen)
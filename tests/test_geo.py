@@ -0,0 +1,23 @@
+import numpy as np
+
+from utils import geo
+
+
+def test_arc_cache_keeps_the_most_recent_routes(monkeypatch):
+    monkeypatch.setattr(geo, 'ARC_CACHE_SIZE', 3)
+    monkeypatch.setattr(geo, '_arc_cache', type(geo._arc_cache)())
+    coords = {'GRU': (-23.4, -46.5), 'JFK': (40.6, -73.8), 'LIS': (38.8, -9.1), 'MIA': (25.8, -80.3)}
+
+    def arcs(*routes):
+        lat1, lon1 = zip(*(coords[o] for o, _ in routes))
+        lat2, lon2 = zip(*(coords[d] for _, d in routes))
+        return geo.route_arcs([o for o, _ in routes], [d for _, d in routes], lat1, lon1, lat2, lon2)
+
+    arcs(('GRU', 'JFK'), ('GRU', 'LIS'), ('GRU', 'MIA'))
+    arcs(('GRU', 'JFK'))
+    lats, lons = arcs(('JFK', 'LIS'), ('GRU', 'MIA'))
+
+    # GRU-LIS, a menos usada, saiu; as acessadas vão para o fim
+    assert list(geo._arc_cache) == [('GRU', 'JFK', 32), ('GRU', 'MIA', 32), ('JFK', 'LIS', 32)]
+    assert lats.shape == (2, 32)
+    assert np.allclose([lats[0, 0], lons[0, 0], lats[0, -1], lons[0, -1]], [40.6, -73.8, 38.8, -9.1])
@@ -0,0 +1,47 @@
+from datetime import date
+
+import pandas as pd
+
+from utils.heavy_hitters import TopKStore
+from utils.sketches import HyperLogLog
+
+
+def history(ids, days, companies, versao):
+    df = pd.DataFrame({
+        'id': ids,
+        'data_apenas': [date.fromisoformat(day) for day in days],
+        'companhia_aerea': companies,
+        'linhas_aereas': [f"{company[:3]}-MIA" for company in companies],
+        'atraso_previsto': 1
+    })
+    df.attrs['versao'] = versao
+    return df
+
+
+def test_folded_hll_matches_lower_precision():
+    keys = [f"rota-{i}" for i in range(5000)]
+    sketch = HyperLogLog(14).update(keys)
+    assert (sketch.folded(10).registers == HyperLogLog(10).update(keys).registers).all()
+
+
+def test_late_rows_for_past_days_are_counted():
+    store = TopKStore()
+    first = history([1, 2, 3], ['2024-01-01', '2024-01-01', '2024-01-02'], ['Delta', 'Delta', 'United'], 'h:1')
+    store.ingest(first)
+    late = pd.concat([first, history([4, 5], ['2024-01-01'] * 2, ['United'] * 2, 'h:2')])
+    late.attrs['versao'] = 'h:2'
+    store.ingest(late)
+
+    top = store.top_companies(date(2024, 1, 1), date(2024, 1, 2)).set_index('Chave')['Estimativa']
+    assert top.to_dict() == {'United': 3.0, 'Delta': 2.0}
+    assert round(store.distinct_routes(date(2024, 1, 1), date(2024, 1, 2))) == 2
+
+
+def test_epsilon_is_applied_at_query_time():
+    store = TopKStore()
+    companies = [f"C{i:03d}" for i in range(300)] + ['Delta'] * 50
+    store.ingest(history(range(len(companies)), ['2024-01-01'] * len(companies), companies, 'h:1'))
+    loose = store.top_companies(date(2024, 1, 1), date(2024, 1, 1), epsilon=0.05)
+    exact = store.top_companies(date(2024, 1, 1), date(2024, 1, 1), epsilon=0.001)
+    # O mesmo store atende os dois erros; o heavy hitter aparece em ambos
+    assert loose.iloc[0].tolist() == exact.iloc[0].tolist() == ['Delta', 50.0, 0.0]
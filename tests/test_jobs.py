@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from utils.jobs import DONE, FAILED, MAX_ATTEMPTS, JobQueue, JobStore, PENDING
+from utils.prediction_client import CircuitOpenError
+
+
+class Response:
+    def __init__(self, body, status_code=200):
+        self.status_code = status_code
+        self.text = body if isinstance(body, str) else json.dumps(body)
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class Client:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+
+    def predict_batch(self, payload):
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+FLIGHTS = [{'companhia': 'Delta Air Lines'}, {'companhia': 'United Airlines'}]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / 'jobs.db'))
+
+
+def chunk_status(store, job_id):
+    with store._connect() as conn:
+        return conn.execute("SELECT status, error FROM job_chunks WHERE job_id = ?", (job_id,)).fetchone()
+
+
+def test_worker_survives_non_json_response_and_backs_off(store):
+    queue = JobQueue(store, Client(Response("<html>ok</html>")), workers=0)
+    job_id = store.create(FLIGHTS, chunk_size=2)
+    assert queue._run_once() is False
+
+    status, error = chunk_status(store, job_id)
+    assert status == PENDING and error.startswith("JSONDecodeError")
+    # O backoff está gravado no bloco: ninguém o pega antes do prazo
+    assert store.claim() is None
+
+
+def test_running_chunk_is_only_taken_after_its_lease_expires(store):
+    store.create(FLIGHTS, chunk_size=2)
+    first = store.claim(lease=-1)
+    assert first is not None
+    second = store.claim()
+    assert second[:2] == first[:2] and second[3] == first[3] + 1
+    assert store.claim() is None
+
+    # O worker antigo não sobrescreve o resultado de quem retomou o bloco
+    store.finish_chunk(*first[:2], first[3], FAILED, error="atrasado")
+    store.finish_chunk(*second[:2], second[3], DONE, result=[{'probabilidade': 0.1}] * 2)
+    assert chunk_status(store, first[0]) == (DONE, None)
+
+
+def test_response_length_mismatch_fails_chunk_and_job(store):
+    queue = JobQueue(store, Client(Response([{'probabilidade': 0.2}])), workers=0)
+    job_id = store.create(FLIGHTS, chunk_size=2)
+    queue._process(*store.claim())
+
+    status, error = chunk_status(store, job_id)
+    assert status == FAILED and "1 itens para 2 voos" in error
+    assert store.progress(job_id)['status'] == FAILED
+
+
+def test_job_with_a_successful_chunk_is_done(store):
+    queue = JobQueue(store, Client(Response([{'probabilidade': 0.2}]), Response("inválido", 400)), workers=0)
+    job_id = store.create(FLIGHTS, chunk_size=1)
+    queue._process(*store.claim())
+    queue._process(*store.claim())
+
+    progress = store.progress(job_id)
+    assert progress['status'] == DONE
+    assert progress['blocos_com_falha'] == 1
+    assert store.results(job_id)['status'].tolist() == ['Sucesso', 'Falha']
+
+
+def test_open_breaker_does_not_use_up_attempts(store):
+    outage = [CircuitOpenError(30)] * (MAX_ATTEMPTS + 2)
+    queue = JobQueue(store, Client(*outage, Response([{'probabilidade': 0.2}] * 2)), workers=0)
+    job_id = store.create(FLIGHTS, chunk_size=2)
+
+    for _ in outage:
+        assert queue._run_once() is True
+        # O bloco espera o circuito meio-abrir
+        assert store.claim() is None
+        with store._connect() as conn:
+            attempts, = conn.execute("SELECT attempts FROM job_chunks WHERE job_id = ?", (job_id,)).fetchone()
+            conn.execute("UPDATE job_chunks SET not_before = NULL WHERE job_id = ?", (job_id,))
+        assert attempts == 0
+
+    assert queue._run_once() is True
+    assert store.progress(job_id)['status'] == DONE
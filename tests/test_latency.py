@@ -0,0 +1,50 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from utils.latency import LatencySketchStore
+
+
+def history(ids, days, latencies, versao):
+    df = pd.DataFrame({
+        'id': ids,
+        'request_at': [f"{day}T12:00:00" for day in days],
+        'tempo_resposta_ms': latencies,
+        'modelo_versao': 'v1',
+        'linhas_aereas': 'JFK-MIA'
+    })
+    df.attrs['versao'] = versao
+    return df
+
+START, END = date(2024, 1, 1), date(2024, 1, 31)
+
+
+def test_late_rows_for_past_days_are_counted():
+    store = LatencySketchStore()
+    first = history([1, 2], ['2024-01-01', '2024-01-02'], [100.0, 200.0], 'h:1')
+    store.ingest(first)
+    late = pd.concat([first, history([3], ['2024-01-01'], [300.0], 'h:2')])
+    late.attrs['versao'] = 'h:2'
+    store.ingest(late)
+
+    daily = store.daily_percentiles(START, END)
+    assert daily['Previsões'].tolist() == [2, 1]
+    assert daily['p99'].iloc[0] >= 290
+
+
+def test_same_version_is_not_reingested():
+    store = LatencySketchStore()
+    df = history([1, 2], ['2024-01-01', '2024-01-01'], [100.0, 200.0], 'h:1')
+    store.ingest(df)
+    store.ingest(df)
+    assert store.daily_percentiles(START, END)['Previsões'].tolist() == [2]
+
+
+def test_ids_going_back_rebuild_the_store():
+    store = LatencySketchStore()
+    store.ingest(history([10, 11], ['2024-01-01', '2024-01-01'], [100.0, 200.0], 'h:1'))
+    store.ingest(history([1], ['2024-01-03'], [50.0], 'h:2'))
+    daily = store.daily_percentiles(START, END)
+    assert daily['Previsões'].tolist() == [1]
+    assert np.isclose(daily['p50'].iloc[0], 50.0)
@@ -0,0 +1,88 @@
+import sqlite3
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from utils import aggregations as agg
+from utils import live
+from utils.storage import TABLE, SQLiteBackend
+
+COORDS = {
+    'GRU': {'lat': -23.4, 'lon': -46.5, 'nome': 'Guarulhos'},
+    'JFK': {'lat': 40.6, 'lon': -73.8, 'nome': 'John F Kennedy'},
+    'MIA': {'lat': 25.8, 'lon': -80.3, 'nome': 'Miami'},
+    'LIS': {'lat': 38.8, 'lon': -9.1, 'nome': 'Lisboa'}
+}
+ROUTES = [('GRU', 'JFK'), ('GRU', 'MIA'), ('JFK', 'LIS'), ('MIA', 'GRU'), ('LIS', 'XXX')]
+
+
+class FakeDate(date):
+    current = date(2024, 3, 10)
+
+    @classmethod
+    def today(cls):
+        return cls.current
+
+
+def flights(first_id, day, n):
+    rows = [ROUTES[i % len(ROUTES)] for i in range(n)]
+    return pd.DataFrame({
+        'id': range(first_id, first_id + n),
+        'origem_aeroporto': [origem for origem, _ in rows],
+        'destino_aeroporto': [destino for _, destino in rows],
+        'data_partida': [datetime.combine(day, datetime.min.time()) + timedelta(minutes=37 * i) % timedelta(days=1)
+                         for i in range(n)],
+        'atraso_previsto': [(i * 7) % 3 == 0 for i in range(n)]
+    }).astype({'atraso_previsto': int})
+
+
+def insert(path, df):
+    with sqlite3.connect(path) as conn:
+        df.to_sql(TABLE, conn, if_exists='append', index=False)
+
+
+def assert_matches_recompute(feed):
+    """Os agregados mantidos por delta são iguais aos recalculados sobre o dataset do dia"""
+    airports, routes, status, airportDelays, hourly = feed.views()
+    full = feed.frame()
+
+    key = ['aeroporto']
+    pd.testing.assert_frame_equal(
+        airports.sort_values(key).reset_index(drop=True), agg.today_airports(full).sort_values(key).reset_index(drop=True)
+    )
+    key = ['origem_aeroporto', 'destino_aeroporto']
+    expected = agg.today_routes(full).sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(routes.sort_values(key).reset_index(drop=True)[expected.columns], expected,
+                                  check_dtype=False)
+    assert status.set_index('Status_Code')['Total'].to_dict() == agg.today_status(full).set_index('Status_Code')['Total'].to_dict()
+    expected = agg.today_airport_delays(full, n=len(full))
+    assert len(airportDelays) == min(5, len(expected))
+    assert airportDelays['Taxa_Atraso'].tolist() == pytest.approx(expected['Taxa_Atraso'].head(5).tolist())
+    pd.testing.assert_frame_equal(hourly.reset_index(drop=True), agg.today_hourly(full), check_dtype=False)
+    assert feed.flights == len(full)
+
+
+def test_deltas_match_full_recompute_across_day_rollover(tmp_path, monkeypatch):
+    monkeypatch.setattr(live, 'date', FakeDate)
+    path = tmp_path / 'historico.db'
+    day = FakeDate.current
+    insert(path, pd.concat([flights(1, day - timedelta(days=1), 30), flights(31, day, 40)]))
+
+    feed = live.TodayFeed(SQLiteBackend(str(path)), interval=3600, coords=COORDS)
+    assert feed.day == day and len(feed.frame()) == 40
+    assert_matches_recompute(feed)
+
+    # Linhas novas de hoje e uma tardia de ontem (que fica fora do dia)
+    insert(path, pd.concat([flights(71, day, 25), flights(96, day - timedelta(days=1), 1)]))
+    assert feed.poll() == 25
+    assert_matches_recompute(feed)
+
+    # Virada do dia: o dia carregado é o do app, não o do relógio do banco
+    monkeypatch.setattr(FakeDate, 'current', day + timedelta(days=1))
+    insert(path, flights(97, FakeDate.current, 12))
+    assert feed.poll() == 0
+    assert feed.day == FakeDate.current and len(feed.frame()) == 12
+    insert(path, flights(109, FakeDate.current, 9))
+    assert feed.poll() == 9
+    assert_matches_recompute(feed)
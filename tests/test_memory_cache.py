@@ -0,0 +1,41 @@
+import numpy as np
+
+from utils.memory_cache import MemoryBudgetCache
+
+MB = 2 ** 20
+
+
+class Store:
+    """Objeto residente que cresce depois de guardado"""
+
+    def __init__(self):
+        self.nbytes = 0
+        self.build_seconds = 0.0
+
+    def __sizeof__(self):
+        return self.nbytes
+
+
+def test_resident_entry_is_remeasured_and_pushes_out_others():
+    cache = MemoryBudgetCache(10 * MB)
+    store = cache.get_or_compute('store', ('store',), Store, resident=True)
+    cache.get_or_compute('frame', ('frame',), lambda: np.zeros(6 * MB // 8))
+    assert cache.snapshot()['entradas'] == 2
+
+    store.nbytes = 8 * MB
+    store.build_seconds = 5.0
+    assert cache.get_or_compute('store', ('store',), Store, resident=True) is store
+    assert cache.snapshot()['entradas'] == 1
+    assert cache.used <= cache.budget
+
+
+def test_pinned_entry_is_never_evicted_or_cleared():
+    cache = MemoryBudgetCache(4 * MB)
+    feed = cache.get_or_compute('feed', ('feed',), Store, pinned=True)
+    feed.nbytes = 3 * MB
+    cache.get_or_compute('feed', ('feed',), Store, pinned=True)
+    cache.get_or_compute('frame', ('frame',), lambda: np.zeros(2 * MB // 8))
+    cache.clear()
+
+    assert cache.get(('feed',)) is feed
+    assert cache.snapshot()['entradas'] == 1
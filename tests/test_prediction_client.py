@@ -0,0 +1,61 @@
+import pytest
+import requests
+
+from utils.prediction_client import CircuitBreaker, CircuitOpenError, PredictionClient
+
+
+def expire(breaker):
+    """Simula a passagem do `reset_timeout` desde a abertura"""
+    breaker.opened_at -= breaker.reset_timeout
+
+
+def test_breaker_opens_after_threshold_and_probes_once_when_half_open():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.before_request()
+        breaker.record_failure()
+    assert breaker.state == 'fechado'
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == 'aberto'
+
+    with pytest.raises(CircuitOpenError) as rejected:
+        breaker.before_request()
+    assert 0 < rejected.value.retry_in <= 30
+
+    expire(breaker)
+    assert breaker.state == 'meio-aberto'
+    breaker.before_request()
+    # Só uma requisição de teste passa enquanto o circuito está meio-aberto
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    breaker.record_success()
+    assert breaker.state == 'fechado'
+    breaker.before_request()
+
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    expire(breaker)
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == 'aberto'
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_client_does_not_send_while_open(monkeypatch):
+    client = PredictionClient("http://api.invalid", breaker=CircuitBreaker(failure_threshold=1))
+    calls = []
+
+    def refuse(*args, **kwargs):
+        calls.append(args)
+        raise requests.ConnectionError("recusado")
+
+    monkeypatch.setattr(client.session, 'post', refuse)
+    with pytest.raises(requests.ConnectionError):
+        client.predict_batch([])
+    with pytest.raises(CircuitOpenError):
+        client.predict_batch([])
+    assert len(calls) == 1
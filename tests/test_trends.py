@@ -0,0 +1,69 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.trends import DelayTrendStore
+
+
+def history(ids, days, delays, versao):
+    df = pd.DataFrame({
+        'id': ids,
+        'data_apenas': [date.fromisoformat(day) for day in days],
+        'atraso_previsto': delays,
+        'companhia_aerea': 'Delta Air Lines',
+        'linhas_aereas': 'JFK-MIA'
+    })
+    df.attrs['versao'] = versao
+    return df
+
+
+def test_late_predictions_for_past_days_update_the_windows():
+    store = DelayTrendStore()
+    first = history([1, 2], ['2024-01-01', '2024-01-03'], [10, 0], 'h:1')
+    store.ingest(first)
+    late = pd.concat([first, history([3, 4], ['2024-01-02', '2023-12-31'], [5, 0], 'h:2')])
+    late.attrs['versao'] = 'h:2'
+    store.ingest(late)
+
+    rates = store.rolling_rates('total', 7, date(2023, 12, 31), date(2024, 1, 3))
+    assert rates['Voos'].tolist() == [1, 2, 3, 4]
+    assert rates['Atrasos'].tolist() == [0, 1, 2, 2]
+
+
+def test_same_version_is_not_counted_twice():
+    store = DelayTrendStore()
+    df = history([1, 2], ['2024-01-01', '2024-01-01'], [10, 0], 'h:1')
+    store.ingest(df)
+    store.ingest(df)
+    assert store.top_keys('companhia', date(2024, 1, 1), date(2024, 1, 1)) == ['Delta Air Lines']
+    assert store.rolling_rates('total', 7, date(2024, 1, 1), date(2024, 1, 1))['Voos'].tolist() == [2]
+
+
+def test_sparse_route_sums_match_a_full_recompute():
+    rng = np.random.default_rng(3)
+
+    def batch(ids, last_day, versao):
+        days = [str(date(2024, 1, 1) + timedelta(days=int(d))) for d in rng.integers(0, last_day, len(ids))]
+        df = history(ids, days, rng.integers(0, 2, len(ids)) * 10, versao)
+        df['linhas_aereas'] = rng.choice(['GRU-JFK', 'JFK-MIA', 'MIA-LIS', 'LIS-GRU'], len(ids), p=[0.7, 0.2, 0.07, 0.03])
+        return df
+
+    # Primeiro janeiro; depois dias novos (anexados ao fim) e tardios de janeiro (refazem a chave)
+    first = batch(range(1, 251), 31, 'h:1')
+    df = pd.concat([first, batch(range(251, 401), 60, 'h:2')], ignore_index=True)
+    df.attrs['versao'] = 'h:2'
+    store = DelayTrendStore()
+    store.ingest(first)
+    store.ingest(df)
+
+    start, end = date(2024, 1, 5), date(2024, 2, 29)
+    rates = store.rolling_rates('rota', 7, start, end, ['GRU-JFK', 'MIA-LIS', 'SEM-VOOS'])
+    assert rates['Dia'].max() == pd.Timestamp(df['data_apenas'].max())
+    for key, rows in rates.groupby('Chave', sort=False):
+        flights = df[df['linhas_aereas'] == key]
+        for day, voos, atrasos in rows[['Dia', 'Voos', 'Atrasos']].itertuples(index=False):
+            window = flights[(flights['data_apenas'] > (day - timedelta(days=7)).date()) & (flights['data_apenas'] <= day.date())]
+            assert (voos, atrasos) == (len(window), int((window['atraso_previsto'] > 0).sum()))
+    expected = df[(df['data_apenas'] >= start) & (df['data_apenas'] <= end)]['linhas_aereas'].value_counts()
+    assert store.top_keys('rota', start, end, n=2) == expected.index[:2].tolist()
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from utils.distance import RouteDistances
+from utils.validation import MissingColumnsError, validate_batch
+
+CARRIERS = {"American Airlines": "American Airlines", "Delta Air Lines": "Delta Air Lines"}
+AIRPORTS = pd.DataFrame({
+    'iata': ['JFK', 'MIA', 'LAX', 'SFO'],
+    'latitude': [40.64, 25.79, 33.94, 37.62],
+    'longitude': [-73.78, -80.29, -118.41, -122.38]
+})
+
+
+def batch(*departures, **columns):
+    n = len(departures)
+    return pd.DataFrame({
+        'companhia': columns.get('companhia', ['Delta Air Lines'] * n),
+        'origem_aeroporto': columns.get('origem_aeroporto', ['LAX'] * n),
+        'destino_aeroporto': columns.get('destino_aeroporto', ['SFO'] * n),
+        'data_partida': list(departures),
+        'distancia_km': columns.get('distancia_km', ['543'] * n)
+    }, dtype=str)
+
+
+def validate(df):
+    return validate_batch(df, CARRIERS, AIRPORTS['iata'], RouteDistances(AIRPORTS))
+
+
+def test_offset_row_does_not_shift_naive_rows():
+    valid, rejects = validate(batch('2024-03-15T10:30', '2024-03-15T10:30:00+02:00', '2024-03-16 14:20:00'))
+    assert valid['data_partida'].tolist() == ['2024-03-15T10:30:00', '2024-03-16T14:20:00']
+    assert rejects['linha'].tolist() == [3]
+    assert rejects['motivo'].iloc[0].startswith("data_partida com fuso horário")
+
+
+def test_z_suffix_rejects_only_its_own_row():
+    valid, rejects = validate(batch('2024-03-15T10:30Z', '2024-03-15T10:30', '2024-03-15T10:30'))
+    assert len(valid) == 2
+    assert (valid['data_partida'] == '2024-03-15T10:30:00').all()
+    assert rejects['linha'].tolist() == [2]
+    assert "fuso horário" in rejects['motivo'].iloc[0]
+
+
+def test_date_without_time_is_rejected():
+    valid, rejects = validate(batch('2024-03-15', '2024-03-15T08:00'))
+    assert valid['data_partida'].tolist() == ['2024-03-15T08:00:00']
+    assert rejects['motivo'].tolist() == ["data_partida inválida (use AAAA-MM-DDTHH:MM[:SS])"]
+
+
+def test_invalid_calendar_date_is_rejected():
+    _, rejects = validate(batch('2024-13-01T10:00'))
+    assert rejects['motivo'].tolist() == ["data_partida inválida (use AAAA-MM-DDTHH:MM[:SS])"]
+
+
+def test_rows_are_normalised_and_distance_filled():
+    df = batch(
+        '2024-03-15T10:30', '2024-03-15T11:00',
+        companhia=['american airlines', 'AA'],
+        origem_aeroporto=[' jfk ', 'LAX'],
+        destino_aeroporto=['MIA', 'SFO'],
+        distancia_km=['', '543']
+    )
+    valid, rejects = validate(df)
+    assert valid.iloc[0][['companhia', 'origem_aeroporto']].tolist() == ['American Airlines', 'JFK']
+    assert valid.iloc[0]['distancia_km'] > 1500
+    assert rejects['motivo'].tolist() == ["companhia não suportada"]
+
+
+def test_missing_columns_raise():
+    with pytest.raises(MissingColumnsError):
+        validate(batch('2024-03-15T10:30').drop(columns='data_partida'))